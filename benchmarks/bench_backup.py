@@ -0,0 +1,76 @@
+"""
+Throughput of online backups and restores, and their effect on a live session.
+
+Builds a database holding many users' worth of daily habits, then backs it up
+raw and gzip-compressed while another thread keeps logging values through its
+own Database, and restores each backup. Reports MB/s of database pages and
+the slowest logging commit seen during each backup. Multi-GB files are built
+with larger --habits and --days values.
+
+    python -m benchmarks.bench_backup [--habits 200] [--days 5000]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+from benchmarks.common import build_database
+from src.db import Database
+
+
+def log_until(path: str, stop: threading.Event, latencies: list[float]):
+    """Log one value per iteration, directly committed, until stop is set."""
+    today = date.today().toordinal()
+    with Database(path, read_pool_size=0) as db:
+        value = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            db.upsert_record(today, 1, value % 20)
+            latencies.append(time.perf_counter() - started)
+            value += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=200)
+    parser.add_argument("--days", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/tracker.db"
+        n_records = build_database(path, args.habits, args.days)
+        megabytes = os.path.getsize(path) / 1e6
+        print(f"{n_records} records, {megabytes:.0f} MB database")
+
+        with Database(path) as db:
+            for name, compress in [("raw", False), ("gzip", True)]:
+                backup_path = f"{tmp}/backup-{name}.db"
+                stop, latencies = threading.Event(), []
+                logger = threading.Thread(
+                    target=log_until, args=(path, stop, latencies)
+                )
+                logger.start()
+                time.sleep(0.1)
+
+                started = time.perf_counter()
+                result = db.backup(backup_path, compress)
+                elapsed = time.perf_counter() - started
+                stop.set()
+                logger.join()
+
+                started = time.perf_counter()
+                db.restore(backup_path)
+                restored = time.perf_counter() - started
+
+                print(
+                    f"{name:<5} backup {megabytes / elapsed:7.1f} MB/s -> {result.size / 1e6:6.1f} MB, "
+                    f"restore {megabytes / restored:7.1f} MB/s, "
+                    f"{len(latencies)} logs during backup, slowest {max(latencies) * 1000:.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
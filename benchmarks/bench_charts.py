@@ -0,0 +1,84 @@
+"""
+Render time of habit charts over ten years of daily history.
+
+Compares plotting every daily point with string date labels, as the chart
+did for its fixed 28-day window, with the downsampled chart modes (28 days,
+90 days, 1 year, all time). Charts are rendered off screen with the Agg
+backend.
+
+    python -m benchmarks.bench_charts [--years 10]
+"""
+
+import argparse
+import io
+import random
+import time
+from datetime import date, datetime
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+
+from src import analytics, constants, timeseries  # noqa: E402
+from src.habit_manager import Habit  # noqa: E402
+from src.models import HabitModel  # noqa: E402
+
+
+def render(figure) -> float:
+    started = time.perf_counter()
+    figure.savefig(io.BytesIO(), format="png")
+    plt.close(figure)
+    return time.perf_counter() - started
+
+
+def naive_figure(habit: Habit, n_days: int):
+    """Every daily point with a string label, the former plotting approach."""
+    x_values, y_values = [], []
+    for day, value in timeseries.series(habit.records, *timeseries.window(n_days)):
+        x_values.append(date.fromordinal(day).strftime("%Y-%m-%d"))
+        y_values.append(value)
+    figure = plt.figure(figsize=(10, 4))
+    plt.plot(x_values, y_values, marker="o", color="tab:blue", linewidth=1.5)
+    plt.xticks(rotation=45, ha="right")
+    plt.tight_layout()
+    return figure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=10)
+    args = parser.parse_args()
+
+    today = date.today().toordinal()
+    n_days = args.years * 365
+    rng = random.Random(0)
+    habit = Habit(
+        HabitModel(
+            1,
+            "Cigarettes Smoked",
+            "",
+            constants.PERIODICITY_DAILY,
+            constants.HABIT_TYPE_ELIMINATION,
+            datetime.now(),
+            {today - i: rng.randint(0, 20) for i in range(n_days)},
+        )
+    )
+
+    for label, days in constants.CHART_RANGES.items():
+        started = time.perf_counter()
+        figure = analytics.draw_habit_time_series(habit, days)
+        built = time.perf_counter() - started
+        rendered = render(figure)
+        print(f"{label:<9} downsampled  build {built:.3f}s  render {rendered:.3f}s")
+
+    started = time.perf_counter()
+    figure = naive_figure(habit, n_days)
+    built = time.perf_counter() - started
+    rendered = render(figure)
+    print(f"{'all time':<9} every point  build {built:.3f}s  render {rendered:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
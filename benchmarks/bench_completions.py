@@ -0,0 +1,68 @@
+"""
+Time-of-day analytics over a year of heavy completion logging.
+
+Stores a few hundred completions per day for one habit, then times loading
+them through the (habit_id, ts) index into an array and bucketing them by
+hour, weekday and quarter hour, over the whole year and over the last week.
+
+    python -m benchmarks.bench_completions [--per-day 300] [--days 365]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.common import timed
+from src import completions, constants
+from src.db import Database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--per-day", type=int, default=300)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    now = int(time.time())
+    start = now - args.days * completions.SECONDS_PER_DAY
+    rng = random.Random(0)
+    entries = sorted(
+        (constants.HABIT_CIGARETTE_SMOKED_ID, rng.randrange(start, now))
+        for _ in range(args.per_day * args.days)
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with Database(f"{tmp}/tracker.db") as db:
+            with timed(f"store {len(entries)} completions"):
+                db.add_completions(entries)
+
+            with timed("load all through the index"):
+                timestamps = db.get_completions(constants.HABIT_CIGARETTE_SMOKED_ID)
+            with timed("load last week through the index"):
+                db.get_completions(
+                    constants.HABIT_CIGARETTE_SMOKED_ID,
+                    now - 7 * completions.SECONDS_PER_DAY,
+                )
+
+            offset = completions.local_utc_offset
+            with timed("bucket year by hour"):
+                completions.count_by_hour(timestamps, offset)
+            with timed("bucket year by weekday"):
+                completions.count_by_weekday(timestamps, offset)
+            with timed("bucket year by quarter hour"):
+                completions.count_by_interval(timestamps, 900, offset)
+            with timed("cut last week and bucket by hour"):
+                completions.count_by_hour(
+                    completions.in_range(
+                        timestamps, now - 7 * completions.SECONDS_PER_DAY
+                    ),
+                    offset,
+                )
+            print(
+                f"array size: {timestamps.itemsize * len(timestamps) / 2**20:.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Load time and memory of HabitManager.load_habits at one million records.
+
+Compares the previous loading path, which wrapped every row in a sqlite3.Row
+and an intermediate record dataclass before building the per-habit stores,
+with the current path that streams tuples straight into the stores. Reports
+wall time, peak traced memory and memory retained by the loaded habits.
+
+    python -m benchmarks.bench_load_habits [--habits 100] [--days 10000]
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from itertools import groupby
+from operator import itemgetter
+
+from benchmarks.common import build_database
+from src.db import Database
+from src.habit_manager import HabitManager
+
+
+@dataclass
+class LegacyRecordModel:
+    day: str
+    habit_id: int
+    value: int
+
+
+def legacy_load(path: str) -> dict[int, dict[str, int]]:
+    """Previous get_all_habits + Habit.__init__ record handling."""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("SELECT * FROM records ORDER BY habit_id").fetchall()
+    records_by_habit = {
+        hid: [LegacyRecordModel(r["day"], r["habit_id"], int(r["value"])) for r in recs]
+        for hid, recs in groupby(rows, key=itemgetter("habit_id"))
+    }
+    stores = {
+        hid: {record.day: record.value for record in records}
+        for hid, records in records_by_habit.items()
+    }
+    conn.close()
+    return stores
+
+
+def current_load(path: str) -> HabitManager:
+    with Database(path, read_pool_size=1) as db:
+        habit_manager = HabitManager(db)
+        habit_manager.load_habits()
+    return habit_manager
+
+
+def measure(label: str, load, path: str):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = load(path)
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<8} {elapsed:6.2f}s  peak {peak / 2**20:7.1f} MiB  "
+        f"retained {retained / 2**20:7.1f} MiB"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=100)
+    parser.add_argument("--days", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/tracker.db"
+        n_records = build_database(path, args.habits, args.days)
+        print(f"Loading {n_records} records")
+        measure("legacy", legacy_load, path)
+        measure("current", current_load, path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Read throughput of the pooled read-only connections under concurrency.
+
+Runs a fixed number of rounds of public Database reads (the dashboard's aggregate
+summaries, a habit's record history and the cost report) from 1, 2, 4 and 8
+threads while another thread keeps logging values through the background
+writer, as the app does, and reports reads per second for each thread count.
+Every read flushes pending writes first, so this includes the flush checks.
+"""
+
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from benchmarks.common import build_database
+from src import constants
+from src.db import Database
+
+# Rounds of the three reads, split across the reader threads
+ROUNDS = 48
+
+
+def run_queries(db: Database, count: int):
+    today = date.today().toordinal()
+    for _ in range(count):
+        db.get_habit_summaries(today)
+        db.get_record_history(constants.HABIT_CIGARETTE_SMOKED_ID, today - 90, today)
+        db.get_cost_report(today - 27, today)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/tracker.db"
+        n_records = build_database(path, n_habits=50, n_days=2000)
+        print(f"Database with {n_records} records")
+
+        for threads in (1, 2, 4, 8):
+            with Database(path, read_pool_size=threads, background_writer=True) as db:
+                stop = threading.Event()
+
+                def keep_logging():
+                    value = 0
+                    while not stop.is_set():
+                        value += 1
+                        db.upsert_record(
+                            date.today().toordinal(),
+                            constants.HABIT_CIGARETTE_SMOKED_ID,
+                            value % 20,
+                        )
+                        time.sleep(0.001)
+
+                logger = threading.Thread(target=keep_logging)
+                logger.start()
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(threads) as executor:
+                    for _ in range(threads):
+                        executor.submit(run_queries, db, ROUNDS // threads)
+                elapsed = time.perf_counter() - started
+
+                stop.set()
+                logger.join()
+
+            print(f"{threads} reader thread(s): {3 * ROUNDS / elapsed:8.1f} reads/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Time-to-first-prompt of the menu app on large databases.
+
+Measures opening the database, loading habits and deciding whether today's
+elimination values still need to be logged, which is everything main.py does
+before its first prompt. Compares the full history load from SQLite, the
+full history load from a current binary snapshot and the lazy load of
+today's values only, at growing history lengths.
+
+    python -m benchmarks.bench_startup [--habits 100] [--days 1000 10000]
+"""
+
+import argparse
+import tempfile
+import time
+
+from benchmarks.common import build_database
+from src.db import Database
+from src.habit_manager import HabitManager
+
+
+def time_to_first_prompt(
+    path: str, lazy: bool, snapshot_path: str | None = None
+) -> float:
+    started = time.perf_counter()
+    with Database(path, background_writer=True, snapshot_path=snapshot_path) as db:
+        habit_manager = HabitManager(db)
+        habit_manager.load_habits(lazy=lazy)
+        habit_manager.has_no_elimination_daily_logs()
+        elapsed = time.perf_counter() - started
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=100)
+    parser.add_argument("--days", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'records':>10} {'full':>9} {'snapshot':>9} {'lazy':>9}")
+    for n_days in args.days:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/tracker.db"
+            n_records = build_database(path, args.habits, n_days)
+            full = time_to_first_prompt(path, lazy=False)
+            # The first load writes the snapshot, the second one reads it
+            snapshot_path = f"{tmp}/habits.snapshot"
+            time_to_first_prompt(path, lazy=False, snapshot_path=snapshot_path)
+            snapshot = time_to_first_prompt(path, False, snapshot_path)
+            lazy = time_to_first_prompt(path, lazy=True)
+            print(f"{n_records:>10} {full:>8.3f}s {snapshot:>8.3f}s {lazy:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
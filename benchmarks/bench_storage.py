@@ -0,0 +1,80 @@
+"""
+Storage engines compared: SQLite file, SQLite ":memory:" and MemoryStorage.
+
+Measures logging through a HabitManager on each engine, then repeated batch
+analytics (dashboard summaries and cost reports) over a synthetic database,
+queried on the SQLite file directly versus copied once into MemoryStorage.
+
+    python -m benchmarks.bench_storage [--logs 5000] [--habits 100] [--days 2000]
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import date
+
+from benchmarks.common import build_database
+from src.db import Database
+from src.habit_manager import HabitManager
+from src.memory_storage import MemoryStorage
+
+
+def log_values(storage, n_logs: int) -> float:
+    """Log n_logs values spread over the last days of the first habit."""
+    today = date.today().toordinal()
+    started = time.perf_counter()
+    with storage:
+        habit_manager = HabitManager(storage)
+        habit_manager.load_habits()
+        habit_id = habit_manager.habits[0].id
+        for i in range(n_logs):
+            habit_manager.log_habit_values([(habit_id, today - i % 365, i % 20)])
+    return time.perf_counter() - started
+
+
+def run_analytics(storage, rounds: int) -> float:
+    today = date.today().toordinal()
+    started = time.perf_counter()
+    for day in range(today - rounds + 1, today + 1):
+        storage.get_habit_summaries(day)
+        storage.get_cost_report(day - 27, day)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logs", type=int, default=5000)
+    parser.add_argument("--habits", type=int, default=100)
+    parser.add_argument("--days", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engines = {
+            "sqlite file": Database(f"{tmp}/logging.db"),
+            "sqlite :memory:": Database(":memory:"),
+            "memory": MemoryStorage(),
+        }
+        for name, storage in engines.items():
+            elapsed = log_values(storage, args.logs)
+            print(f"{name:<16} {args.logs} logs: {args.logs / elapsed:9.0f} logs/s")
+
+        path = f"{tmp}/tracker.db"
+        n_records = build_database(path, args.habits, args.days)
+        with Database(path) as db:
+            sqlite_time = run_analytics(db, args.rounds)
+
+            started = time.perf_counter()
+            storage = MemoryStorage.load_from(db)
+            load_time = time.perf_counter() - started
+            memory_time = run_analytics(storage, args.rounds)
+
+        print(
+            f"{args.rounds} rounds of summaries + cost report over {n_records} records: "
+            f"sqlite {sqlite_time:.3f}s, memory {memory_time:.3f}s "
+            f"after a {load_time:.3f}s load"
+        )
+
+
+if __name__ == "__main__":
+    main()
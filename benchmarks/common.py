@@ -0,0 +1,71 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks are plain scripts run from the project root, for example:
+
+    python -m benchmarks.bench_read_pool
+
+They build synthetic databases in a temporary directory and print their
+measurements; they are not collected by pytest.
+"""
+
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from src import constants
+from src.db import Database
+
+
+def build_database(path: str, n_habits: int, n_days: int) -> int:
+    """
+    Create a tracker database holding n_habits daily habits with n_days of records each.
+
+    Returns the number of records written.
+    """
+    with Database(path):
+        pass
+
+    start = date.today() - timedelta(days=n_days)
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO habits (name, description, periodicity, habit_type, created) VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    f"Synthetic habit {i}",
+                    "Benchmark habit",
+                    constants.PERIODICITY_DAILY,
+                    constants.HABIT_TYPE_ELIMINATION,
+                    start.isoformat(),
+                )
+                for i in range(n_habits)
+            ],
+        )
+        habit_ids = [
+            row[0]
+            for row in conn.execute(
+                "SELECT id FROM habits WHERE name LIKE 'Synthetic habit %'"
+            )
+        ]
+        conn.executemany(
+            "INSERT OR REPLACE INTO records (day, habit_id, value) VALUES (?, ?, ?)",
+            (
+                (
+                    (start + timedelta(days=d)).toordinal(),
+                    habit_id,
+                    (d * 7 + habit_id) % 20,
+                )
+                for habit_id in habit_ids
+                for d in range(n_days)
+            ),
+        )
+    return len(habit_ids) * n_days
+
+
+@contextmanager
+def timed(label: str):
+    """Print the wall-clock duration of the enclosed block."""
+    started = time.perf_counter()
+    yield
+    print(f"{label}: {time.perf_counter() - started:.3f}s")
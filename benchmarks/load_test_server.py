@@ -0,0 +1,100 @@
+"""
+Load-test harness for the HTTP JSON API.
+
+Starts the server in-process on a fresh temporary database, or targets an
+already running server with --url, then drives it from several client threads
+that each reuse one keep-alive connection. Reports requests per second and
+latency percentiles:
+
+    python -m benchmarks.load_test_server --clients 8 --requests 500
+    python -m benchmarks.load_test_server --url http://127.0.0.1:8000
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from src import constants
+from src.db import Database
+from src.habit_manager import HabitManager
+from src.server import TrackerHTTPServer
+
+# Read-heavy mix with one write in five requests
+REQUEST_MIX = [
+    ("GET", "/habits", None),
+    ("GET", "/streaks", None),
+    ("POST", f"/habits/{constants.HABIT_CIGARETTE_SMOKED_ID}/log", {"value": 5}),
+    ("GET", "/stats/weekly", None),
+    ("GET", "/plans", None),
+]
+
+
+def run_client(host: str, port: int, n_requests: int, latencies: list[float]):
+    conn = http.client.HTTPConnection(host, port)
+    try:
+        for i in range(n_requests):
+            method, path, body = REQUEST_MIX[i % len(REQUEST_MIX)]
+            started = time.perf_counter()
+            conn.request(method, path, body=json.dumps(body) if body else None)
+            conn.getresponse().read()
+            latencies.append(time.perf_counter() - started)
+    finally:
+        conn.close()
+
+
+def load_test(host: str, port: int, clients: int, requests_per_client: int):
+    latencies: list[float] = []
+    threads = [
+        threading.Thread(
+            target=run_client, args=(host, port, requests_per_client, latencies)
+        )
+        for _ in range(clients)
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{len(latencies)} requests from {clients} keep-alive clients")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} requests/s")
+    print(f"Latency p50: {statistics.median(latencies) * 1000:.2f} ms")
+    print(f"Latency p99: {p99 * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="target an already running server")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="per client")
+    args = parser.parse_args()
+
+    if args.url:
+        target = urlsplit(args.url)
+        load_test(target.hostname, target.port or 80, args.clients, args.requests)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with Database(f"{tmp}/tracker.db", background_writer=True) as db:
+            habit_manager = HabitManager(db)
+            habit_manager.load_habits()
+            server = TrackerHTTPServer(("127.0.0.1", 0), habit_manager)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                load_test("127.0.0.1", server.server_port, args.clients, args.requests)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,95 @@
+import argparse
+from datetime import date
+
 from src.db import Database
 from src.habit_manager import HabitManager
-from src import cli, constants
+from src import cli, constants, server
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Quit Smoking habit tracker")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="serve the HTTP JSON API instead of the menu",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP API host")
+    parser.add_argument("--port", type=int, default=8000, help="HTTP API port")
+    parser.add_argument(
+        "--export",
+        metavar="CSV_PATH",
+        help="write one row per day and one column per habit to a CSV file and exit",
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        help="number of days ending today to export (default: all history)",
+    )
+    parser.add_argument(
+        "--report",
+        metavar="HTML_PATH",
+        help="write the HTML report of all habits and exit; unchanged habits are reused",
+    )
+    parser.add_argument(
+        "--backup",
+        metavar="BACKUP_PATH",
+        help="back up the database, gzip-compressed for a .gz path, with a .sha256 checksum file, and exit",
+    )
+    parser.add_argument(
+        "--restore",
+        metavar="BACKUP_PATH",
+        help="replace the database with a backup after verifying its checksum, and exit",
+    )
+    parser.add_argument(
+        "--maintain",
+        action="store_true",
+        help="free unused space, refresh query statistics, check integrity, report sizes and exit",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
+    args = parse_args()
 
-    with Database() as db:
+    # Logged values are committed by a writer thread so prompts never wait on disk
+    # Full history loads come from a binary snapshot while nothing changed
+    with Database(background_writer=True, snapshot_path=constants.SNAPSHOT_PATH) as db:
         habit_manager = HabitManager(db)
-        habit_manager.load_habits()
 
-        if habit_manager.has_no_elimination_daily_logs():
-            cli.log_values(habit_manager, constants.HABIT_TYPE_ELIMINATION)
+        if args.backup:
+            cli.backup_database(habit_manager, args.backup)
+        elif args.restore:
+            cli.restore_database(habit_manager, args.restore)
+        elif args.maintain:
+            cli.run_maintenance(habit_manager)
+        elif args.export:
+            habit_manager.load_habits()
+            cli.export_csv(habit_manager, args.export, args.days)
+        elif args.report:
+            habit_manager.load_habits()
+            cli.write_report(habit_manager, args.report)
+        elif args.serve:
+            habit_manager.load_habits()
+            server.serve(habit_manager, args.host, args.port)
+        else:
+            # Only today's values are needed to prompt; history loads on first use
+            habit_manager.load_habits(lazy=True)
+            if habit_manager.has_no_elimination_daily_logs():
+                cli.log_values(habit_manager, constants.HABIT_TYPE_ELIMINATION)
+
+            cli.show_menu(habit_manager)
+
+            # History of habits deleted long enough ago is removed in small batches
+            db.purge_archived_habits(
+                date.today().toordinal() - constants.ARCHIVE_RETENTION_IN_DAYS
+            )
 
-        cli.show_menu(habit_manager)
+            # Take this session's changes into the snapshot for the next start;
+            # a fully loaded manager already holds them, a lazy session only
+            # logged values, which the next start replays onto the old snapshot
+            if habit_manager.history_loaded:
+                db.refresh_snapshot(
+                    [habit.to_model() for habit in habit_manager.habits]
+                )
 
     print("Goodbye!")
@@ -0,0 +1,97 @@
+"""
+Incremental adherence tracking for saved reduction plans.
+
+A PlanProgress summarizes how an elimination habit follows its plan since the
+plan started: logged days, days over plan, cumulative deviation from the
+targets and a projected quit day. Every field is a plain sum, so a logged
+value is folded in, or a replaced value taken out, in constant time without
+revisiting the history. The projected quit day comes from a least-squares line
+through the logged values, also derived from running sums.
+"""
+
+import math
+from functools import reduce
+
+from src.models import PlanProgress
+
+
+def projected_quit_day(progress: PlanProgress) -> int | None:
+    """
+    Return the day number where the fitted trend reaches zero, or None.
+
+    None is returned when fewer than two days were logged or when the trend
+    is not decreasing.
+
+    Examples:
+        Values 10, 8, 6 logged on the first three plan days -> start_day + 5
+    """
+    n = progress.logged_days
+    denominator = n * progress.sum_xx - progress.sum_x * progress.sum_x
+    if n < 2 or denominator == 0:
+        return None
+
+    slope = (n * progress.sum_xy - progress.sum_x * progress.sum_y) / denominator
+    intercept = (progress.sum_y - slope * progress.sum_x) / n
+    if slope >= 0:
+        return None
+
+    return progress.start_day + max(0, math.ceil(-intercept / slope))
+
+
+def apply_logged_value(
+    progress: PlanProgress, day: int, target: int, value: int, sign: int = 1
+) -> PlanProgress:
+    """
+    Fold a logged value into the progress, or take it out again with sign=-1.
+
+    Args:
+        progress: Current progress of the habit
+        day: Day number of the logged value
+        target: Planned value for that day
+        value: Logged value
+        sign: 1 to add the value, -1 to remove a value being replaced
+
+    Returns:
+        A new PlanProgress with updated sums and projection
+    """
+    x = day - progress.start_day
+    updated = PlanProgress(
+        habit_id=progress.habit_id,
+        start_day=progress.start_day,
+        logged_days=progress.logged_days + sign,
+        days_over_plan=progress.days_over_plan + sign * (value > target),
+        cumulative_deviation=progress.cumulative_deviation + sign * (value - target),
+        sum_x=progress.sum_x + sign * x,
+        sum_y=progress.sum_y + sign * value,
+        sum_xx=progress.sum_xx + sign * x * x,
+        sum_xy=progress.sum_xy + sign * x * value,
+    )
+    updated.projected_quit_day = projected_quit_day(updated)
+    return updated
+
+
+def progress_from_records(
+    habit_id: int,
+    start_day: int,
+    targets: dict[int, int],
+    records: dict[int, int],
+    until_day: int,
+) -> PlanProgress:
+    """
+    Build the progress of a freshly saved plan from the records it already covers.
+
+    Only the days between start_day and until_day that have both a target and a
+    logged value are folded in; this is the one full pass, later logs are
+    applied incrementally with apply_logged_value().
+    """
+    return reduce(
+        lambda progress, day: apply_logged_value(
+            progress, day, targets[day], records[day]
+        ),
+        [
+            day
+            for day in range(start_day, until_day + 1)
+            if day in targets and day in records
+        ],
+        PlanProgress(habit_id, start_day),
+    )
@@ -15,19 +15,21 @@ All visualization functions generate interactive charts to help users understand
 their progress and maintain motivation in their quit-smoking journey.
 
 Key Features:
-- Consecutive day streak calculations
-- 28-day time series plotting
+- Consecutive day streak calculations, memoized per habit version
+- Time series plotting over 28 days up to all history, downsampled for long ranges
 - Weekly cigarette avoidance and cost savings analysis
 - Progress visualization with bar charts and line graphs
 """
 
+from bisect import bisect_right
 from dataclasses import dataclass
 from functools import reduce
+from operator import itemgetter
 from datetime import date, timedelta
 from typing import Optional
 import matplotlib.pyplot as plt
 from src.habit_manager import HabitManager, Habit
-from src import constants
+from src import constants, timeseries
 
 
 @dataclass
@@ -73,7 +75,7 @@ def longest_run_streak_for_habit(habit: Habit) -> int:
     5. Return the longest streak found
 
     Args:
-        habit: Habit instance containing records dictionary with date keys
+        habit: Habit instance containing records dictionary with day number keys
 
     Returns:
         Integer representing the longest consecutive day streak (0 if no records)
@@ -82,7 +84,7 @@ def longest_run_streak_for_habit(habit: Habit) -> int:
         If habit has records for: [2023-01-01, 2023-01-02, 2023-01-03, 2023-01-05]
         Returns: 3 (consecutive streak from Jan 1-3)
     """
-    # Extract and sort all recorded dates chronologically
+    # Extract and sort all recorded day numbers chronologically
     dates = sorted(habit.records.keys())
 
     # Return 0 for habits with no recorded data
@@ -105,8 +107,8 @@ def longest_run_streak_for_habit(habit: Habit) -> int:
         """
         streak, max_streak = acc
 
-        # Check if current date is exactly 1 day after previous date
-        if (date.fromisoformat(dates[i]) - date.fromisoformat(dates[i - 1])).days == 1:
+        # Check if current day number is exactly 1 after the previous one
+        if dates[i] - dates[i - 1] == 1:
             streak += 1  # Continue the current streak
         else:
             streak = 1  # Reset streak (current date starts a new streak)
@@ -151,82 +153,152 @@ def longest_run_streak_all(tracker) -> int:
     )
 
 
-def plot_habit_time_series(habit: "Habit"):
+def cached_longest_run_streaks(habit_manager: "HabitManager") -> dict[int, int]:
     """
-    Generate and display a time series line chart for habit progress.
+    Return the longest streak of every habit, memoized per habit version.
 
-    Creates a comprehensive visualization showing habit values over the last
-    28 days (configurable via DEFAULT_TIME_RANGE_IN_DAYS). The function builds
-    a continuous timeline that includes missing days as zeros, providing a
-    complete picture of habit consistency and trends.
+    Each streak is stored in the habit manager's analytics cache under a key made
+    of the habit id and its version counter. Logging, updating or removing a habit
+    bumps that counter, so only the habits written since the last call are
+    recomputed; unchanged habits are served from the cache.
+
+    Args:
+        habit_manager: HabitManager instance owning the habits and the cache
+
+    Returns:
+        Dictionary mapping habit id to its longest consecutive day streak
+
+    Examples:
+        Opening the analytics screen twice without logging anything computes
+        every streak once and serves the second visit entirely from the cache.
+    """
+    return {
+        habit.id: habit_manager.memoize(
+            "longest_run_streak",
+            habit,
+            lambda h=habit: longest_run_streak_for_habit(h),
+        )
+        for habit in habit_manager.habits
+    }
+
+
+def draw_habit_time_series(
+    habit: "Habit", n_days: int | None = constants.DEFAULT_TIME_RANGE_IN_DAYS
+):
+    """
+    Draw a time series line chart of habit progress and return its figure.
+
+    Creates a visualization of habit values over the last n_days days, or
+    over all history when n_days is None. The timeline is continuous, with
+    missing days counted as zeros. Long ranges are downsampled to weekly or
+    monthly means (and LTTB beyond that) by timeseries.chart_points, so at
+    most CHART_MAX_POINTS points reach matplotlib whatever the history length.
 
     Chart Features:
-    - Line chart with circular markers for data points
-    - 28-day continuous timeline (including gaps as zeros)
-    - Rotated date labels for better readability
+    - Line chart, with circular markers while points are few enough to read
+    - Continuous timeline (including gaps as zeros)
+    - Date axis with automatic tick spacing and rotated labels
     - Grid lines for easier value reading
     - Professional styling with blue color scheme
 
     Data Processing:
-    1. Normalizes date keys to ensure consistent date handling
-    2. Creates continuous timeline with missing days filled as 0
-    3. Sorts dates chronologically for proper time series display
-    4. Formats dates as YYYY-MM-DD strings for x-axis labels
+    1. Streams (day, value) pairs of the period from timeseries.series
+    2. Downsamples them to daily, weekly or monthly points
+    3. Turns only the plotted day numbers into dates, for the x axis
 
     Args:
-        habit: Habit instance containing records dictionary with date/value pairs
+        habit: Habit instance containing records dictionary with day number/value pairs
+        n_days: Days ending today to chart, or None for all history
 
-    Side Effects:
-        - Displays interactive matplotlib chart window
-        - Does not return any value (pure visualization function)
+    Returns:
+        The matplotlib Figure, not yet shown
 
     Examples:
-        For a habit with records: {"2023-01-01": 5, "2023-01-03": 3}
-        Shows: 28-day chart with values 5, 0, 3, 0, 0... for consecutive days
+        For a habit with records for 2023-01-01 (5) and 2023-01-03 (3)
+        28 days: chart with values 5, 0, 3, 0, 0... for consecutive days
+        10 years: about 120 monthly means
     """
-    today = date.today()
-    n_days = constants.DEFAULT_TIME_RANGE_IN_DAYS  # Default: 28 days
-
-    # Normalize habit.records keys to date objects for consistent processing
-    # Handle both string ISO dates and date objects in the records
-    records = {
-        (day if isinstance(day, date) else date.fromisoformat(day)): value
-        for day, value in habit.records.items()
-    }
-
-    # Build a continuous timeline including today, filling gaps with zeros
-    # This ensures the chart shows a complete 28-day period even with missing data
-    last_period = {
-        today - timedelta(days=offset): records.get(today - timedelta(days=offset), 0)
-        for offset in range(n_days)
-    }
-
-    # Sort by date ascending (chronological order) for proper time series display
-    dates = sorted(last_period.keys())
-    x_values = [d.strftime("%Y-%m-%d") for d in dates]  # Format dates for display
-    y_values = [last_period[d] for d in dates]  # Extract corresponding values
+    today = date.today().toordinal()
+    period = f"Last {n_days} Days" if n_days is not None else "All Time"
+    if n_days is None:
+        # All history: from the first logged day, or just today without records
+        n_days = today - min(habit.records, default=today) + 1
+
+    resolution, points = timeseries.chart_points(
+        habit.records, *timeseries.window(n_days, today)
+    )
+    x_values = [date.fromordinal(day) for day, _ in points]
+    y_values = [value for _, value in points]
 
     # Create and configure the matplotlib chart
-    plt.figure(figsize=(10, 4))  # Wide format suitable for time series
-    plt.plot(x_values, y_values, marker="o", color="tab:blue", linewidth=1.5)
-    plt.title(f"{habit.name} - Last {n_days} Days")
+    figure = plt.figure(figsize=(10, 4))  # Wide format suitable for time series
+    plt.plot(
+        x_values,
+        y_values,
+        marker="o" if len(points) <= 60 else None,
+        color="tab:blue",
+        linewidth=1.5,
+    )
+    plt.title(f"{habit.name} - {period} ({resolution})")
     plt.xlabel("Date")
-    plt.ylabel("Value")
-    plt.xticks(rotation=45, ha="right")  # Rotate dates for better readability
+    plt.ylabel("Value" if resolution == "daily" else f"Mean value ({resolution})")
+    figure.autofmt_xdate(rotation=45, ha="right")  # Rotate dates for readability
     plt.grid(True, linestyle="--", alpha=0.5)  # Add subtle grid lines
     plt.tight_layout()  # Optimize spacing to prevent label cutoff
+    return figure
+
+
+def plot_habit_time_series(
+    habit: "Habit", n_days: int | None = constants.DEFAULT_TIME_RANGE_IN_DAYS
+):
+    """
+    Display the time series chart of a habit over n_days days (None: all history).
+
+    Side Effects:
+        - Displays interactive matplotlib chart window
+        - Does not return any value (pure visualization function)
+    """
+    draw_habit_time_series(habit, n_days)
     plt.show()  # Display the interactive chart
 
 
+def unit_cost_on(habit: "Habit", day: int) -> float:
+    """
+    Return the unit cost of a habit on a given day from its price history.
+
+    The price history is a list of (effective_day, unit_cost) pairs sorted by
+    day; the latest price effective on or before the day applies. Habits
+    without any price history fall back to constants.DEFAULT_UNIT_COSTS.
+
+    Args:
+        habit: Habit instance with its prices list
+        day: Day number to price
+
+    Returns:
+        Unit cost in euros (0.0 when the habit has no price)
+
+    Examples:
+        prices [(1, 0.5), (739000, 0.6)] -> 0.5 before day 739000, 0.6 from it on
+    """
+    index = bisect_right(habit.prices, day, key=itemgetter(0))
+    if index:
+        return habit.prices[index - 1][1]
+    if habit.prices:
+        return 0.0
+    return constants.DEFAULT_UNIT_COSTS.get(habit.id, 0.0)
+
+
 def weekly_cigarettes_avoided_and_money_saved(
     habit_manager: "HabitManager",
+    habit_id: int = constants.HABIT_CIGARETTE_SMOKED_ID,
 ) -> Optional[WeeklyCigaretteStats]:
     """
-    Analyze the last 7 days of cigarette consumption for progress tracking.
+    Analyze the last 7 days of consumption of an elimination habit.
 
     This function calculates comprehensive weekly statistics for cigarette smoking
-    habits, focusing on progress measurement and financial impact analysis.
-    It provides motivation through quantified achievements and cost savings.
+    habits by default, or for any other priced habit, focusing on progress
+    measurement and financial impact analysis. It provides motivation through
+    quantified achievements and cost savings.
 
     Analysis Components:
     1. Baseline Determination: Uses the highest daily consumption in the week
@@ -235,16 +307,18 @@ def weekly_cigarettes_avoided_and_money_saved(
     4. Progress Tracking: Provides structured data for visualization
 
     Financial Calculations:
-    - Uses constants: €10 per pack, 20 cigarettes per pack = €0.50 per cigarette
-    - Money saved = avoided_cigarettes × €0.50
+    - Each day is priced with the habit's unit cost effective that day
+    - Cigarettes default to €10 per pack, 20 cigarettes per pack = €0.50 each
+    - Money saved = Σ avoided units of the day × unit cost of the day
 
     Args:
         habit_manager: HabitManager instance containing all tracked habits
+        habit_id: Habit to analyse (defaults to HABIT_CIGARETTE_SMOKED_ID)
 
     Returns:
         WeeklyCigaretteStats object with progress data, or None if:
-        - No cigarette habit found (ID: HABIT_CIGARETTE_SMOKED_ID)
-        - No records exist for the cigarette habit
+        - No habit found with that ID
+        - No records exist for the habit
         - No records exist within the last 7 days
 
     Examples:
@@ -257,28 +331,24 @@ def weekly_cigarettes_avoided_and_money_saved(
     today = date.today()
     week_ago = today - timedelta(days=6)  # Last 7 days inclusive
 
-    # Find the specific cigarette smoking habit by its predefined ID
+    # Find the habit by its ID
     # Uses generator expression with next() for efficient habit lookup
     habit = next(
-        (
-            h
-            for h in habit_manager.habits
-            if h.id == constants.HABIT_CIGARETTE_SMOKED_ID
-        ),
-        None,  # Default value if no cigarette habit found
+        (h for h in habit_manager.habits if h.id == habit_id),
+        None,  # Default value if no such habit found
     )
 
-    # Early return if no cigarette habit exists or has no recorded data
+    # Early return if the habit does not exist or has no recorded data
     if not habit or not habit.records:
         return None
 
-    # Filter records to only include the last 7 days
-    # Convert string dates to date objects for proper comparison
-    week_records = {
-        date.fromisoformat(day): value
-        for day, value in habit.records.items()
-        if week_ago <= date.fromisoformat(day) <= today
-    }
+    # Logged days of the last 7 days, in order
+    # Day numbers are probed directly, so only 7 lookups whatever the history size
+    week_records = list(
+        timeseries.series(
+            habit.records, week_ago.toordinal(), today.toordinal(), fill=None
+        )
+    )
 
     # Return None if no records found within the week period
     if not week_records:
@@ -286,20 +356,20 @@ def weekly_cigarettes_avoided_and_money_saved(
 
     # Determine baseline consumption (highest daily value in the period)
     # This represents the user's starting point for comparison
-    sorted_dates = sorted(week_records)
-    initial = max(week_records[d] for d in sorted_dates) if sorted_dates else 0
+    initial = max(actual for _, actual in week_records)
 
     # Calculate progress statistics using functional programming approaches
     # Avoided: sum of positive differences between baseline and actual consumption
-    avoided = sum(max(0, initial - actual) for actual in week_records.values())
+    avoided = sum(max(0, initial - actual) for _, actual in week_records)
 
     # Spent: total cigarettes actually consumed during the week
-    spent = sum(week_records.values())
+    spent = sum(actual for _, actual in week_records)
 
-    # Money saved: financial impact based on avoided cigarettes
-    # Formula: avoided_cigarettes × (price_per_pack ÷ cigarettes_per_pack)
-    money_saved = (
-        avoided * constants.CIGARTETTE_PRICE_PER_PACK / constants.CIGARTETTE_PER_PACK
+    # Money saved: financial impact based on avoided units
+    # Formula: Σ avoided units × unit cost effective on that day
+    money_saved = sum(
+        max(0, initial - actual) * unit_cost_on(habit, day)
+        for day, actual in week_records
     )
 
     # Return structured statistics for further processing and display
@@ -313,6 +383,35 @@ def weekly_cigarettes_avoided_and_money_saved(
     )
 
 
+def cached_weekly_cigarettes_avoided_and_money_saved(
+    habit_manager: "HabitManager",
+    habit_id: int = constants.HABIT_CIGARETTE_SMOKED_ID,
+) -> Optional[WeeklyCigaretteStats]:
+    """
+    Memoized variant of weekly_cigarettes_avoided_and_money_saved.
+
+    The result depends on the cigarette habit records and on the current day,
+    so both the habit version and today's date are part of the cache key.
+
+    Args:
+        habit_manager: HabitManager instance containing all tracked habits
+
+    Returns:
+        The same WeeklyCigaretteStats (or None) as the uncached function
+    """
+    habit = next((h for h in habit_manager.habits if h.id == habit_id), None)
+
+    if habit is None:
+        return None
+
+    return habit_manager.memoize(
+        "weekly_cigarette_stats",
+        habit,
+        lambda: weekly_cigarettes_avoided_and_money_saved(habit_manager, habit_id),
+        date.today(),
+    )
+
+
 def plot_weekly_stats(stats: WeeklyCigaretteStats) -> None:
     """
     Generate and display a bar chart visualization of weekly progress statistics.
@@ -0,0 +1,133 @@
+"""
+Asyncio facade over the Database and HabitManager.
+
+Every SQLite call and every HabitManager mutation runs on a single dedicated
+connection thread, so coroutines never block the event loop and in-memory
+habit state is only touched from one thread. Read-only queries go through the
+Database read pool on a separate executor so they can overlap with writes.
+"""
+
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from src import analytics
+from src.db import Database
+from src.habit_manager import HabitManager
+
+
+class AsyncDatabase:
+    """Awaitable wrapper around Database, used as an async context manager."""
+
+    def __init__(self, path=".db/tracker.db", **database_options):
+        self.database = Database(path, **database_options)
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="tracker-db"
+        )
+        self._read_executor = ThreadPoolExecutor(
+            max_workers=max(1, self.database.read_pool_size),
+            thread_name_prefix="tracker-db-read",
+        )
+
+    async def __aenter__(self):
+        await self.run(self.database.__enter__)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            await self.run(self.database.__exit__, exc_type, exc_val, exc_tb)
+        finally:
+            self._executor.shutdown(wait=True)
+            self._read_executor.shutdown(wait=True)
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run func on the connection thread and await its result."""
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._executor, partial(func, *args))
+        # Background writer futures complete once the write is committed
+        if isinstance(result, Future):
+            return await asyncio.wrap_future(result)
+        return result
+
+    async def run_read(self, func: Callable[..., Any], *args) -> Any:
+        """Run a read-only call on the read executor backed by the connection pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, partial(func, *args))
+
+    async def get_all_habits(self):
+        return await self.run_read(self.database.get_all_habits)
+
+    async def add_habit(self, name: str, desc: str, periodicity: str, habit_type: str):
+        return await self.run(
+            self.database.add_habit, name, desc, periodicity, habit_type
+        )
+
+    async def update_habit(
+        self, habit_id: int, name: str, desc: str, periodicity: str, habit_type: str
+    ):
+        await self.run(
+            self.database.update_habit, habit_id, name, desc, periodicity, habit_type
+        )
+
+    async def delete_habit(self, habit_id: int):
+        await self.run(self.database.delete_habit, habit_id)
+
+    async def upsert_record(self, day: int, habit_id: int, value: int):
+        await self.run(self.database.upsert_record, day, habit_id, value)
+
+    async def upsert_records(self, entries: list[tuple[int, int, int]]):
+        await self.run(self.database.upsert_records, entries)
+
+    async def flush(self):
+        await self.run(self.database.flush)
+
+
+class AsyncHabitManager:
+    """
+    Awaitable HabitManager for one session over a shared AsyncDatabase.
+
+    Calls are forwarded to a regular HabitManager on the database connection
+    thread, which serializes them with every other session's writes.
+    """
+
+    def __init__(self, db: AsyncDatabase, cache_size: int = 256):
+        self.db = db
+        self.manager = HabitManager(db.database, cache_size)
+
+    @property
+    def habits(self):
+        return self.manager.habits
+
+    async def load_habits(self):
+        await self.db.run(self.manager.load_habits)
+
+    async def add_habit(self, name: str, desc: str, periodicity: str, habit_type: str):
+        await self.db.run(self.manager.add_habit, name, desc, periodicity, habit_type)
+
+    async def update_habit(
+        self, name: str, new_name: str, desc: str, periodicity: str, habit_type: str
+    ):
+        await self.db.run(
+            self.manager.update_habit, name, new_name, desc, periodicity, habit_type
+        )
+
+    async def remove_habit(self, habit_name: str):
+        await self.db.run(self.manager.remove_habit, habit_name)
+
+    async def log_today_habit(self, habit_id: int, value: int):
+        await self.db.run(self.manager.log_today_habit, habit_id, value)
+
+    async def log_habit_values(self, entries: list[tuple[int, int, int]]):
+        await self.db.run(self.manager.log_habit_values, entries)
+
+    async def get_today_habit_value(self, habit_id: int) -> int:
+        return await self.db.run(self.manager.get_today_habit_value, habit_id)
+
+    async def longest_run_streaks(self) -> dict[int, int]:
+        return await self.db.run(analytics.cached_longest_run_streaks, self.manager)
+
+    async def weekly_cigarette_stats(self) -> Optional[analytics.WeeklyCigaretteStats]:
+        return await self.db.run(
+            analytics.cached_weekly_cigarettes_avoided_and_money_saved, self.manager
+        )
@@ -0,0 +1,146 @@
+"""
+Online backup and restore of the tracker database.
+
+Backups use the SQLite online backup API in steps of BACKUP_PAGES_PER_STEP
+pages. The source connection holds one read transaction for the whole copy,
+so in WAL mode the backup is a consistent snapshot that neither blocks a live
+session's writes nor restarts when they commit.
+
+The copy is gzip-compressed while it is written out and its SHA-256 is
+stored next to it in a sha256sum compatible file. A restore verifies that
+checksum and the integrity of the backup before anything on the live
+database is overwritten.
+"""
+
+import hashlib
+import os
+import sqlite3
+import zlib
+from functools import partial
+
+from src import constants
+from src.models import BackupResult
+
+GZIP_MAGIC = b"\x1f\x8b"
+# zlib window bits selecting the gzip container
+GZIP_WBITS = 31
+CHUNK_SIZE = 1 << 20
+
+
+def checksum_path(path: str) -> str:
+    return f"{path}.sha256"
+
+
+def _copy_out(source: str, dest: str, compress: bool) -> str:
+    """Copy source to dest, gzip-compressed if asked, and return the SHA-256 of dest."""
+    digest = hashlib.sha256()
+    compressor = (
+        zlib.compressobj(constants.BACKUP_COMPRESS_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+        if compress
+        else None
+    )
+    with open(source, "rb") as src, open(dest, "wb") as out:
+        for chunk in iter(partial(src.read, CHUNK_SIZE), b""):
+            data = compressor.compress(chunk) if compressor else chunk
+            digest.update(data)
+            out.write(data)
+        if compressor:
+            data = compressor.flush()
+            digest.update(data)
+            out.write(data)
+    return digest.hexdigest()
+
+
+def backup(
+    db_path: str,
+    dest: str,
+    compress: bool = True,
+    pages_per_step: int = constants.BACKUP_PAGES_PER_STEP,
+) -> BackupResult:
+    """
+    Back up a live database to dest, with its checksum in dest + ".sha256".
+
+    Args:
+        db_path: Database file, possibly open and written by other connections
+        dest: Backup file, gzip-compressed when compress is set
+        compress: Compress the copy with gzip
+        pages_per_step: Pages copied per backup step
+
+    Returns:
+        BackupResult with the page count, backup size and SHA-256
+    """
+    copy_path = f"{dest}.tmp"
+    source = sqlite3.connect(db_path, isolation_level=None)
+    target = sqlite3.connect(copy_path)
+    try:
+        # Pin one snapshot: steps read it however often the live session commits
+        source.execute("BEGIN")
+        pages = source.execute("PRAGMA page_count").fetchone()[0]
+        source.backup(target, pages=pages_per_step)
+        source.execute("COMMIT")
+    finally:
+        target.close()
+        source.close()
+
+    try:
+        sha256 = _copy_out(copy_path, dest, compress)
+    finally:
+        os.remove(copy_path)
+
+    with open(checksum_path(dest), "w", encoding="utf-8") as file:
+        file.write(f"{sha256}  {os.path.basename(dest)}\n")
+    return BackupResult(dest, pages, os.path.getsize(dest), sha256)
+
+
+def _copy_in(source: str, dest: str) -> str:
+    """Copy a backup to dest, decompressing gzip, and return the SHA-256 of source."""
+    digest = hashlib.sha256()
+    with open(source, "rb") as src, open(dest, "wb") as out:
+        decompressor = (
+            zlib.decompressobj(GZIP_WBITS) if src.read(2) == GZIP_MAGIC else None
+        )
+        src.seek(0)
+        for chunk in iter(partial(src.read, CHUNK_SIZE), b""):
+            digest.update(chunk)
+            out.write(decompressor.decompress(chunk) if decompressor else chunk)
+        if decompressor:
+            out.write(decompressor.flush())
+    return digest.hexdigest()
+
+
+def restore(
+    backup_path: str,
+    conn: sqlite3.Connection,
+    pages_per_step: int = constants.BACKUP_PAGES_PER_STEP,
+):
+    """
+    Replace the database of conn with a verified backup.
+
+    Raises:
+        ValueError: when the checksum differs or the backup fails its integrity check
+    """
+    with open(checksum_path(backup_path), encoding="utf-8") as file:
+        expected = file.read().split()[0]
+
+    copy_path = f"{backup_path}.restore.tmp"
+    try:
+        try:
+            sha256 = _copy_in(backup_path, copy_path)
+        except zlib.error as error:
+            raise ValueError(
+                f"Backup {backup_path} is not a valid gzip file."
+            ) from error
+        if sha256 != expected:
+            raise ValueError(f"Checksum mismatch for backup {backup_path}.")
+
+        source = sqlite3.connect(copy_path)
+        try:
+            if source.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                raise ValueError(f"Backup {backup_path} failed its integrity check.")
+            conn.commit()
+            source.backup(conn, pages=pages_per_step)
+        finally:
+            source.close()
+    finally:
+        if os.path.exists(copy_path):
+            os.remove(copy_path)
@@ -1,5 +1,7 @@
+import sqlite3
+from datetime import date, datetime
 from typing import Callable, Dict, Tuple
-from src import analytics, utils
+from src import analytics, completions, plans, report, timeseries, utils
 from src.habit_manager import HabitManager
 from src import constants
 
@@ -12,11 +14,55 @@ def print_header(title: str):
 def show_dashboard(habit_manager: HabitManager):
     print_header("Dashboard")
 
-    for habit in habit_manager.habits:
+    # Met periods and goal streaks need the full history; until it is loaded,
+    # only the running period is shown, read with a bounded query
+    goal_progress = (
+        {progress.habit_id: progress for progress in habit_manager.get_goal_progress()}
+        if habit_manager.history_loaded
+        else {}
+    )
+    goal_values = habit_manager.get_current_goal_values()
+    for habit, summary in zip(
+        habit_manager.habits, habit_manager.get_habit_summaries()
+    ):
+        last_logged = (
+            date.fromordinal(summary.last_day) if summary.last_day else "never"
+        )
         print(
-            f"• {habit.name} ({habit.periodicity}), today={habit_manager.get_today_habit_value(habit.id)}, total={len(habit.records)}"
+            f"• {habit.name} ({habit.periodicity}), today={summary.today_value}, total={summary.total}, "
+            f"last logged={last_logged}, streak={summary.current_streak}"
         )
 
+        progress = habit_manager.get_plan_progress(habit.id)
+        if progress is not None:
+            quit_day = (
+                date.fromordinal(progress.projected_quit_day)
+                if progress.projected_quit_day is not None
+                else "not yet projected"
+            )
+            print(
+                f"    plan: {progress.days_over_plan}/{progress.logged_days} days over plan, "
+                f"deviation {progress.cumulative_deviation:+d}, projected quit date: {quit_day}"
+            )
+
+        if habit.id in goal_values:
+            goal_value = habit_manager.habit_goals[habit.id]
+            period = constants.PERIOD_NAMES[habit.periodicity]
+            running = (
+                "today"
+                if habit.periodicity == constants.PERIODICITY_DAILY
+                else f"this {period}"
+            )
+            goal = goal_progress.get(habit.id)
+            history = (
+                f"met {goal.met}/{goal.periods} {period}s ({goal.rate:.0%}), streak {goal.streak}, "
+                if goal is not None
+                else ""
+            )
+            print(
+                f"    goal: {goal_value} per {period}, {history}{running} {goal_values[habit.id]}/{goal_value}"
+            )
+
 
 def print_habits_by_priority(habit_manager: HabitManager):
     print("\nTracked habits by periodicity:")
@@ -35,26 +81,32 @@ def print_habits_by_priority(habit_manager: HabitManager):
 
 def show_analytics(habit_manager: HabitManager):
     print_header("Analytics")
+    habit_manager.ensure_history()
 
     # Tracked habits by periodicity
     print_habits_by_priority(habit_manager)
 
+    # Streaks are computed once per habit version and reused across visits
+    streaks = analytics.cached_longest_run_streaks(habit_manager)
+
     # Longest streak all habits
     print(
         "\nLongest streak across all habits:",
-        analytics.longest_run_streak_all(habit_manager),
+        max(streaks.values(), default=0),
     )
 
+    chart_range = utils.input_select("\nChart range: ", list(constants.CHART_RANGES))
+
     for habit in habit_manager.habits:
         # Longest streak per habit
-        print(
-            f"Longest streak for {habit.name}: {analytics.longest_run_streak_for_habit(habit)}"
-        )
+        print(f"Longest streak for {habit.name}: {streaks[habit.id]}")
 
-        # Plot habit
-        analytics.plot_habit_time_series(habit)
+        # Plot habit, downsampled for long ranges
+        analytics.plot_habit_time_series(habit, constants.CHART_RANGES[chart_range])
 
-    weekly_stats = analytics.weekly_cigarettes_avoided_and_money_saved(habit_manager)
+    weekly_stats = analytics.cached_weekly_cigarettes_avoided_and_money_saved(
+        habit_manager
+    )
 
     if weekly_stats:
         print("\n--- Weekly Stats ---")
@@ -68,25 +120,128 @@ def show_analytics(habit_manager: HabitManager):
     else:
         print("No data for 'Cigarettes Smoked'.")
 
+    offset = completions.local_utc_offset
+    for habit in habit_manager.habits:
+        timestamps = habit_manager.get_completions(habit.id)
+        if not timestamps:
+            continue
+        by_hour = completions.count_by_hour(timestamps, offset)
+        peak_hours = sorted(range(24), key=by_hour.__getitem__, reverse=True)[:3]
+        print(
+            f"\n{habit.name}: {len(timestamps)} timed completions, most often at "
+            + ", ".join(f"{hour:02d}:00 ({by_hour[hour]})" for hour in peak_hours)
+        )
+
+    names = {h.id: h.name for h in habit_manager.habits}
+    cost_report = [r for r in habit_manager.get_cost_report() if r.cost or r.saved]
+    if cost_report:
+        print(f"\n--- Costs (last {constants.DEFAULT_TIME_RANGE_IN_DAYS} days) ---")
+        for cost in cost_report:
+            print(
+                f"• {names.get(cost.habit_id, cost.habit_id)}: {cost.units} units, "
+                f"spent {cost.cost:.2f} €, saved {cost.saved:.2f} € vs {cost.baseline}/day"
+            )
+
 
 def show_reduction_plan(habit_manager: HabitManager):
     print_header("Show reduction plans")
+    habit_manager.ensure_history()
+
+    names = {h.id: h.name for h in habit_manager.habits}
+    adherence = habit_manager.get_plan_adherence()
+    if adherence:
+        print("Adherence to your saved plans:")
+        for result in adherence:
+            print(
+                f"• {names.get(result.habit_id, result.habit_id)}: "
+                f"{result.days_on_plan}/{result.logged_days} logged days on plan, "
+                f"{result.days_over_plan} over plan, deviation {result.total_deviation:+d}"
+            )
+        print()
 
-    plan = {}
-    for habit in [
+    curve = utils.input_select("Taper curve: ", constants.PLAN_CURVES)
+    reduction_plans = plans.build_reduction_plans(habit_manager, curve)
+
+    for plan in reduction_plans:
+        print(f"\nPlan for {names[plan.habit_id]}:")
+        print(", ".join(str(v) for v in plan.targets))
+
+    if reduction_plans and input("\nSave these plans? (y/n): ").strip().lower() == "y":
+        habit_manager.save_reduction_plans(reduction_plans)
+        print("Plans saved.")
+
+
+def set_habit_price(habit_manager: HabitManager):
+    print_header("Set habit price")
+
+    selected_habit_name = utils.input_select(
+        "Habit name to price: ",
+        [h.name for h in habit_manager.habits],
+    )
+    habit = next(h for h in habit_manager.habits if h.name == selected_habit_name)
+
+    try:
+        unit_cost = float(input("Cost per unit from today on (€): ").replace(",", "."))
+        # float() also parses "nan", "inf" and negative amounts
+        habit_manager.set_unit_cost(habit.id, unit_cost)
+    except ValueError:
+        print("Invalid price. Nothing changed.")
+        return
+
+    print(f"\nPrice of '{selected_habit_name}' set to {unit_cost:.2f} € per unit!")
+
+
+def set_habit_goal(habit_manager: HabitManager):
+    print_header("Set habit goal")
+
+    habits = [
         h
         for h in habit_manager.habits
-        if h.habit_type == constants.HABIT_TYPE_ELIMINATION
-    ]:
-        today_record = habit_manager.get_today_habit_value(habit.id)
-        step = today_record / constants.DEFAULT_TIME_RANGE_IN_DAYS
-        plan[habit.name] = [
-            max(0, round(today_record - i * step))
-            for i in range(constants.DEFAULT_TIME_RANGE_IN_DAYS)
-        ]
-        print(f"Plan for {habit.name}:")
-        print(", ".join(str(v) for v in plan[habit.name]))
-        print()
+        if h.habit_type == constants.HABIT_TYPE_ESTABLISHMENT
+    ]
+    if not habits:
+        print("No establishment habits to set a goal for.")
+        return
+
+    selected_habit_name = utils.input_select(
+        "Habit name to set a goal for: ", [h.name for h in habits]
+    )
+    habit = next(h for h in habits if h.name == selected_habit_name)
+    period = constants.PERIOD_NAMES[habit.periodicity]
+
+    try:
+        goal = int(input(f"Value to reach per {period} (0 removes the goal): "))
+        if goal < 0:
+            raise ValueError(goal)
+    except ValueError:
+        print("Invalid goal. Nothing changed.")
+        return
+
+    habit_manager.set_habit_goal(habit.id, goal if goal > 0 else None)
+    if goal > 0:
+        print(f"\nGoal of '{selected_habit_name}' set to {goal} per {period}!")
+    else:
+        print(f"\nGoal of '{selected_habit_name}' removed!")
+
+
+def log_completion(habit_manager: HabitManager):
+    print_header("Log one now")
+
+    selected_habit_name = utils.input_select(
+        "Habit: ",
+        [h.name for h in habit_manager.habits],
+    )
+    habit = next(h for h in habit_manager.habits if h.name == selected_habit_name)
+
+    try:
+        habit_manager.pending_writes.append(habit_manager.log_completion(habit.id))
+    except ValueError as error:
+        print(f"\nNothing logged: {error}")
+        return
+    print(
+        f"\nLogged one '{selected_habit_name}' at {datetime.now():%H:%M}, "
+        f"today={habit_manager.get_today_habit_value(habit.id)}"
+    )
 
 
 def log_values(habit_manager: HabitManager, habit_type: str | None = None):
@@ -98,11 +253,64 @@ def log_values(habit_manager: HabitManager, habit_type: str | None = None):
         if habit_type is None or h.habit_type == habit_type
     ]:
         try:
-            input_value = input(f"Enter today's value for {habit.name}: ")
-            habit_manager.log_today_habit(habit.id, int(input_value))
+            value = int(input(f"Enter today's value for {habit.name}: "))
+        except ValueError:
+            print("Invalid input. Skipping.")
+            continue
+        habit_manager.pending_writes.append(
+            habit_manager.log_today_habit(habit.id, value)
+        )
+
+    # Prompts never wait on the writer; the round is confirmed once at the end
+    confirm_pending_writes(habit_manager)
+
+
+def confirm_pending_writes(habit_manager: HabitManager):
+    try:
+        habit_manager.confirm_pending_writes()
+    except (sqlite3.Error, RuntimeError) as error:
+        print(f"\nCould not save the last logged values, they were dropped: {error}")
+
+
+def backfill_values(habit_manager: HabitManager):
+    print_header("Backfill habit values")
+
+    selected_habit_name = utils.input_select(
+        "Habit name to backfill: ",
+        [h.name for h in habit_manager.habits],
+    )
+    habit = next(h for h in habit_manager.habits if h.name == selected_habit_name)
+
+    try:
+        first_day = date.fromisoformat(input("From (YYYY-MM-DD): ").strip())
+        last_day = date.fromisoformat(input("To (YYYY-MM-DD): ").strip())
+    except ValueError:
+        print("Invalid date. Nothing logged.")
+        return
+
+    # One prompt per day, week or month depending on the habit's periodicity
+    entries, periods = [], set()
+    for day in range(first_day.toordinal(), last_day.toordinal() + 1):
+        period = utils.period_start(habit.periodicity, day)
+        if period in periods:
+            continue
+        periods.add(period)
+
+        input_value = input(f"Value for {date.fromordinal(day)} (empty to skip): ")
+        if not input_value.strip():
+            continue
+        try:
+            entries.append((habit.id, day, int(input_value)))
         except ValueError:
             print("Invalid input. Skipping.")
 
+    try:
+        habit_manager.pending_writes.append(habit_manager.log_habit_values(entries))
+    except ValueError as error:
+        print(f"\nNothing logged: {error}")
+        return
+    print(f"\n{len(entries)} values logged for '{selected_habit_name}'!")
+
 
 def add_habit(habit_manager: HabitManager):
     print_header("Add habit")
@@ -121,7 +329,11 @@ def add_habit(habit_manager: HabitManager):
         "Type: ",
         [constants.HABIT_TYPE_ELIMINATION, constants.HABIT_TYPE_ESTABLISHMENT],
     )
-    habit_manager.add_habit(name, desc, periodicity, habit_type)
+    try:
+        habit_manager.add_habit(name, desc, periodicity, habit_type)
+    except ValueError as error:
+        print(f"\nNothing added: {error}")
+        return
     print(f"\nHabit '{name}' added!")
 
 
@@ -134,7 +346,29 @@ def delete_habit(habit_manager: HabitManager):
     )
 
     habit_manager.remove_habit(selected_habit_name)
-    print(f"\nHabit '{selected_habit_name}' deleted!")
+    print(
+        f"\nHabit '{selected_habit_name}' deleted! Its history is kept for "
+        f"{constants.ARCHIVE_RETENTION_IN_DAYS} days and can be restored until then."
+    )
+
+
+def restore_habit(habit_manager: HabitManager):
+    print_header("Restore habit")
+
+    archived = habit_manager.db.get_archived_habits()
+    if not archived:
+        print("No deleted habits to restore.")
+        return
+
+    options = [f"{name} (deleted {date.fromordinal(day)})" for _, name, day in archived]
+    selected = utils.input_select("Habit to restore: ", options)
+    habit_id, name, _ = archived[options.index(selected)]
+    try:
+        habit_manager.restore_habit(habit_id)
+    except ValueError as error:
+        print(f"\nNothing restored: {error}")
+        return
+    print(f"\nHabit '{name}' restored!")
 
 
 def update_habit(habit_manager: HabitManager):
@@ -162,12 +396,80 @@ def update_habit(habit_manager: HabitManager):
         [constants.HABIT_TYPE_ELIMINATION, constants.HABIT_TYPE_ESTABLISHMENT],
     )
 
-    habit_manager.update_habit(
-        selected_habit_name, new_name, desc, periodicity, habit_type
-    )
+    try:
+        habit_manager.update_habit(
+            selected_habit_name, new_name, desc, periodicity, habit_type
+        )
+    except ValueError as error:
+        print(f"\nNothing updated: {error}")
+        return
     print(f"\nHabit '{selected_habit_name}' updated!")
 
 
+def export_csv(habit_manager: HabitManager, path: str, n_days: int | None = None):
+    today = date.today().toordinal()
+    if n_days is None:
+        # All history: from the first day any habit was logged
+        first_day = min(
+            (min(h.records) for h in habit_manager.habits if h.records), default=today
+        )
+        n_days = today - first_day + 1
+
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        n_rows = timeseries.write_csv(
+            habit_manager.habits, file, *timeseries.window(n_days, today)
+        )
+    print(f"Exported {n_rows} days of {len(habit_manager.habits)} habits to {path}")
+
+
+def write_report(habit_manager: HabitManager, path: str = constants.REPORT_PATH):
+    stats = report.write_report(habit_manager, path)
+    print(
+        f"\nReport written to {path} "
+        f"({stats.rendered} habits rendered, {stats.reused} unchanged)"
+    )
+
+
+def run_maintenance(habit_manager: HabitManager):
+    maintenance_report = habit_manager.db.maintain(full=True)
+    storage = maintenance_report.storage
+
+    print_header("Database maintenance")
+    print(
+        f"Freed {maintenance_report.pages_freed} pages; file is now "
+        f"{storage.file_size / 1024:.0f} KiB with {storage.freelist_count} free pages"
+    )
+    print(
+        "Integrity check: "
+        + ("ok" if not maintenance_report.integrity_problems else "FAILED")
+    )
+    for problem in maintenance_report.integrity_problems:
+        print(f"    {problem}")
+    for table in storage.objects:
+        print(
+            f"• {table.name} ({table.kind}): {table.size / 1024:.0f} KiB in {table.pages} pages, "
+            f"{table.fragmentation:.0%} unused"
+        )
+
+
+def backup_database(habit_manager: HabitManager, path: str):
+    result = habit_manager.db.backup(path, compress=path.endswith(".gz"))
+    print(
+        f"Backed up {result.pages} pages to {path} ({result.size / 1024:.0f} KiB), "
+        f"sha256 {result.sha256}"
+    )
+
+
+def restore_database(habit_manager: HabitManager, path: str):
+    try:
+        habit_manager.db.restore(path)
+    except (OSError, ValueError) as error:
+        print(f"Nothing restored: {error}")
+        return
+    habit_manager.load_habits()
+    print(f"Restored {len(habit_manager.habits)} habits from {path}")
+
+
 def exit_app(_: HabitManager):
     print("\nGoodbye!")
     raise SystemExit
@@ -176,12 +478,18 @@ def exit_app(_: HabitManager):
 MENU_ACTIONS: Dict[str, Tuple[str, Callable[[HabitManager], None]]] = {
     "1": ("Dashboard (list habits)", show_dashboard),
     "2": ("Log today habits", log_values),
-    "3": ("Show reduction plans", show_reduction_plan),
-    "4": ("Show analytics", show_analytics),
-    "5": ("Add habit", add_habit),
-    "6": ("Delete habit", delete_habit),
-    "7": ("Update habit", update_habit),
-    "8": ("Exit", exit_app),
+    "3": ("Log one now (e.g. a cigarette)", log_completion),
+    "4": ("Backfill habit values", backfill_values),
+    "5": ("Show reduction plans", show_reduction_plan),
+    "6": ("Show analytics", show_analytics),
+    "7": ("Add habit", add_habit),
+    "8": ("Delete habit", delete_habit),
+    "9": ("Update habit", update_habit),
+    "10": ("Restore habit", restore_habit),
+    "11": ("Set habit price", set_habit_price),
+    "12": ("Set habit goal", set_habit_goal),
+    "13": ("Write HTML report", write_report),
+    "14": ("Exit", exit_app),
 }
 
 
@@ -190,6 +498,8 @@ def show_menu(habit_manager: HabitManager):
 
     try:
         while True:
+            # Writes of the last action have long been committed by now
+            confirm_pending_writes(habit_manager)
             print("\nMenu:\n")
             for key, (label, _) in MENU_ACTIONS.items():
                 print(f"{key}. {label}")
@@ -206,3 +516,4 @@ def show_menu(habit_manager: HabitManager):
 
     except (KeyboardInterrupt, SystemExit):
         print("\nExiting. Goodbye!")
+    confirm_pending_writes(habit_manager)
@@ -0,0 +1,110 @@
+"""
+Time-of-day analytics over timestamped completions.
+
+A completion is one occurrence of a habit, for example one cigarette smoked,
+stored as integer epoch seconds. The completions of a habit are held in memory
+as a sorted array('q') of timestamps: 8 bytes per completion instead of one
+Python int object each, and time ranges are cut out with bisect.
+
+Bucketing uses integer arithmetic only. Timestamps are shifted by a UTC
+offset into local time and divided by the bucket width; no datetime objects
+are created per completion, so hundreds of completions per day over years of
+history stay cheap to analyse. The offset is either fixed or, to follow
+daylight saving time, looked up per timestamp with local_utc_offset, which
+asks the time zone rules once per quarter hour.
+"""
+
+import time
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Callable, Iterator
+
+SECONDS_PER_QUARTER_HOUR = 900
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+# 1970-01-01 was a Thursday; this shift makes Monday day 0 like date.weekday()
+EPOCH_WEEKDAY_SHIFT = 3
+
+
+def local_utc_offset(ts: int) -> int:
+    """
+    Return the offset of local time from UTC in seconds at epoch seconds ts.
+
+    Offsets change on quarter hours at most, which is what they are cached by.
+
+    Examples:
+        Europe/Berlin -> 3600 in January, 7200 in July
+    """
+    return _quarter_hour_offset(ts // SECONDS_PER_QUARTER_HOUR)
+
+
+@lru_cache(maxsize=65536)
+def _quarter_hour_offset(quarter_hour: int) -> int:
+    return time.localtime(quarter_hour * SECONDS_PER_QUARTER_HOUR).tm_gmtoff
+
+
+def _local(timestamps: array, utc_offset: int | Callable[[int], int]) -> Iterator[int]:
+    # Timestamps shifted into local time by a fixed offset or one per timestamp
+    if callable(utc_offset):
+        return (ts + utc_offset(ts) for ts in timestamps)
+    return (ts + utc_offset for ts in timestamps)
+
+
+def in_range(
+    timestamps: array, start: int | None = None, end: int | None = None
+) -> array:
+    """Return the sorted timestamps in [start, end) without scanning the others."""
+    lo = 0 if start is None else bisect_left(timestamps, start)
+    hi = len(timestamps) if end is None else bisect_left(timestamps, end)
+    return timestamps[lo:hi]
+
+
+def count_by_hour(
+    timestamps: array, utc_offset: int | Callable[[int], int] = 0
+) -> list[int]:
+    """
+    Count completions per local hour of day.
+
+    utc_offset is a fixed offset in seconds, or a function of the timestamp
+    such as local_utc_offset.
+
+    Examples:
+        Completions at 08:10, 08:50 and 21:00 local time -> counts[8] == 2, counts[21] == 1
+    """
+    counts = [0] * 24
+    for local_ts in _local(timestamps, utc_offset):
+        counts[local_ts // SECONDS_PER_HOUR % 24] += 1
+    return counts
+
+
+def count_by_weekday(
+    timestamps: array, utc_offset: int | Callable[[int], int] = 0
+) -> list[int]:
+    """Count completions per local weekday, Monday first."""
+    counts = [0] * 7
+    for local_ts in _local(timestamps, utc_offset):
+        counts[(local_ts // SECONDS_PER_DAY + EPOCH_WEEKDAY_SHIFT) % 7] += 1
+    return counts
+
+
+def count_by_interval(
+    timestamps: array, interval: int, utc_offset: int | Callable[[int], int] = 0
+) -> dict[int, int]:
+    """
+    Count completions per fixed interval of local time.
+
+    Returns {bucket start timestamp: count} in time order; buckets without
+    completions are left out.
+
+    Examples:
+        interval=900 groups completions into quarter hours
+    """
+    if interval <= 0:
+        raise ValueError("Interval must be a positive number of seconds.")
+
+    counts: dict[int, int] = {}
+    for ts, local_ts in zip(timestamps, _local(timestamps, utc_offset)):
+        bucket = ts - local_ts % interval
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
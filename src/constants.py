@@ -52,5 +52,81 @@ DEFAULT_HABITS = [
 
 DEFAULT_TIME_RANGE_IN_DAYS = 28
 
+# Chart ranges in days; None charts all history
+CHART_RANGES = {
+    "28 days": DEFAULT_TIME_RANGE_IN_DAYS,
+    "90 days": 90,
+    "1 year": 365,
+    "all time": None,
+}
+# Most points handed to matplotlib per chart, whatever the range
+CHART_MAX_POINTS = 200
+
 CIGARTETTE_PRICE_PER_PACK = 10
 CIGARTETTE_PER_PACK = 20
+
+# Unit cost seeded for predefined habits, effective since FIRST_PRICE_DAY
+DEFAULT_UNIT_COSTS = {
+    HABIT_CIGARETTE_SMOKED_ID: CIGARTETTE_PRICE_PER_PACK / CIGARTETTE_PER_PACK,
+}
+FIRST_PRICE_DAY = 1
+
+# Goal per period seeded for predefined establishment habits: minutes of
+# meditation a day, sport sessions a week and appointments a month
+DEFAULT_GOALS = {
+    HABIT_MEDITATION_TIME_ID: 10,
+    HABIT_SPORT_HABIT_ID: 3,
+    HABIT_SPECIALIST_APPOINTMENT_ID: 1,
+}
+PERIOD_NAMES = {
+    PERIODICITY_DAILY: "day",
+    PERIODICITY_WEEKLY: "week",
+    PERIODICITY_MONTHLY: "month",
+}
+
+# Binary snapshot of all habits, reused at startup while the database is unchanged
+SNAPSHOT_PATH = ".db/habits.snapshot"
+
+# HTML report written from the menu, next to the database
+REPORT_PATH = ".db/report.html"
+
+# Deleted habits are archived and their history purged after this many days
+ARCHIVE_RETENTION_IN_DAYS = 30
+PURGE_BATCH_SIZE = 5000
+
+# Light maintenance runs once this many rows were imported or purged
+MAINTENANCE_AFTER_ROWS = 10000
+# Free pages returned to the file system per incremental vacuum step
+VACUUM_STEP_PAGES = 1000
+
+# Online backups copy this many pages per step; gzip level of compressed backups
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_COMPRESS_LEVEL = 6
+
+# SQLite PRAGMA synchronous levels accepted for write-behind durability
+DURABILITY_OFF = "OFF"
+DURABILITY_NORMAL = "NORMAL"
+DURABILITY_FULL = "FULL"
+DURABILITY_LEVELS = (DURABILITY_OFF, DURABILITY_NORMAL, DURABILITY_FULL)
+
+# Kinds of entries in the append-only event log
+EVENT_LOG = "LOG"
+EVENT_HABIT_ADDED = "HABIT_ADDED"
+EVENT_HABIT_UPDATED = "HABIT_UPDATED"
+EVENT_HABIT_ARCHIVED = "HABIT_ARCHIVED"
+EVENT_HABIT_RESTORED = "HABIT_RESTORED"
+
+# Reduction plan taper curves
+PLAN_CURVE_LINEAR = "LINEAR"
+PLAN_CURVE_EXPONENTIAL = "EXPONENTIAL"
+PLAN_CURVE_STEPWISE = "STEPWISE"
+PLAN_CURVE_ADAPTIVE = "ADAPTIVE"
+PLAN_CURVES = [
+    PLAN_CURVE_LINEAR,
+    PLAN_CURVE_EXPONENTIAL,
+    PLAN_CURVE_STEPWISE,
+    PLAN_CURVE_ADAPTIVE,
+]
+
+# Days of history used to estimate the recent trend of an elimination habit
+PLAN_TREND_WINDOW_IN_DAYS = 14
@@ -1,80 +1,445 @@
 import os
-import random
 import sqlite3
-from itertools import groupby
-from operator import itemgetter
-from datetime import datetime, date, timedelta
+import threading
+from array import array
+from concurrent.futures import Future
+from contextlib import contextmanager
+from functools import wraps
+from datetime import datetime, date
+from itertools import count
 from src import constants
-from src import utils
-from src.models import HabitModel, HabitRecordModel
+from src import backup, maintenance
+from src.events import APPEND_EVENT_SQL, compact_events, habit_event, log_event
+from src.models import (
+    BackupResult,
+    CostReport,
+    HabitModel,
+    HabitSummary,
+    MaintenanceReport,
+    PlanAdherence,
+    PlanProgress,
+    RecordEvent,
+    ReductionPlan,
+    StorageReport,
+)
+from src.pool import ReadConnectionPool
+from src.snapshot import read_snapshot, write_snapshot
+from src.storage import sample_records
+from src.write_buffer import WriteBehindBuffer, WriteBehindConfig, group_statements
+from src.writer import BackgroundWriter
+
+
+UPSERT_PLAN_PROGRESS_SQL = """INSERT OR REPLACE INTO plan_progress (habit_id, start_day,
+    logged_days, days_over_plan, cumulative_deviation, sum_x, sum_y, sum_xx, sum_xy,
+    projected_quit_day) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+
+# Tables whose changes bump the data generation, with the operations that do
+GENERATION_TABLES = {
+    "habits": ("INSERT", "UPDATE", "DELETE"),
+    "habit_prices": ("INSERT", "UPDATE", "DELETE"),
+}
+
+
+def generation_triggers(tables: dict[str, tuple[str, ...]]) -> list[str]:
+    """Return the CREATE TRIGGER statements bumping the data generation on changes to tables."""
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_{operation.lower()}_generation
+        AFTER {operation} ON {table}
+        BEGIN
+            UPDATE data_generation SET generation = generation + 1;
+        END"""
+        for table, operations in tables.items()
+        for operation in operations
+    ]
+
+
+def _serialized(method):
+    """Run a Database method while holding the writer connection lock."""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
 
 
 class Database:
-    def __init__(self, path=".db/tracker.db"):
+    def __init__(
+        self,
+        path=".db/tracker.db",
+        write_behind: WriteBehindConfig | None = None,
+        background_writer: bool = False,
+        read_pool_size: int = 4,
+        snapshot_path: str | None = None,
+    ):
+        if write_behind and background_writer:
+            raise ValueError(
+                "Choose either write-behind buffering or a background writer."
+            )
+        # A ":memory:" database only exists on its own connection
+        self.in_memory = path == ":memory:"
+        if self.in_memory and background_writer:
+            raise ValueError(
+                "An in-memory database has no file to share with a writer."
+            )
         self.path = path
         self.conn = None
+        self.write_buffer = WriteBehindBuffer(write_behind) if write_behind else None
+        # Flushes the buffer max_delay_seconds after its first pending upsert
+        self._flush_timer: threading.Timer | None = None
+        self.writer = (
+            BackgroundWriter(path, before_commit=compact_events)
+            if background_writer
+            else None
+        )
+        # Appended rows are never coalesced, so each one gets a key of its own
+        self._append_keys = count()
+        # Whether events may wait for compaction; an earlier run may have left some
+        self._uncompacted = True
+        self.read_pool_size = 0 if self.in_memory else read_pool_size
+        self.read_pool = None
+        # Full habit loads are served from this binary snapshot while it is current
+        self.snapshot_path = snapshot_path
+        # One writer connection shared across threads, serialized by this lock
+        self._write_lock = threading.RLock()
+        # Rows imported or purged since the last maintenance run, and the
+        # thread running maintenance once they pass MAINTENANCE_AFTER_ROWS
+        self._rows_since_maintenance = 0
+        self._maintenance_lock = threading.Lock()
+        self._maintenance_thread: threading.Thread | None = None
 
     def __enter__(self):
         # Ensure DB folder exists
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if not self.in_memory:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
 
-        # Connect to DB
-        self.conn = sqlite3.connect(self.path)
+        # Connect to DB; the connection is guarded by _write_lock for cross-thread use
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
 
         # Enable dict-like row access
         self.conn.row_factory = sqlite3.Row
 
-        # Initialize tables and default data
+        # Only takes effect on new files, before their first table is created
+        self.conn.execute(f"PRAGMA auto_vacuum = {maintenance.AUTO_VACUUM_INCREMENTAL}")
+
+        # WAL lets pooled readers run while the writer connection commits
+        self.conn.execute("PRAGMA journal_mode = WAL")
+
+        if self.write_buffer is not None:
+            self.conn.execute(
+                f"PRAGMA synchronous = {self.write_buffer.config.synchronous}"
+            )
+
+        # Initialize tables, upgrade older files and add default data
         self._init_tables()
+        self._migrate()
         self._add_default_data()
 
+        # The writer opens its own connection once the tables exist
+        if self.writer is not None:
+            self.writer.start()
+
+        if self.read_pool_size > 0:
+            self.read_pool = ReadConnectionPool(self.path, self.read_pool_size)
+
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.conn:
-            self.conn.commit()
-            self.conn.close()
+            self.wait_for_maintenance()
+            # A write failure is raised here, after everything is closed
+            try:
+                self.flush()
+                if self.writer is not None:
+                    self.writer.close()
+            finally:
+                if self.writer is not None and self.writer.running:
+                    self.writer.close()
+                if self.read_pool is not None:
+                    self.read_pool.close()
+                self.conn.commit()
+                self.conn.close()
 
     def _get_cursor(self):
         if self.conn is None:
             raise RuntimeError("Database connection not initialized")
         return (self.conn.cursor(), self.conn.commit)
 
+    @contextmanager
+    def _read_connection(self):
+        """Check out a pooled read-only connection, or share the writer one."""
+        if self.read_pool is None:
+            with self._write_lock:
+                cursor, _commit = self._get_cursor()
+                yield cursor.connection
+            return
+
+        with self.read_pool.connection() as conn:
+            yield conn
+
     def _init_tables(self):
         cursor, commit = self._get_cursor()
 
         cursor.execute(
             """CREATE TABLE IF NOT EXISTS habits (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE,
+                name TEXT,
                 description TEXT,
                 periodicity TEXT,
                 habit_type TEXT,
-                created TEXT
+                created TEXT,
+                archived INTEGER NOT NULL DEFAULT 0
             )"""
         )
 
         cursor.execute(
             """CREATE TABLE IF NOT EXISTS records (
-                day TEXT,
+                day INTEGER,
                 habit_id INTEGER,
                 value INTEGER,
                 PRIMARY KEY (day, habit_id),
                 FOREIGN KEY(habit_id) REFERENCES habits(id)
             )"""
         )
+
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS plans (
+                habit_id INTEGER,
+                day INTEGER,
+                target INTEGER,
+                curve TEXT,
+                PRIMARY KEY (habit_id, day),
+                FOREIGN KEY(habit_id) REFERENCES habits(id)
+            )"""
+        )
+
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS plan_progress (
+                habit_id INTEGER PRIMARY KEY,
+                start_day INTEGER,
+                logged_days INTEGER,
+                days_over_plan INTEGER,
+                cumulative_deviation INTEGER,
+                sum_x INTEGER,
+                sum_y INTEGER,
+                sum_xx INTEGER,
+                sum_xy INTEGER,
+                projected_quit_day INTEGER,
+                FOREIGN KEY(habit_id) REFERENCES habits(id)
+            )"""
+        )
+
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS habit_prices (
+                habit_id INTEGER,
+                effective_day INTEGER,
+                unit_cost REAL,
+                PRIMARY KEY (habit_id, effective_day),
+                FOREIGN KEY(habit_id) REFERENCES habits(id)
+            )"""
+        )
+
+        # Value to reach per period of an establishment habit
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS habit_goals (
+                habit_id INTEGER PRIMARY KEY,
+                goal INTEGER NOT NULL,
+                FOREIGN KEY(habit_id) REFERENCES habits(id)
+            )"""
+        )
+
+        # Append-only log; AUTOINCREMENT keeps seq increasing even after purges
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                logged_at INTEGER,
+                kind TEXT NOT NULL,
+                habit_id INTEGER NOT NULL,
+                day INTEGER,
+                value INTEGER,
+                data TEXT
+            )"""
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS events_habit_day ON events (habit_id, day)"
+        )
+
+        # Highest event seq already folded into records
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS event_log_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                compacted_seq INTEGER NOT NULL
+            )"""
+        )
+        cursor.execute("INSERT OR IGNORE INTO event_log_state VALUES (1, 0)")
+
+        # One row per occurrence, e.g. per cigarette, at epoch seconds
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS completions (
+                habit_id INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                FOREIGN KEY(habit_id) REFERENCES habits(id)
+            )"""
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS completions_habit_ts ON completions (habit_id, ts)"
+        )
+
+        # Bumped on every change to habits and prices; records only change
+        # through compaction, versioned by the event_log_state watermark
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS data_generation (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                generation INTEGER NOT NULL
+            )"""
+        )
+        cursor.execute("INSERT OR IGNORE INTO data_generation VALUES (1, 0)")
+        for sql in generation_triggers(GENERATION_TABLES):
+            cursor.execute(sql)
         commit()
 
-    def _insert_record(self, day: str, habit_id: int, value: int):
+    def _migrate(self):
+        """Upgrade databases created by older versions, tracked by PRAGMA user_version."""
+        cursor, _commit = self._get_cursor()
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        migrations = [
+            self._migrate_days_to_ordinals,
+            self._migrate_seed_prices,
+            self._migrate_archived_habits,
+            self._migrate_seed_events,
+            self._migrate_seed_goals,
+            self._migrate_active_habit_names,
+            self._migrate_record_generation,
+        ]
+
+        for target, migration in enumerate(migrations[version:], start=version + 1):
+            # Each migration is applied atomically together with its version bump
+            self.conn.executescript(
+                f"BEGIN; {migration(cursor)} PRAGMA user_version = {target}; COMMIT;"
+            )
+
+    def _migrate_days_to_ordinals(self, cursor) -> str:
+        """Days used to be ISO strings in a TEXT column; store date.toordinal() integers."""
+        columns = {
+            row["name"]: row["type"]
+            for row in cursor.execute("PRAGMA table_info(records)")
+        }
+        if columns["day"] != "TEXT":
+            return ""
+
+        # julianday('0001-01-01') is 1721425.5 and date(1, 1, 1).toordinal() is 1
+        return """
+            CREATE TABLE records_ordinal_days (
+                day INTEGER,
+                habit_id INTEGER,
+                value INTEGER,
+                PRIMARY KEY (day, habit_id),
+                FOREIGN KEY(habit_id) REFERENCES habits(id)
+            );
+            INSERT INTO records_ordinal_days (day, habit_id, value)
+                SELECT CAST(julianday(day) - 1721424.5 AS INTEGER), habit_id, value
+                FROM records;
+            DROP TABLE records;
+            ALTER TABLE records_ordinal_days RENAME TO records;
+        """
+
+    def _migrate_seed_prices(self, _cursor) -> str:
+        """Prices used to be constants; seed them as the first price of their habit."""
+        return "".join(
+            f"""INSERT OR IGNORE INTO habit_prices (habit_id, effective_day, unit_cost)
+                SELECT id, {constants.FIRST_PRICE_DAY}, {unit_cost} FROM habits WHERE id = {habit_id};"""
+            for habit_id, unit_cost in constants.DEFAULT_UNIT_COSTS.items()
+        )
+
+    def _migrate_archived_habits(self, cursor) -> str:
+        """Habits used to be deleted with their history; archive them instead."""
+        columns = {row["name"] for row in cursor.execute("PRAGMA table_info(habits)")}
+        add_column = (
+            ""
+            if "archived" in columns
+            else "ALTER TABLE habits ADD COLUMN archived INTEGER NOT NULL DEFAULT 0;"
+        )
+        # records is keyed by (day, habit_id); purging one habit needs its own index
+        return f"""{add_column}
+            CREATE INDEX IF NOT EXISTS habits_archived ON habits (archived);
+            CREATE INDEX IF NOT EXISTS records_habit_id ON records (habit_id);
+        """
+
+    def _migrate_seed_events(self, _cursor) -> str:
+        """Start the event log with the existing records, logged at an unknown time."""
+        return f"""
+            INSERT INTO events (logged_at, kind, habit_id, day, value)
+                SELECT NULL, '{constants.EVENT_LOG}', habit_id, day, value
+                FROM records ORDER BY day, habit_id;
+            UPDATE event_log_state
+                SET compacted_seq = (SELECT COALESCE(MAX(seq), 0) FROM events);
+        """
+
+    def _migrate_seed_goals(self, _cursor) -> str:
+        """Establishment habits used to have no goal; seed the predefined ones."""
+        return "".join(
+            f"""INSERT OR IGNORE INTO habit_goals (habit_id, goal)
+                SELECT id, {goal} FROM habits WHERE id = {habit_id};"""
+            for habit_id, goal in constants.DEFAULT_GOALS.items()
+        )
+
+    def _migrate_active_habit_names(self, cursor) -> str:
+        """
+        Names used to be unique among archived habits too; only active habits need distinct ones.
+
+        The UNIQUE column constraint can only be dropped by rebuilding the
+        table, which also drops its triggers, so they are created again.
+        """
+        unique_column = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_autoindex_habits_1'"
+        ).fetchone()
+        rebuild = (
+            """
+            CREATE TABLE habits_active_names (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                description TEXT,
+                periodicity TEXT,
+                habit_type TEXT,
+                created TEXT,
+                archived INTEGER NOT NULL DEFAULT 0
+            );
+            INSERT INTO habits_active_names
+                SELECT id, name, description, periodicity, habit_type, created, archived
+                FROM habits;
+            DROP TABLE habits;
+            ALTER TABLE habits_active_names RENAME TO habits;
+            CREATE INDEX habits_archived ON habits (archived);
+            """
+            if unique_column
+            else ""
+        )
+        triggers = "".join(
+            f"{sql};"
+            for sql in generation_triggers({"habits": GENERATION_TABLES["habits"]})
+        )
+        return f"""{rebuild}
+            CREATE UNIQUE INDEX IF NOT EXISTS habits_active_name ON habits (name) WHERE archived = 0;
+            {triggers}
+        """
+
+    def _migrate_record_generation(self, _cursor) -> str:
+        """Compactions used to bump the data generation; snapshots now replay them instead."""
+        return "DROP TRIGGER IF EXISTS event_log_state_update_generation;"
+
+    @_serialized
+    def _insert_record(self, day: int, habit_id: int, value: int):
         cursor, commit = self._get_cursor()
 
+        # Sample values have no real log time
         cursor.execute(
-            """INSERT OR REPLACE INTO records (day, habit_id, value)
-            VALUES (?, ?, ?)""",
-            (day, habit_id, value),
+            APPEND_EVENT_SQL, (None, constants.EVENT_LOG, habit_id, day, value, None)
         )
         commit()
 
+    @_serialized
     def _insert_habit(
         self,
         name: str,
@@ -138,45 +503,50 @@ class Database:
         ) in constants.DEFAULT_HABITS:
             self._insert_habit(name, description, periodicity, habit_type, habit_id)
 
-            if periodicity == constants.PERIODICITY_MONTHLY:
-                self._insert_record(
-                    utils.get_random_previous_day(
-                        today, constants.DEFAULT_TIME_RANGE_IN_DAYS
-                    ),
+            if habit_id in constants.DEFAULT_UNIT_COSTS:
+                self.set_unit_cost(
                     habit_id,
-                    1,
+                    constants.FIRST_PRICE_DAY,
+                    constants.DEFAULT_UNIT_COSTS[habit_id],
                 )
-                continue
-
-            if periodicity == constants.PERIODICITY_WEEKLY:
-                for _ in range(4):
-                    self._insert_record(
-                        utils.get_random_previous_day(
-                            today, constants.DEFAULT_TIME_RANGE_IN_DAYS
-                        ),
-                        habit_id,
-                        1,
-                    )
-                continue
-
-            if periodicity == constants.PERIODICITY_DAILY:
-                for offset in range(constants.DEFAULT_TIME_RANGE_IN_DAYS):
-                    daily_offset = (today - timedelta(days=offset + 1)).isoformat()
-                    record_value = (
-                        random.randint(1, 20)
-                        if habit_id == constants.HABIT_CIGARETTE_SMOKED_ID
-                        else random.randint(1, 10)
-                    )
-                    self._insert_record(daily_offset, habit_id, record_value)
-                continue
+
+            if habit_id in constants.DEFAULT_GOALS:
+                self.set_habit_goal(habit_id, constants.DEFAULT_GOALS[habit_id])
+
+            for day, value in sample_records(habit_id, periodicity, today):
+                self._insert_record(day, habit_id, value)
+
+        # Fold the sample values into records in one pass
+        compact_events(self.conn)
+        self.conn.commit()
 
     # Public methods
 
+    @_serialized
     def add_habit(
         self, name: str, desc: str, periodicity: str, habit_type: str
     ) -> HabitModel:
-        return self._insert_habit(name, desc, periodicity, habit_type)
+        # Names are unique among active habits; archived ones keep theirs until purged
+        cursor, _commit = self._get_cursor()
+        try:
+            habit = self._insert_habit(name, desc, periodicity, habit_type)
+        except sqlite3.IntegrityError as error:
+            raise ValueError(f"Habit with name '{name}' already exists.") from error
+        cursor.execute(
+            APPEND_EVENT_SQL,
+            habit_event(
+                constants.EVENT_HABIT_ADDED,
+                habit.id,
+                name=name,
+                description=desc,
+                periodicity=periodicity,
+                habit_type=habit_type,
+            ),
+        )
+        self.conn.commit()
+        return habit
 
+    @_serialized
     def update_habit(
         self,
         habit_id: int,
@@ -187,34 +557,363 @@ class Database:
     ):
         cursor, commit = self._get_cursor()
 
+        try:
+            cursor.execute(
+                "UPDATE habits SET name = ?, description = ?, periodicity = ?, habit_type = ? WHERE id = ?",
+                (name, desc, periodicity, habit_type, habit_id),
+            )
+        except sqlite3.IntegrityError as error:
+            # habits_active_name: another active habit has the name
+            raise ValueError(f"Habit with name '{name}' already exists.") from error
         cursor.execute(
-            "UPDATE habits SET name = ?, description = ?, periodicity = ?, habit_type = ? WHERE id = ?",
-            (name, desc, periodicity, habit_type, habit_id),
+            APPEND_EVENT_SQL,
+            habit_event(
+                constants.EVENT_HABIT_UPDATED,
+                habit_id,
+                name=name,
+                description=desc,
+                periodicity=periodicity,
+                habit_type=habit_type,
+            ),
         )
         commit()
 
-    def delete_habit(self, habit_id: int):
+    @_serialized
+    def delete_habit(self, habit_id: int, day: int | None = None):
+        """
+        Archive a habit on day (default today); its history stays until purged.
+
+        Archived habits are hidden from every query and can be restored until
+        purge_archived_habits removes them.
+        """
         cursor, commit = self._get_cursor()
 
-        cursor.execute("DELETE FROM habits WHERE id = ?", (habit_id,))
-        cursor.execute("DELETE FROM records WHERE habit_id = ?", (habit_id,))
+        day = date.today().toordinal() if day is None else day
+        cursor.execute("UPDATE habits SET archived = ? WHERE id = ?", (day, habit_id))
+        cursor.execute(
+            APPEND_EVENT_SQL,
+            habit_event(constants.EVENT_HABIT_ARCHIVED, habit_id, day=day),
+        )
         commit()
 
-    def get_all_habits(self):
-        cursor, _commit = self._get_cursor()
+    @_serialized
+    def restore_habit(self, habit_id: int):
+        """
+        Bring an archived habit back with its history.
 
-        cursor.execute("SELECT * FROM habits")
-        habits_rows = cursor.fetchall()
+        Raises:
+            ValueError: when an active habit has the same name
+        """
+        cursor, commit = self._get_cursor()
 
-        cursor.execute("SELECT * FROM records ORDER BY habit_id")
-        records_rows = cursor.fetchall()
+        try:
+            cursor.execute("UPDATE habits SET archived = 0 WHERE id = ?", (habit_id,))
+        except sqlite3.IntegrityError as error:
+            # habits_active_name: an active habit took the name meanwhile
+            raise ValueError(
+                "An active habit has the same name; rename it before restoring."
+            ) from error
+        cursor.execute(
+            APPEND_EVENT_SQL, habit_event(constants.EVENT_HABIT_RESTORED, habit_id)
+        )
+        commit()
 
-        records_by_habit = {
-            hid: [
-                HabitRecordModel(r["day"], r["habit_id"], int(r["value"])) for r in recs
+    def get_archived_habits(self) -> list[tuple[int, str, int]]:
+        """Return (id, name, archived day) of every archived habit."""
+        with self._read_connection() as conn:
+            return [
+                tuple(row)
+                for row in conn.execute(
+                    "SELECT id, name, archived FROM habits WHERE archived > 0"
+                )
+            ]
+
+    def purge_archived_habits(
+        self,
+        archived_before: int,
+        batch_size: int = constants.PURGE_BATCH_SIZE,
+    ) -> int:
+        """
+        Permanently delete habits archived before a day, with all their data.
+
+        Records are deleted through the records (habit_id) index in batches of
+        batch_size rows, each in its own short transaction, so logging from
+        other threads is never blocked for long. Returns the number of purged
+        habits.
+        """
+        with self._write_lock:
+            cursor, _commit = self._get_cursor()
+            habit_ids = [
+                row[0]
+                for row in cursor.execute(
+                    "SELECT id FROM habits WHERE archived > 0 AND archived < ?",
+                    (archived_before,),
+                ).fetchall()
             ]
-            for hid, recs in groupby(records_rows, key=itemgetter("habit_id"))
-        }
+
+        for habit_id in habit_ids:
+            self._count_maintenance_rows(self._purge_habit(habit_id, batch_size))
+        return len(habit_ids)
+
+    def _purge_habit(
+        self, habit_id: int, batch_size: int = constants.PURGE_BATCH_SIZE
+    ) -> int:
+        """Delete a habit with all its data; returns the number of history rows deleted."""
+        # Pending upserts must not resurrect records of the purged habit
+        self.flush()
+
+        # Each table is indexed by habit_id first
+        total = 0
+        for table in ("records", "events", "completions"):
+            deleted = batch_size
+            while deleted == batch_size:
+                with self._write_lock:
+                    cursor, commit = self._get_cursor()
+                    deleted = cursor.execute(
+                        f"""DELETE FROM {table} WHERE rowid IN (
+                            SELECT rowid FROM {table} WHERE habit_id = ? LIMIT ?
+                        )""",
+                        (habit_id, batch_size),
+                    ).rowcount
+                    commit()
+                total += deleted
+
+        with self._write_lock:
+            cursor, commit = self._get_cursor()
+            for table, column in [
+                ("plans", "habit_id"),
+                ("plan_progress", "habit_id"),
+                ("habit_prices", "habit_id"),
+                ("habit_goals", "habit_id"),
+                ("habits", "id"),
+            ]:
+                cursor.execute(f"DELETE FROM {table} WHERE {column} = ?", (habit_id,))
+            commit()
+        return total
+
+    def _count_maintenance_rows(self, n_rows: int):
+        # Large imports and purges leave stale statistics and free pages behind;
+        # maintenance runs on its own thread so the caller never waits for it
+        with self._maintenance_lock:
+            self._rows_since_maintenance += n_rows
+            if (
+                self._rows_since_maintenance < constants.MAINTENANCE_AFTER_ROWS
+                or self._maintenance_thread is not None
+            ):
+                return
+            self._maintenance_thread = threading.Thread(
+                target=self._run_maintenance, name="tracker-maintenance", daemon=True
+            )
+            self._maintenance_thread.start()
+
+    def _run_maintenance(self):
+        try:
+            while True:
+                # No flush: a write failure is left for the caller's next flush
+                self._maintain_steps(check_integrity=False, full=False)
+                with self._maintenance_lock:
+                    if self._rows_since_maintenance < constants.MAINTENANCE_AFTER_ROWS:
+                        return
+        finally:
+            with self._maintenance_lock:
+                self._maintenance_thread = None
+
+    def wait_for_maintenance(self):
+        """Block until automatic maintenance started by imports or purges has finished."""
+        thread = self._maintenance_thread
+        if thread is not None:
+            thread.join()
+
+    def maintain(
+        self, check_integrity: bool = True, full: bool = False
+    ) -> MaintenanceReport:
+        """
+        Free unused pages, refresh planner statistics and check the file.
+
+        Free pages are returned in steps of VACUUM_STEP_PAGES, each in its own
+        short transaction, so logging from other threads is never blocked for
+        long. Files created before incremental auto-vacuum keep their free
+        pages until full=True converts them, which rewrites the whole file
+        once; full also runs the slower full integrity check.
+
+        Runs without the integrity check on a background thread after
+        MAINTENANCE_AFTER_ROWS rows were imported or purged.
+        """
+        self.flush()
+        return self._maintain_steps(check_integrity, full)
+
+    def _maintain_steps(self, check_integrity: bool, full: bool) -> MaintenanceReport:
+        with self._maintenance_lock:
+            self._rows_since_maintenance = 0
+
+        pages_freed = 0
+        with self._write_lock:
+            if full and not maintenance.incremental_vacuum_enabled(self.conn):
+                pages_freed = maintenance.enable_incremental_vacuum(self.conn)
+            vacuum = maintenance.incremental_vacuum_enabled(self.conn)
+
+        freed = constants.VACUUM_STEP_PAGES
+        while vacuum and freed == constants.VACUUM_STEP_PAGES:
+            with self._write_lock:
+                freed = maintenance.vacuum_step(self.conn, constants.VACUUM_STEP_PAGES)
+            pages_freed += freed
+
+        with self._write_lock:
+            maintenance.update_statistics(self.conn)
+
+        problems = []
+        if check_integrity:
+            with self._read_connection() as conn:
+                problems = maintenance.integrity_problems(conn, full)
+
+        return MaintenanceReport(pages_freed, problems, self.get_storage_report())
+
+    def backup(self, dest: str, compress: bool = True) -> BackupResult:
+        """
+        Back up the database to dest while it stays open for logging.
+
+        Pending writes are flushed first so the backup holds everything logged
+        so far; see backup.backup for the page-stepped copy and its checksum.
+        """
+        if self.in_memory:
+            raise ValueError("An in-memory database has no file to back up.")
+        self.flush()
+        return backup.backup(self.path, dest, compress)
+
+    def restore(self, backup_path: str):
+        """
+        Replace the database contents with a verified backup.
+
+        The data generation is moved past its value before the restore, so a
+        snapshot taken since the backup can never pass for the restored data.
+        Habit managers over this database must load their habits again.
+        """
+        generation = self.get_data_generation()
+        with self._write_lock:
+            backup.restore(backup_path, self.conn)
+            self.conn.execute(
+                "UPDATE data_generation SET generation = MAX(generation, ?) + 1",
+                (generation,),
+            )
+            self.conn.commit()
+
+    def get_storage_report(self) -> StorageReport:
+        """Return the file size, free pages and page usage of every table and index."""
+        with self._read_connection() as conn:
+            return maintenance.storage_report(conn)
+
+    def get_data_generation(self) -> int:
+        """Return the counter bumped by every committed change to habits or prices."""
+        return self._get_data_version()[0]
+
+    def _get_data_version(self) -> tuple[int, int]:
+        """Return the data generation and the event seq records are compacted up to."""
+        self.flush()
+
+        with self._read_connection() as conn:
+            return conn.execute(
+                """SELECT generation, (SELECT compacted_seq FROM event_log_state)
+                FROM data_generation"""
+            ).fetchone()
+
+    def get_all_habits(self, since_day: int | None = None):
+        """
+        Return every habit with its records and price history.
+
+        With since_day only records from that day on are loaded; the range is
+        served by the records primary key (day, habit_id), so loading just
+        today's values stays fast however long the history is.
+
+        With a snapshot_path, full loads read the snapshot while its generation
+        matches the database, replaying the values logged since it was taken,
+        and rewrite it from SQLite when habits or prices changed.
+        """
+        if since_day is not None or self.snapshot_path is None:
+            return self._load_habits(since_day)
+
+        generation, compacted_seq = self._get_data_version()
+        snapshot = read_snapshot(self.snapshot_path, generation)
+        if snapshot is None:
+            # Read after the version: newer data under an older version
+            # only makes the snapshot look stale, never current
+            habits = self._load_habits()
+            write_snapshot(self.snapshot_path, generation, compacted_seq, habits)
+            return habits
+
+        habits, snapshot_seq = snapshot
+        if snapshot_seq < compacted_seq:
+            self._replay_events(habits, snapshot_seq, compacted_seq)
+        return habits
+
+    def _replay_events(self, habits: list[HabitModel], after_seq: int, until_seq: int):
+        """Apply the values logged in (after_seq, until_seq] to the records of habits."""
+        by_id = {habit.id: habit for habit in habits}
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(
+                """SELECT habit_id, day, value FROM events
+                WHERE seq > ? AND seq <= ? AND kind = ?
+                ORDER BY seq""",
+                (after_seq, until_seq, constants.EVENT_LOG),
+            )
+            for habit_id, day, value in rows:
+                # The habits are unchanged since the snapshot, so all are present
+                habit = by_id.get(habit_id)
+                if habit is not None:
+                    habit.records[day] = value
+
+    def refresh_snapshot(self, habits: list[HabitModel] | None = None):
+        """
+        Rewrite the snapshot with the current data, e.g. before exit.
+
+        habits, when given, must hold the full current data of every active
+        habit, such as the fully loaded habits of a HabitManager writing to
+        this database; they are written as they are instead of being loaded
+        from SQLite again.
+        """
+        if self.snapshot_path is None:
+            return
+        if habits is None:
+            habits = self.get_all_habits()
+        generation, compacted_seq = self._get_data_version()
+        write_snapshot(self.snapshot_path, generation, compacted_seq, habits)
+
+    def _load_habits(self, since_day: int | None = None) -> list[HabitModel]:
+        self.flush()
+
+        with self._read_connection() as conn:
+            habits_rows = conn.execute(
+                "SELECT * FROM habits WHERE archived = 0"
+            ).fetchall()
+            active_ids = {h["id"] for h in habits_rows}
+
+            # Stream plain tuples straight into per-habit {day: value} stores,
+            # skipping Row and HabitRecordModel objects for every record
+            records_by_habit: dict[int, dict[int, int]] = {}
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            records_sql = "SELECT day, habit_id, value FROM records"
+            if since_day is not None:
+                records_sql += " WHERE day >= ?"
+            for day, habit_id, value in cursor.execute(
+                records_sql, () if since_day is None else (since_day,)
+            ):
+                store = records_by_habit.get(habit_id)
+                if store is None:
+                    if habit_id not in active_ids:
+                        continue
+                    store = records_by_habit[habit_id] = {}
+                store[day] = value
+
+            prices_by_habit: dict[int, list[tuple[int, float]]] = {}
+            for habit_id, effective_day, unit_cost in cursor.execute(
+                """SELECT habit_id, effective_day, unit_cost FROM habit_prices
+                ORDER BY habit_id, effective_day"""
+            ):
+                prices_by_habit.setdefault(habit_id, []).append(
+                    (effective_day, unit_cost)
+                )
 
         return [
             HabitModel(
@@ -224,24 +923,394 @@ class Database:
                 h["periodicity"],
                 h["habit_type"],
                 datetime.fromisoformat(h["created"]),
-                records_by_habit.get(h["id"], []),
+                records_by_habit.get(h["id"], {}),
+                prices_by_habit.get(h["id"], []),
             )
             for h in habits_rows
         ]
 
-    def update_record_value(self, day: str, habit_id: int, new_value: int):
+    @_serialized
+    def upsert_record(self, day: int, habit_id: int, value: int) -> Future | None:
+        """
+        Log a value, appended to the event log and folded into records on compaction.
+
+        The write is buffered when write-behind is enabled, or queued to the
+        background writer which returns a Future resolved once it is committed.
+        """
+        return self._log_values([(day, habit_id, value)])
+
+    def upsert_records(self, entries: list[tuple[int, int, int]]) -> Future | None:
+        """Log many (day, habit_id, value) entries in one batch."""
+        future = self._log_values(entries)
+        if len(entries) > 1:
+            # Batches are imports and backfills; single logs never add up to much
+            self._count_maintenance_rows(len(entries))
+        return future
+
+    def _log_values(self, entries: list[tuple[int, int, int]]) -> Future | None:
+        return self._write_many(self._log_value_writes(entries))
+
+    def _log_value_writes(
+        self, entries: list[tuple[int, int, int]]
+    ) -> list[tuple[tuple, str, tuple]]:
+        # Keyed per (day, habit_id) like records: a buffer or writer batch
+        # appends only the last value logged for a day, so repeated logs in
+        # one flush window stay one row write; completions keep every time
+        return [
+            (
+                ("events", constants.EVENT_LOG, day, habit_id),
+                APPEND_EVENT_SQL,
+                log_event(day, habit_id, value),
+            )
+            for day, habit_id, value in entries
+        ]
+
+    def add_completions(self, entries: list[tuple[int, int]]) -> Future | None:
+        """Append (habit_id, epoch seconds) completions in one batch."""
+        return self._write_many(self._completion_writes(entries))
+
+    def log_completion(
+        self, habit_id: int, ts: int, day: int, value: int
+    ) -> Future | None:
+        """Append a completion and log the new value of its day in one batch."""
+        return self._write_many(
+            self._log_value_writes([(day, habit_id, value)])
+            + self._completion_writes([(habit_id, ts)])
+        )
+
+    def _completion_writes(
+        self, entries: list[tuple[int, int]]
+    ) -> list[tuple[tuple, str, tuple]]:
+        return [
+            (
+                ("completions", next(self._append_keys)),
+                "INSERT INTO completions (habit_id, ts) VALUES (?, ?)",
+                (habit_id, ts),
+            )
+            for habit_id, ts in entries
+        ]
+
+    def get_completions(
+        self, habit_id: int, start_ts: int | None = None, end_ts: int | None = None
+    ) -> array:
+        """
+        Return the sorted completion timestamps of a habit in [start_ts, end_ts).
+
+        The range is read in order from the covering (habit_id, ts) index
+        straight into an array('q').
+        """
+        self.flush()
+
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(
+                """SELECT ts FROM completions
+                WHERE habit_id = ? AND ts >= ? AND ts < ?
+                ORDER BY ts""",
+                (
+                    habit_id,
+                    -(2**63) if start_ts is None else start_ts,
+                    2**63 - 1 if end_ts is None else end_ts,
+                ),
+            )
+            return array("q", (ts for (ts,) in rows))
+
+    @_serialized
+    def _write(self, key: tuple, sql: str, params: tuple) -> Future | None:
+        """Apply a keyed upsert directly, through the write-behind buffer or the writer thread."""
+        return self._write_many([(key, sql, params)])
+
+    @_serialized
+    def _write_many(self, writes: list[tuple[tuple, str, tuple]]) -> Future | None:
+        """Apply keyed upserts as one batch: one transaction, or one buffer flush check."""
+        if self.writer is not None:
+            return self.writer.submit_many(writes)
+
+        if self.write_buffer is None:
+            cursor, commit = self._get_cursor()
+            # Last write per key, as in the buffer and the writer
+            keyed = {key: (sql, params) for key, sql, params in writes}
+            for sql, rows in group_statements(keyed.values()):
+                cursor.executemany(sql, rows)
+            commit()
+            self._uncompacted = True
+            return None
+
+        arm_timer = len(self.write_buffer) == 0
+        for key, sql, params in writes:
+            self.write_buffer.add(key, sql, params)
+        if self.write_buffer.is_due():
+            self.flush()
+        elif arm_timer:
+            # Bounds the loss in a crash even when no further write arrives
+            self._flush_timer = threading.Timer(
+                self.write_buffer.config.max_delay_seconds, self._flush_due
+            )
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+        return None
+
+    @_serialized
+    def _flush_due(self):
+        # The timer may fire after a flush it raced with, or after the connection closed
+        if self.conn is not None and len(self.write_buffer):
+            self.flush()
+
+    def flush(self):
+        """Write all buffered or queued upserts and compact the event log before returning."""
+        # Every read flushes first; without pending writes it must not take the
+        # lock, so pooled reads run concurrently
+        if self._has_pending_writes():
+            self._flush()
+
+    def _has_pending_writes(self) -> bool:
+        if self.writer is not None:
+            return not self.writer.idle
+        return self._uncompacted or bool(self.write_buffer)
+
+    @_serialized
+    def _flush(self):
+        if self.writer is not None:
+            # The writer compacts in every batch transaction
+            self.writer.flush()
+            return
+
+        cursor, commit = self._get_cursor()
+
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if self.write_buffer is not None:
+            for sql, rows in self.write_buffer.drain():
+                cursor.executemany(sql, rows)
+        compact_events(self.conn)
+        commit()
+        self._uncompacted = False
+
+    @_serialized
+    def save_plans(self, plans: list[ReductionPlan]):
+        """Replace the schedule of each plan's habit from its start day on, in one transaction."""
+        cursor, commit = self._get_cursor()
+
+        cursor.executemany(
+            "DELETE FROM plans WHERE habit_id = ? AND day >= ?",
+            [(plan.habit_id, plan.start_day) for plan in plans],
+        )
+        cursor.executemany(
+            "INSERT INTO plans (habit_id, day, target, curve) VALUES (?, ?, ?, ?)",
+            [
+                (plan.habit_id, plan.start_day + offset, target, plan.curve)
+                for plan in plans
+                for offset, target in enumerate(plan.targets)
+            ],
+        )
+        commit()
+
+    def get_plan_adherence(self, until_day: int) -> list[PlanAdherence]:
+        """Compare planned targets with logged values up to until_day in one query."""
+        self.flush()
+
+        # Each plan row probes the records primary key (day, habit_id) once
+        with self._read_connection() as conn:
+            rows = conn.execute(
+                """SELECT p.habit_id,
+                    COUNT(*) AS planned_days,
+                    COUNT(r.value) AS logged_days,
+                    COALESCE(SUM(r.value <= p.target), 0) AS days_on_plan,
+                    COALESCE(SUM(r.value > p.target), 0) AS days_over_plan,
+                    COALESCE(SUM(r.value - p.target), 0) AS total_deviation
+                FROM plans p
+                LEFT JOIN records r ON r.day = p.day AND r.habit_id = p.habit_id
+                WHERE p.day <= ?
+                    AND p.habit_id NOT IN (SELECT id FROM habits WHERE archived > 0)
+                GROUP BY p.habit_id""",
+                (until_day,),
+            ).fetchall()
+
+        return [PlanAdherence(*row) for row in rows]
+
+    def get_habit_summaries(self, today: int) -> dict[int, HabitSummary]:
+        """
+        Return today's value, record count, last logged day and current streak
+        of every habit in one aggregate query.
+
+        Consecutive days share the same day - ROW_NUMBER() value, so the run
+        holding the last logged day is the current streak when that day is
+        today or yesterday.
+        """
+        self.flush()
+
+        with self._read_connection() as conn:
+            rows = conn.execute(
+                """WITH numbered AS (
+                    SELECT habit_id, day, value,
+                        day - ROW_NUMBER() OVER (PARTITION BY habit_id ORDER BY day) AS run,
+                        MAX(day) OVER (PARTITION BY habit_id) AS last_day,
+                        COUNT(*) OVER (PARTITION BY habit_id) AS total
+                    FROM records
+                )
+                SELECT h.id,
+                    COALESCE(MAX(CASE WHEN n.day = :today THEN n.value END), 0),
+                    COUNT(n.day),
+                    MAX(n.last_day),
+                    COUNT(CASE WHEN n.run = n.last_day - n.total
+                        AND n.last_day >= :today - 1 THEN 1 END)
+                FROM habits h
+                LEFT JOIN numbered n ON n.habit_id = h.id
+                WHERE h.archived = 0
+                GROUP BY h.id""",
+                {"today": today},
+            ).fetchall()
+
+        return {row[0]: HabitSummary(*row) for row in rows}
+
+    def get_record_history(
+        self, habit_id: int, start_day: int, end_day: int
+    ) -> list[RecordEvent]:
+        """
+        Return every value logged for a habit on days in a range, oldest first.
+
+        Only the events of the range are read, through the (habit_id, day)
+        index; events.replay folds them into the values as of any time.
+        """
+        self.flush()
+
+        with self._read_connection() as conn:
+            rows = conn.execute(
+                f"""SELECT habit_id, day, value, logged_at FROM events
+                WHERE habit_id = ? AND day BETWEEN ? AND ?
+                    AND kind = '{constants.EVENT_LOG}'
+                ORDER BY seq""",
+                (habit_id, start_day, end_day),
+            ).fetchall()
+
+        return [RecordEvent(*row) for row in rows]
+
+    def get_habit_revisions(self) -> dict[int, int]:
+        """
+        Return the seq of the latest event of every active habit.
+
+        Every logged value and habit edit appends an event, so a habit whose
+        revision is unchanged has the same records, name and settings.
+        """
+        self.flush()
+
+        # seq is the rowid, so the (habit_id, day) index covers this scan
+        with self._read_connection() as conn:
+            rows = conn.execute(
+                """SELECT habit_id, MAX(seq) FROM events
+                WHERE habit_id NOT IN (SELECT id FROM habits WHERE archived > 0)
+                GROUP BY habit_id"""
+            ).fetchall()
+
+        return dict(rows)
+
+    def get_plan_targets(self) -> dict[int, dict[int, int]]:
+        """Return the saved plan targets as {habit_id: {day: target}}."""
+        with self._read_connection() as conn:
+            rows = conn.execute("SELECT habit_id, day, target FROM plans").fetchall()
+
+        targets: dict[int, dict[int, int]] = {}
+        for habit_id, day, target in rows:
+            targets.setdefault(habit_id, {})[day] = target
+        return targets
+
+    def get_plan_progress(self) -> dict[int, PlanProgress]:
+        """Return the stored adherence summary of every planned habit."""
+        self.flush()
+
+        with self._read_connection() as conn:
+            rows = conn.execute("SELECT * FROM plan_progress").fetchall()
+
+        return {row["habit_id"]: PlanProgress(*row) for row in rows}
+
+    def save_plan_progress(self, progress: PlanProgress) -> Future | None:
+        return self._write(
+            ("plan_progress", progress.habit_id),
+            UPSERT_PLAN_PROGRESS_SQL,
+            (
+                progress.habit_id,
+                progress.start_day,
+                progress.logged_days,
+                progress.days_over_plan,
+                progress.cumulative_deviation,
+                progress.sum_x,
+                progress.sum_y,
+                progress.sum_xx,
+                progress.sum_xy,
+                progress.projected_quit_day,
+            ),
+        )
+
+    @_serialized
+    def set_unit_cost(self, habit_id: int, effective_day: int, unit_cost: float):
+        """Record the unit cost of a habit from effective_day on."""
         cursor, commit = self._get_cursor()
 
         cursor.execute(
-            "UPDATE records SET value = ? WHERE day = ? AND habit_id = ?",
-            (new_value, day, habit_id),
+            """INSERT OR REPLACE INTO habit_prices (habit_id, effective_day, unit_cost)
+            VALUES (?, ?, ?)""",
+            (habit_id, effective_day, unit_cost),
         )
+        commit()
 
+    @_serialized
+    def set_habit_goal(self, habit_id: int, goal: int | None):
+        """Set the value to reach per period of a habit; None removes the goal."""
+        cursor, commit = self._get_cursor()
+
+        if goal is None:
+            cursor.execute("DELETE FROM habit_goals WHERE habit_id = ?", (habit_id,))
+        else:
+            cursor.execute(
+                "INSERT OR REPLACE INTO habit_goals (habit_id, goal) VALUES (?, ?)",
+                (habit_id, goal),
+            )
         commit()
 
-    def create_record(self, day: str, habit_id: int, value: int):
-        self._insert_record(
-            day,
-            habit_id,
-            value,
-        )
+    def get_habit_goals(self) -> dict[int, int]:
+        """Return the goals of the active habits as {habit_id: goal}."""
+        with self._read_connection() as conn:
+            rows = conn.execute(
+                """SELECT g.habit_id, g.goal FROM habit_goals g
+                JOIN habits h ON h.id = g.habit_id
+                WHERE h.archived = 0"""
+            ).fetchall()
+
+        return dict(rows)
+
+    def get_cost_report(self, start_day: int, end_day: int) -> list[CostReport]:
+        """
+        Compute units, cost and savings per habit over a day range in one SQL pass.
+
+        Each record is priced with the latest price effective on its day, so
+        price changes inside the range are honoured. Savings are measured
+        against the highest daily value of the habit in the range.
+        """
+        self.flush()
+
+        # The day range scans the records primary key (day, habit_id) and each
+        # price lookup seeks the habit_prices primary key (habit_id, effective_day)
+        with self._read_connection() as conn:
+            rows = conn.execute(
+                """WITH priced AS (
+                    SELECT r.habit_id, r.value,
+                        MAX(r.value) OVER (PARTITION BY r.habit_id) AS baseline,
+                        COALESCE((
+                            SELECT p.unit_cost FROM habit_prices p
+                            WHERE p.habit_id = r.habit_id AND p.effective_day <= r.day
+                            ORDER BY p.effective_day DESC LIMIT 1
+                        ), 0) AS unit_cost
+                    FROM records r
+                    WHERE r.day BETWEEN ? AND ?
+                        AND r.habit_id NOT IN (SELECT id FROM habits WHERE archived > 0)
+                )
+                SELECT habit_id, COUNT(*), SUM(value), MAX(baseline),
+                    SUM(value * unit_cost), SUM((baseline - value) * unit_cost)
+                FROM priced
+                GROUP BY habit_id""",
+                (start_day, end_day),
+            ).fetchall()
+
+        return [CostReport(*row) for row in rows]
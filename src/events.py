@@ -0,0 +1,87 @@
+"""
+Append-only event log of logged values and habit edits.
+
+Every logged value is appended to the events table with the time it was
+logged instead of overwriting its record in place. Appends only ever add rows
+at the end of the table, and a compaction step folds the events appended
+since the previous compaction into the current-state records table, writing
+each (day, habit_id) once however often it was logged in between.
+
+Compaction runs at the end of every write-behind flush and background writer
+batch, and before reads otherwise; the events themselves are kept as the
+timestamped history of the habit.
+"""
+
+import json
+import sqlite3
+import time
+
+from src import constants
+from src.models import RecordEvent
+
+APPEND_EVENT_SQL = """INSERT INTO events (logged_at, kind, habit_id, day, value, data)
+    VALUES (?, ?, ?, ?, ?, ?)"""
+
+# Only the last event per (habit_id, day) in the range reaches records
+FOLD_EVENTS_SQL = f"""INSERT OR REPLACE INTO records (day, habit_id, value)
+    SELECT day, habit_id, value FROM events
+    WHERE seq IN (
+        SELECT MAX(seq) FROM events
+        WHERE seq > ? AND seq <= ? AND kind = '{constants.EVENT_LOG}'
+        GROUP BY habit_id, day
+    )"""
+
+
+def log_event(
+    day: int, habit_id: int, value: int, logged_at: int | None = None
+) -> tuple:
+    """Return APPEND_EVENT_SQL parameters for a logged value, stamped now by default."""
+    logged_at = int(time.time()) if logged_at is None else logged_at
+    return (logged_at, constants.EVENT_LOG, habit_id, day, value, None)
+
+
+def habit_event(kind: str, habit_id: int, **data) -> tuple:
+    """Return APPEND_EVENT_SQL parameters for a habit edit, stamped now."""
+    return (
+        int(time.time()),
+        kind,
+        habit_id,
+        None,
+        None,
+        json.dumps(data) if data else None,
+    )
+
+
+def compact_events(conn: sqlite3.Connection) -> int:
+    """
+    Fold the events appended since the last compaction into records.
+
+    Runs inside the caller's transaction, so the watermark only moves when the
+    folded records are committed. Returns the number of events compacted.
+    """
+    compacted_seq, last_seq = conn.execute(
+        """SELECT compacted_seq, (SELECT COALESCE(MAX(seq), 0) FROM events)
+        FROM event_log_state"""
+    ).fetchone()
+    if last_seq == compacted_seq:
+        return 0
+
+    conn.execute(FOLD_EVENTS_SQL, (compacted_seq, last_seq))
+    conn.execute("UPDATE event_log_state SET compacted_seq = ?", (last_seq,))
+    return last_seq - compacted_seq
+
+
+def replay(history: list[RecordEvent], as_of: int | None = None) -> dict[int, int]:
+    """
+    Rebuild {day: value} from a habit's record history as it stood at as_of.
+
+    Values logged before the event log existed have no time and always count.
+
+    Examples:
+        4 then 2 logged for the same day -> the day holds 2, or 4 as of between both
+    """
+    values: dict[int, int] = {}
+    for event in history:
+        if as_of is None or event.logged_at is None or event.logged_at <= as_of:
+            values[event.day] = event.value
+    return values
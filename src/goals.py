@@ -0,0 +1,90 @@
+"""
+Goal evaluation for establishment habits.
+
+An establishment habit can have a goal: a value to reach in each of its
+daily, weekly or monthly periods, e.g. 10 minutes of meditation a day, 3
+sport sessions a week or 1 specialist appointment a month. A habit is
+evaluated in one pass over its records sorted by day: values are summed per
+period and a period is closed when the pass crosses its end, so the whole
+history is evaluated without a lookup per period. Periods without any record
+count as missed.
+
+The result of a habit only changes when the habit is written or a new period
+starts, which is what HabitManager.get_goal_progress caches it by.
+"""
+
+from datetime import date
+
+from src import constants, utils
+from src.models import GoalProgress
+
+
+def next_period_start(periodicity: str, day: int) -> int:
+    """Return the first day number of the period after the one holding day."""
+    start = utils.period_start(periodicity, day)
+    if periodicity == constants.PERIODICITY_WEEKLY:
+        return start + 7
+    if periodicity == constants.PERIODICITY_MONTHLY:
+        month = date.fromordinal(start)
+        if month.month == 12:
+            return date(month.year + 1, 1, 1).toordinal()
+        return date(month.year, month.month + 1, 1).toordinal()
+    return start + 1
+
+
+def evaluate_goal(
+    habit_id: int,
+    periodicity: str,
+    created_day: int,
+    goal: int,
+    records: dict[int, int],
+    today: int,
+) -> GoalProgress:
+    """
+    Evaluate the {day: value} records of a habit against its goal up to today.
+
+    Completed periods run from the period of created_day, or of the first
+    record when that is earlier, to the period before today's. The running
+    period is reported separately as its value so far.
+
+    Examples:
+        Sport with a goal of 3 and 3, 1 and 4 sessions logged in the last
+        three completed weeks -> 2 of 3 weeks met, streak 1
+    """
+    current = utils.period_index(periodicity, today)
+    first_day = min(created_day, min(records, default=today))
+
+    # Indexes of the completed periods reaching the goal, ascending
+    met: list[int] = []
+    period, period_end, total = None, None, 0
+    for day in sorted(records):
+        if day > today:
+            break
+        if period_end is None or day >= period_end:
+            if period is not None and total >= goal:
+                met.append(period)
+            period = utils.period_index(periodicity, day)
+            period_end = next_period_start(periodicity, day)
+            total = 0
+        total += records[day]
+
+    current_value = 0
+    if period == current:
+        current_value = total
+    elif period is not None and total >= goal:
+        met.append(period)
+
+    streak = 0
+    for index in reversed(met):
+        if index != current - 1 - streak:
+            break
+        streak += 1
+
+    return GoalProgress(
+        habit_id,
+        goal,
+        current - utils.period_index(periodicity, first_day),
+        len(met),
+        streak,
+        current_value,
+    )
@@ -1,10 +1,40 @@
+import math
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future
+from contextlib import suppress
 from datetime import date
-from src.db import Database
+from operator import itemgetter
+from typing import Any, Callable
+from src import adherence, events, goals, utils
+from src.cache import ResultCache
+from src.storage import Storage
 from src import constants
-from src.models import HabitModel
+from src.models import (
+    CostReport,
+    GoalProgress,
+    HabitModel,
+    HabitSummary,
+    PlanAdherence,
+    PlanProgress,
+    RecordEvent,
+    ReductionPlan,
+)
 
 
 class Habit:
+    __slots__ = (
+        "id",
+        "name",
+        "description",
+        "periodicity",
+        "habit_type",
+        "created",
+        "records",
+        "prices",
+    )
+
     def __init__(self, habit_model: HabitModel):
         self.id = habit_model.id
         self.name = habit_model.name
@@ -12,7 +42,37 @@ class Habit:
         self.periodicity = habit_model.periodicity
         self.habit_type = habit_model.habit_type
         self.created = habit_model.created
-        self.records = {record.day: record.value for record in habit_model.records}
+        # The database hands over its {day: value} store directly, no copy needed
+        self.records = (
+            habit_model.records
+            if isinstance(habit_model.records, dict)
+            else {record.day: record.value for record in habit_model.records}
+        )
+        self.prices = habit_model.prices
+
+    def to_model(self) -> HabitModel:
+        return HabitModel(
+            self.id,
+            self.name,
+            self.description,
+            self.periodicity,
+            self.habit_type,
+            self.created,
+            self.records,
+            self.prices,
+        )
+
+    def summary(self, today: int) -> HabitSummary:
+        """Summarize the habit for the dashboard in one pass over its records."""
+        last_day = max(self.records, default=None)
+        streak = 0
+        if last_day is not None and last_day >= today - 1:
+            while last_day - streak in self.records:
+                streak += 1
+
+        return HabitSummary(
+            self.id, self.records.get(today, 0), len(self.records), last_day, streak
+        )
 
 
 class HabitManager:
@@ -20,31 +80,100 @@ class HabitManager:
     Manages a collection of Habit objects, allowing add, remove, modify, and log operations.
     """
 
-    def __init__(self, db: Database):
+    def __init__(self, db: Storage, cache_size: int = 256):
         self.db = db
-        self.habits: list[Habit] = []
+        self._habits: list[Habit] | None = []
+        self._habits_by_id: dict[int, Habit] = {}
+        self._habit_ids_by_name: dict[str, int] = {}
+        self.habits = []
+        self.habit_versions: dict[int, int] = {}
+        self.analytics_cache = ResultCache(cache_size)
+        self.plan_targets: dict[int, dict[int, int]] = {}
+        self.plan_progress: dict[int, PlanProgress] = {}
+        self.habit_goals: dict[int, int] = {}
+        self.history_loaded = False
+        # Completion timestamps per habit, loaded on first use
+        self.completions: dict[int, array] = {}
+        # Queued writes of interactive logs, confirmed in one go later
+        self.pending_writes: list[Future | None] = []
+
+    def load_habits(self, lazy: bool = False):
+        """
+        Load all habits, or with lazy=True only their values of today.
+
+        A lazy load is enough to prompt for and log today's values; call
+        ensure_history before anything that reads past records.
+        """
+        since_day = self._get_today_key() if lazy else None
+        self.habits = [
+            Habit(db_model) for db_model in self.db.get_all_habits(since_day)
+        ]
+        self.history_loaded = not lazy
+        self.plan_targets = self.db.get_plan_targets()
+        self.plan_progress = self.db.get_plan_progress()
+        self.habit_goals = self.db.get_habit_goals()
+        self.completions.clear()
+        self.analytics_cache.clear()
+
+    def ensure_history(self):
+        """Load the full record history of every habit after a lazy load_habits."""
+        if self.history_loaded:
+            return
 
-    def load_habits(self):
-        self.habits = [Habit(db_model) for db_model in self.db.get_all_habits()]
+        for db_model in self.db.get_all_habits():
+            habit = self._habits_by_id.get(db_model.id)
+            if habit is not None:
+                # Values logged since the lazy load were flushed and are included
+                habit.records = db_model.records
+                self._bump_habit_version(habit.id)
+        self.history_loaded = True
+
+    @property
+    def habits(self) -> list[Habit]:
+        # Removals only drop the habit from the indexes; the list is rebuilt on next use
+        if self._habits is None:
+            self._habits = list(self._habits_by_id.values())
+        return self._habits
+
+    @habits.setter
+    def habits(self, habits: list[Habit]):
+        # Keep the id and name indexes in step with every reassignment of the list
+        self._habits = habits
+        self._habits_by_id = {habit.id: habit for habit in habits}
+        self._habit_ids_by_name = {habit.name: habit.id for habit in habits}
+
+    def get_habit_version(self, habit_id: int) -> int:
+        """Return the write counter of a habit, used to key cached analytics."""
+        return self.habit_versions.get(habit_id, 0)
+
+    def _bump_habit_version(self, habit_id: int):
+        self.habit_versions[habit_id] = self.get_habit_version(habit_id) + 1
+
+    def memoize(
+        self, name: str, habit: Habit, compute: Callable[[], Any], *extra_key
+    ) -> Any:
+        """Return compute() for a habit, cached until the habit is written again."""
+        key = (name, habit.id, self.get_habit_version(habit.id), *extra_key)
+        return self.analytics_cache.get_or_compute(key, compute)
+
+    def find_habit(self, habit_id: int) -> Habit | None:
+        """Return the active habit with this id in O(1), or None."""
+        return self._habits_by_id.get(habit_id)
 
     def _get_habit_by_id(self, habit_id: int):
         """Get a habit by its id."""
-        habit = next(
-            (h for h in self.habits if getattr(h, "id", None) == habit_id), None
-        )
+        habit = self._habits_by_id.get(habit_id)
         if habit is None:
             raise ValueError(f"Habit with id {habit_id} not found.")
         return habit
 
     def _get_habit_by_name(self, habit_name: str):
-        """Get a habit by its id."""
-        habit = next(
-            (h for h in self.habits if getattr(h, "name", None) == habit_name), None
-        )
-        return habit
+        """Get a habit by its name."""
+        habit_id = self._habit_ids_by_name.get(habit_name)
+        return self._habits_by_id.get(habit_id) if habit_id is not None else None
 
     def _get_today_key(self):
-        return date.today().isoformat()
+        return date.today().toordinal()
 
     # CLI calls
 
@@ -56,54 +185,232 @@ class HabitManager:
         if existing_habit is not None:
             raise ValueError(f"Habit with name '{name}' already exists.")
 
-        added_habit = self.db.add_habit(name, desc, periodicity, habit_type)
-        self.habits.append(Habit(added_habit))
+        added_habit = Habit(self.db.add_habit(name, desc, periodicity, habit_type))
+        if self._habits is not None:
+            self._habits.append(added_habit)
+        self._habits_by_id[added_habit.id] = added_habit
+        self._habit_ids_by_name[added_habit.name] = added_habit.id
 
     def update_habit(
         self, name: str, new_name: str, desc: str, periodicity: str, habit_type: str
     ):
-        """Add a new habit to the tracker."""
+        """Update a habit; raises ValueError when another active habit has new_name."""
 
         existing_habit = self._get_habit_by_name(name)
 
         if existing_habit is None:
             return
 
+        if new_name != name and self._get_habit_by_name(new_name) is not None:
+            raise ValueError(f"Habit with name '{new_name}' already exists.")
+
+        # Storage enforces the same rule; memory only changes once it accepted
+        self.db.update_habit(existing_habit.id, new_name, desc, periodicity, habit_type)
+
+        del self._habit_ids_by_name[name]
+        self._habit_ids_by_name[new_name] = existing_habit.id
         existing_habit.name = new_name
         existing_habit.description = desc
         existing_habit.periodicity = periodicity
         existing_habit.habit_type = habit_type
-
-        self.db.update_habit(existing_habit.id, new_name, desc, periodicity, habit_type)
+        self._bump_habit_version(existing_habit.id)
 
     def remove_habit(self, habit_name: str):
-        """Remove a habit by name from the tracker."""
+        """Archive a habit by name; its history stays in the database until purged."""
         existing_habit = self._get_habit_by_name(habit_name)
 
         if existing_habit is None:
             return
 
-        self.habits = [h for h in self.habits if h.name != habit_name]
+        del self._habits_by_id[existing_habit.id]
+        del self._habit_ids_by_name[habit_name]
+        self._habits = None
+        self.plan_targets.pop(existing_habit.id, None)
+        self.plan_progress.pop(existing_habit.id, None)
+        self.habit_goals.pop(existing_habit.id, None)
+        self.completions.pop(existing_habit.id, None)
+        self._bump_habit_version(existing_habit.id)
+        self.analytics_cache.invalidate_habit(existing_habit.id)
         self.db.delete_habit(existing_habit.id)
 
-    def log_today_habit(self, habit_id: int, value: int):
-        """Log or update today's record for a habit."""
+    def restore_habit(self, habit_id: int):
+        """Bring an archived habit back together with its history."""
+        self.db.restore_habit(habit_id)
+        self.load_habits(lazy=not self.history_loaded)
+
+    def log_today_habit(self, habit_id: int, value: int) -> Future | None:
+        """
+        Log or update today's record for a habit.
+
+        Returns the database Future when writes go through the background writer.
+        """
+        today = self._get_today_key()
+        self._set_value(self._get_habit_by_id(habit_id), today, value)
+        return self.db.upsert_record(today, habit_id, value)
+
+    def _set_value(self, habit: Habit, day: int, value: int):
+        # In-memory side of a single logged value; the caller writes it
+        self._bump_habit_version(habit.id)
+        previous_value = habit.records.get(day)
+        habit.records[day] = value
+        if self._track_plan_progress(habit.id, day, previous_value, value):
+            self.db.save_plan_progress(self.plan_progress[habit.id])
+
+    def _stored_period_day(self, habit: Habit, day: int) -> int | None:
+        """Return the day of the stored value in the weekly or monthly period of day, if any."""
+        start = utils.period_start(habit.periodicity, day)
+        end = goals.next_period_start(habit.periodicity, day)
+        stored = [d for d in range(start, end) if d in habit.records]
+        return stored[0] if stored else None
+
+    def _check_one_value_per_period(self, habit: Habit, day: int):
+        """Raise ValueError when a backfilled weekly or monthly value would join one on another day of the period."""
+        if habit.periodicity == constants.PERIODICITY_DAILY:
+            return
+        stored_day = self._stored_period_day(habit, day)
+        if stored_day is not None and stored_day != day:
+            raise ValueError(
+                f"'{habit.name}' already has a value for the period of {date.fromordinal(day)}."
+            )
+
+    def confirm_write(self, future: Future | None):
+        """Block until a queued write is committed, see confirm_writes."""
+        self.confirm_writes([future])
+
+    def confirm_writes(self, futures: list[Future | None]):
+        """
+        Block until queued writes are committed, e.g. once after a round of prompts.
+
+        Values are kept in memory before the storage commits them. When a
+        write failed, the habits are reloaded so the unsaved values are
+        dropped again, and the first error is raised.
+        """
+        error = None
+        for future in futures:
+            if future is None:
+                continue
+            try:
+                future.result()
+            except Exception as exc:
+                error = error or exc
+        if error is None:
+            return
+
+        with suppress(Exception):
+            # The writer keeps the same failure for its next flush; report it once
+            self.db.flush()
+        self.load_habits(lazy=not self.history_loaded)
+        raise error
+
+    def confirm_pending_writes(self):
+        """Confirm the writes interactive logs left in pending_writes, see confirm_writes."""
+        futures, self.pending_writes = self.pending_writes, []
+        self.confirm_writes(futures)
+
+    def log_habit_values(self, entries: list[tuple[int, int, int]]) -> Future | None:
+        """
+        Log many (habit_id, day, value) entries at once, e.g. to backfill missed days.
+
+        Every entry is validated before anything is written: the habit must
+        exist, the day must not lie in the future, and a weekly or monthly
+        habit is backfilled with at most one value per week or month. Values
+        logged live, e.g. several sport sessions in a week, may share a period.
+        Records are written in one batch and in-memory stores, plan progress
+        and cached analytics are updated only for the touched habits.
+        """
+        self.ensure_history()
         today = self._get_today_key()
+
+        batch_periods: set[tuple[int, int]] = set()
+        for habit_id, day, value in entries:
+            habit = self._get_habit_by_id(habit_id)
+            if not isinstance(value, int) or value < 0:
+                raise ValueError(f"Invalid value {value!r} for '{habit.name}'.")
+            if not 1 <= day <= today:
+                raise ValueError(f"Cannot log '{habit.name}' on a future day.")
+
+            period = utils.period_start(habit.periodicity, day)
+            if (habit_id, period) in batch_periods:
+                raise ValueError(
+                    f"'{habit.name}' is logged twice for the period of {date.fromordinal(day)}."
+                )
+            batch_periods.add((habit_id, period))
+            self._check_one_value_per_period(habit, day)
+
+        changed_progress = set()
+        for habit_id, day, value in entries:
+            habit = self._get_habit_by_id(habit_id)
+            previous_value = habit.records.get(day)
+            habit.records[day] = value
+            if self._track_plan_progress(habit_id, day, previous_value, value):
+                changed_progress.add(habit_id)
+
+        for habit_id in {habit_id for habit_id, _ in batch_periods}:
+            self._bump_habit_version(habit_id)
+        for habit_id in changed_progress:
+            self.db.save_plan_progress(self.plan_progress[habit_id])
+
+        return self.db.upsert_records(
+            [(day, habit_id, value) for habit_id, day, value in entries]
+        )
+
+    def log_completion(self, habit_id: int, ts: int | None = None) -> Future | None:
+        """
+        Log one occurrence of a habit at epoch seconds ts (default now).
+
+        The completion is stored with its timestamp and adds 1 to the value of
+        its day, so daily totals and time-of-day analytics stay consistent.
+        Both are written in one batch, and the returned Future covers both.
+        """
+        ts = int(time.time()) if ts is None else ts
+        try:
+            day = date.fromtimestamp(ts).toordinal()
+        except (OverflowError, OSError) as error:
+            raise ValueError(f"Invalid timestamp {ts}.") from error
         habit = self._get_habit_by_id(habit_id)
+        if day > self._get_today_key():
+            raise ValueError(f"Cannot log '{habit.name}' on a future day.")
+        if day != self._get_today_key():
+            # A lazy load only holds today's values
+            self.ensure_history()
 
-        # Try to find today's record in the habit
-        existing_record = habit.records.get(today)
+        value = habit.records.get(day, 0) + 1
+        self._set_value(habit, day, value)
 
-        if existing_record is not None:
-            # Update existing record in memory
-            habit.records[today] = value
-            # Update in database
-            self.db.update_record_value(today, habit_id, value)
-        else:
-            # Create a new record in memory
-            habit.records[today] = value
-            # Insert in database
-            self.db.create_record(today, habit_id, value)
+        timestamps = self.completions.get(habit_id)
+        if timestamps is not None:
+            # Completions usually arrive in time order and are appended
+            if not timestamps or timestamps[-1] <= ts:
+                timestamps.append(ts)
+            else:
+                timestamps.insert(bisect_right(timestamps, ts), ts)
+        return self.db.log_completion(habit_id, ts, day, value)
+
+    def get_completions(self, habit_id: int) -> array:
+        """Return the sorted completion timestamps of a habit, loading them once."""
+        timestamps = self.completions.get(habit_id)
+        if timestamps is None:
+            timestamps = self.completions[habit_id] = self.db.get_completions(habit_id)
+        return timestamps
+
+    def _track_plan_progress(
+        self, habit_id: int, day: int, previous_value: int | None, value: int
+    ) -> bool:
+        """Fold a logged value into the habit's plan progress in O(1); True if it changed."""
+        progress = self.plan_progress.get(habit_id)
+        target = self.plan_targets.get(habit_id, {}).get(day)
+
+        if progress is None or target is None or day < progress.start_day:
+            return False
+
+        if previous_value is not None:
+            progress = adherence.apply_logged_value(
+                progress, day, target, previous_value, sign=-1
+            )
+        progress = adherence.apply_logged_value(progress, day, target, value)
+
+        self.plan_progress[habit_id] = progress
+        return True
 
     def get_today_habit_value(self, habit_id: int) -> int:
         """Log a value for the habit with the given name."""
@@ -113,9 +420,163 @@ class HabitManager:
 
         return today_record if today_record is not None else 0
 
+    def get_record_history(
+        self, habit_id: int, n_days: int = constants.DEFAULT_TIME_RANGE_IN_DAYS
+    ) -> list[RecordEvent]:
+        """Return the values logged for a habit over the last n_days days, with when."""
+        today = self._get_today_key()
+        return self.db.get_record_history(habit_id, today - n_days + 1, today)
+
+    def get_habit_summaries(self) -> list[HabitSummary]:
+        """
+        Return today's value, record count, last logged day and current streak
+        of every habit in habit order, cached per habit version and day.
+        """
+        today = self._get_today_key()
+        if not self.history_loaded:
+            summaries = self.db.get_habit_summaries(today)
+            return [summaries[habit.id] for habit in self.habits]
+
+        return [
+            self.memoize("summary", habit, lambda h=habit: h.summary(today), today)
+            for habit in self.habits
+        ]
+
     def has_no_elimination_daily_logs(self) -> bool:
         return any(
             self.get_today_habit_value(habit.id) == 0
             for habit in self.habits
             if habit.habit_type == constants.HABIT_TYPE_ELIMINATION
         )
+
+    def save_reduction_plans(self, plans: list[ReductionPlan]):
+        """Persist reduction plans, replacing the future schedule of their habits."""
+        self.ensure_history()
+        self.db.save_plans(plans)
+        today = self._get_today_key()
+
+        for plan in plans:
+            # Mirror save_plans: earlier targets are kept, the rest is replaced
+            targets = {
+                day: target
+                for day, target in self.plan_targets.get(plan.habit_id, {}).items()
+                if day < plan.start_day
+            }
+            targets.update(
+                (plan.start_day + offset, target)
+                for offset, target in enumerate(plan.targets)
+            )
+            self.plan_targets[plan.habit_id] = targets
+
+            progress = adherence.progress_from_records(
+                plan.habit_id,
+                plan.start_day,
+                targets,
+                self._get_habit_by_id(plan.habit_id).records,
+                today,
+            )
+            self.plan_progress[plan.habit_id] = progress
+            self.db.save_plan_progress(progress)
+
+    def get_plan_progress(self, habit_id: int) -> PlanProgress | None:
+        """Return the stored adherence summary of a planned habit in O(1)."""
+        return self.plan_progress.get(habit_id)
+
+    def get_plan_adherence(self) -> list[PlanAdherence]:
+        """Return how well each planned habit followed its schedule up to today."""
+        return self.db.get_plan_adherence(self._get_today_key())
+
+    def set_unit_cost(
+        self, habit_id: int, unit_cost: float, effective_day: int | None = None
+    ):
+        """Set the unit cost of a habit from effective_day (default today) on."""
+        habit = self._get_habit_by_id(habit_id)
+        if not math.isfinite(unit_cost) or unit_cost < 0:
+            raise ValueError(
+                f"Unit cost must be a finite amount of 0 or more, got {unit_cost}."
+            )
+        effective_day = (
+            self._get_today_key() if effective_day is None else effective_day
+        )
+
+        self.db.set_unit_cost(habit.id, effective_day, unit_cost)
+        # Keep the in-memory price history sorted by effective day
+        index = bisect_left(habit.prices, effective_day, key=itemgetter(0))
+        if index < len(habit.prices) and habit.prices[index][0] == effective_day:
+            habit.prices[index] = (effective_day, unit_cost)
+        else:
+            habit.prices.insert(index, (effective_day, unit_cost))
+        self._bump_habit_version(habit.id)
+
+    def set_habit_goal(self, habit_id: int, goal: int | None):
+        """Set the value an establishment habit should reach per period; None removes it."""
+        habit = self._get_habit_by_id(habit_id)
+        if habit.habit_type != constants.HABIT_TYPE_ESTABLISHMENT:
+            raise ValueError(f"Habit '{habit.name}' is not an establishment habit.")
+        if goal is not None and goal <= 0:
+            raise ValueError(f"Goal must be positive, got {goal}.")
+
+        self.db.set_habit_goal(habit.id, goal)
+        if goal is None:
+            self.habit_goals.pop(habit.id, None)
+        else:
+            self.habit_goals[habit.id] = goal
+
+    def get_goal_progress(self) -> list[GoalProgress]:
+        """
+        Return how every habit with a goal reached it per period, in habit order.
+
+        Results are cached per habit version, goal and running period, so they
+        are recomputed only after a write or when a new period starts.
+        """
+        goal_habits = [habit for habit in self.habits if habit.id in self.habit_goals]
+        if not goal_habits:
+            return []
+
+        self.ensure_history()
+        today = self._get_today_key()
+        progress = []
+        for habit in goal_habits:
+            goal = self.habit_goals[habit.id]
+            progress.append(
+                self.memoize(
+                    "goal_progress",
+                    habit,
+                    lambda h=habit, g=goal: goals.evaluate_goal(
+                        h.id, h.periodicity, h.created.toordinal(), g, h.records, today
+                    ),
+                    goal,
+                    utils.period_index(habit.periodicity, today),
+                )
+            )
+        return progress
+
+    def get_current_goal_values(self) -> dict[int, int]:
+        """
+        Return the value logged so far in the running period of every habit with a goal.
+
+        Without the full history, only the records since each running period
+        started are read, so showing them does not load the history.
+        """
+        today = self._get_today_key()
+        values = {}
+        for habit in self.habits:
+            if habit.id not in self.habit_goals:
+                continue
+            start = utils.period_start(habit.periodicity, today)
+            records = (
+                habit.records
+                if self.history_loaded
+                else events.replay(self.db.get_record_history(habit.id, start, today))
+            )
+            values[habit.id] = sum(
+                records.get(day, 0) for day in range(start, today + 1)
+            )
+        return values
+
+    def get_cost_report(
+        self, n_days: int = constants.DEFAULT_TIME_RANGE_IN_DAYS
+    ) -> list[CostReport]:
+        """Return units, cost and savings per habit over the last n_days days."""
+        today = self._get_today_key()
+        return self.db.get_cost_report(today - n_days + 1, today)
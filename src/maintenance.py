@@ -0,0 +1,100 @@
+"""
+Maintenance of the SQLite file: free pages, planner statistics and checks.
+
+Deleting habits and compacting the event log leave free pages behind. New
+databases are created with auto_vacuum = INCREMENTAL, so free pages can be
+returned to the file system a chunk at a time with incremental_vacuum instead
+of rewriting the whole file; older files are converted by one full VACUUM.
+
+The helpers take a connection and run one short step each, so the Database
+can release its writer lock between steps and logging is never blocked for
+long.
+"""
+
+import sqlite3
+
+from src.models import StorageReport, TableSize
+
+# PRAGMA auto_vacuum values
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def incremental_vacuum_enabled(conn: sqlite3.Connection) -> bool:
+    return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection) -> int:
+    """
+    Switch an existing file to incremental auto-vacuum; returns the number of pages freed.
+
+    The VACUUM rewrites the whole file once, dropping every free page.
+    """
+    conn.commit()
+    before = conn.execute("PRAGMA page_count").fetchone()[0]
+    conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+    conn.execute("VACUUM")
+    return before - conn.execute("PRAGMA page_count").fetchone()[0]
+
+
+def vacuum_step(conn: sqlite3.Connection, max_pages: int) -> int:
+    """Return up to max_pages free pages to the file system; returns the number freed."""
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    # The pragma frees one page per statement step; execute() stops after the
+    # first step as no row is returned, executescript() runs it to completion
+    conn.executescript(f"PRAGMA incremental_vacuum({max_pages});")
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def update_statistics(conn: sqlite3.Connection):
+    """
+    Refresh the query planner statistics.
+
+    The first run analyzes every table; later runs use PRAGMA optimize, which
+    only re-analyzes tables whose statistics are missing or out of date.
+    """
+    analyzed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+    ).fetchone()
+    conn.execute("PRAGMA optimize" if analyzed else "ANALYZE")
+    conn.commit()
+
+
+def integrity_problems(conn: sqlite3.Connection, full: bool = False) -> list[str]:
+    """
+    Return the problems found in the file, empty when it is sound.
+
+    quick_check verifies the b-tree structure in about linear time; full adds
+    the slower index content checks of integrity_check.
+    """
+    pragma = "integrity_check" if full else "quick_check"
+    rows = [row[0] for row in conn.execute(f"PRAGMA {pragma}")]
+    return [] if rows == ["ok"] else rows
+
+
+def storage_report(conn: sqlite3.Connection) -> StorageReport:
+    """
+    Return the file size, free pages and per table and index page usage.
+
+    Per object sizes come from the dbstat virtual table; SQLite builds without
+    it only report the file totals.
+    """
+    page_size, page_count, freelist_count = (
+        conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+        for pragma in ("page_size", "page_count", "freelist_count")
+    )
+    try:
+        rows = conn.execute(
+            """SELECT s.name, COALESCE(m.type, 'table'), COUNT(*), SUM(s.pgsize), SUM(s.unused)
+            FROM dbstat s LEFT JOIN sqlite_master m ON m.name = s.name
+            GROUP BY s.name
+            ORDER BY SUM(s.pgsize) DESC"""
+        ).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+
+    return StorageReport(
+        page_size,
+        page_count,
+        freelist_count,
+        [TableSize(*row) for row in rows],
+    )
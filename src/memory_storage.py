@@ -0,0 +1,388 @@
+"""
+Pure in-memory storage engine.
+
+MemoryStorage implements the Storage protocol with dicts and lists and gives
+the same answers as the SQLite Database for every query, without SQL or disk
+I/O. Tests and benchmarks can run against it directly, and batch analytics
+can copy a database into it once with load_from and run every query there.
+
+Writes apply immediately; like a Database, the engine hands out copies of
+its records, so a HabitManager's in-memory state and the storage stay apart.
+"""
+
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import replace
+from datetime import date, datetime
+from itertools import count
+
+from src import constants
+from src.models import (
+    CostReport,
+    HabitModel,
+    HabitSummary,
+    PlanAdherence,
+    PlanProgress,
+    RecordEvent,
+    ReductionPlan,
+)
+from src.storage import Storage, sample_records
+
+
+class MemoryStorage:
+    """
+    Storage engine holding every table in dicts keyed by habit id.
+
+    Archived habits keep their data until purged, habit revisions count every
+    logged value and habit edit, and entering the context manager adds the
+    default habits with sample data unless default_data is False.
+    """
+
+    def __init__(self, default_data: bool = True):
+        self.default_data = default_data
+        # Habit rows as HabitModel without records, plus their archived day (0 = active)
+        self._habits: dict[int, HabitModel] = {}
+        self._archived: dict[int, int] = {}
+        self._records: dict[int, dict[int, int]] = {}
+        # {habit_id: {effective_day: unit_cost}}
+        self._prices: dict[int, dict[int, float]] = {}
+        # Logged values per habit in log order, and the seq of each habit's last event
+        self._history: dict[int, list[RecordEvent]] = {}
+        self._revisions: dict[int, int] = {}
+        self._plans: dict[int, dict[int, int]] = {}
+        self._goals: dict[int, int] = {}
+        self._plan_progress: dict[int, PlanProgress] = {}
+        self._completions: dict[int, array] = {}
+        self._habit_ids = count(1)
+        self._seq = count(1)
+
+    def __enter__(self):
+        if self.default_data and not self._habits:
+            self._add_default_data()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    @classmethod
+    def load_from(cls, source: Storage) -> "MemoryStorage":
+        """
+        Copy the active habits, records, prices, plans and goals of another engine.
+
+        Each habit starts with one revision; the event history is not copied.
+        """
+        storage = cls(default_data=False)
+        for habit in source.get_all_habits():
+            storage._habits[habit.id] = replace(habit, records={}, prices=[])
+            storage._archived[habit.id] = 0
+            storage._records[habit.id] = dict(habit.records)
+            storage._prices[habit.id] = dict(habit.prices)
+            storage._revisions[habit.id] = next(storage._seq)
+        storage._plans = source.get_plan_targets()
+        storage._plan_progress = source.get_plan_progress()
+        storage._goals = source.get_habit_goals()
+        storage._habit_ids = count(max(storage._habits, default=0) + 1)
+        return storage
+
+    def _add_default_data(self):
+        today = date.today()
+        for (
+            habit_id,
+            name,
+            description,
+            periodicity,
+            habit_type,
+        ) in constants.DEFAULT_HABITS:
+            self._insert_habit(habit_id, name, description, periodicity, habit_type)
+            if habit_id in constants.DEFAULT_UNIT_COSTS:
+                self.set_unit_cost(
+                    habit_id,
+                    constants.FIRST_PRICE_DAY,
+                    constants.DEFAULT_UNIT_COSTS[habit_id],
+                )
+            if habit_id in constants.DEFAULT_GOALS:
+                self.set_habit_goal(habit_id, constants.DEFAULT_GOALS[habit_id])
+            for day, value in sample_records(habit_id, periodicity, today):
+                self._log(day, habit_id, value, None)
+        self._habit_ids = count(max(self._habits) + 1)
+
+    def _insert_habit(
+        self,
+        habit_id: int,
+        name: str,
+        description: str,
+        periodicity: str,
+        habit_type: str,
+    ) -> HabitModel:
+        habit = HabitModel(
+            habit_id, name, description, periodicity, habit_type, datetime.now(), {}
+        )
+        self._habits[habit_id] = habit
+        self._archived[habit_id] = 0
+        self._records[habit_id] = {}
+        self._prices[habit_id] = {}
+        self._event(habit_id)
+        return habit
+
+    def _event(self, habit_id: int):
+        # Only the latest seq is kept, as the habit revision
+        self._revisions[habit_id] = next(self._seq)
+
+    def _log(self, day: int, habit_id: int, value: int, logged_at: int | None):
+        self._event(habit_id)
+        self._records[habit_id][day] = value
+        self._history.setdefault(habit_id, []).append(
+            RecordEvent(habit_id, day, value, logged_at)
+        )
+
+    def _check_name_is_free(self, name: str, habit_id: int | None = None):
+        # Same rule and error as the habits_active_name index of Database
+        if any(
+            self._habits[other].name == name
+            for other in self._active_ids()
+            if other != habit_id
+        ):
+            raise ValueError(f"Habit with name '{name}' already exists.")
+
+    def _active_ids(self) -> list[int]:
+        # In id order, like SQLite scans its rowid tables
+        return sorted(habit_id for habit_id, day in self._archived.items() if not day)
+
+    def get_all_habits(self, since_day: int | None = None) -> list[HabitModel]:
+        since_day = 0 if since_day is None else since_day
+        return [
+            replace(
+                self._habits[habit_id],
+                records={
+                    day: value
+                    for day, value in self._records[habit_id].items()
+                    if day >= since_day
+                },
+                prices=sorted(self._prices[habit_id].items()),
+            )
+            for habit_id in self._active_ids()
+        ]
+
+    def add_habit(
+        self, name: str, desc: str, periodicity: str, habit_type: str
+    ) -> HabitModel:
+        # Names are unique among active habits; archived ones keep theirs until purged
+        self._check_name_is_free(name)
+        habit = self._insert_habit(
+            next(self._habit_ids), name, desc, periodicity, habit_type
+        )
+        return replace(habit, records=[])
+
+    def update_habit(
+        self, habit_id: int, name: str, desc: str, periodicity: str, habit_type: str
+    ):
+        self._check_name_is_free(name, habit_id)
+        self._habits[habit_id] = replace(
+            self._habits[habit_id],
+            name=name,
+            description=desc,
+            periodicity=periodicity,
+            habit_type=habit_type,
+        )
+        self._event(habit_id)
+
+    def delete_habit(self, habit_id: int, day: int | None = None):
+        self._archived[habit_id] = date.today().toordinal() if day is None else day
+        self._event(habit_id)
+
+    def restore_habit(self, habit_id: int):
+        name = self._habits[habit_id].name
+        if any(self._habits[other].name == name for other in self._active_ids()):
+            raise ValueError(
+                "An active habit has the same name; rename it before restoring."
+            )
+        self._archived[habit_id] = 0
+        self._event(habit_id)
+
+    def get_archived_habits(self) -> list[tuple[int, str, int]]:
+        return [
+            (habit_id, self._habits[habit_id].name, day)
+            for habit_id, day in self._archived.items()
+            if day
+        ]
+
+    def purge_archived_habits(
+        self, archived_before: int, batch_size: int = constants.PURGE_BATCH_SIZE
+    ) -> int:
+        habit_ids = [
+            habit_id
+            for habit_id, day in self._archived.items()
+            if 0 < day < archived_before
+        ]
+        for habit_id in habit_ids:
+            self._purge_habit(habit_id)
+        return len(habit_ids)
+
+    def _purge_habit(self, habit_id: int):
+        for table in (
+            self._habits,
+            self._archived,
+            self._records,
+            self._prices,
+            self._history,
+            self._revisions,
+            self._plans,
+            self._plan_progress,
+            self._goals,
+            self._completions,
+        ):
+            table.pop(habit_id, None)
+
+    def upsert_record(self, day: int, habit_id: int, value: int) -> None:
+        self.upsert_records([(day, habit_id, value)])
+
+    def upsert_records(self, entries: list[tuple[int, int, int]]) -> None:
+        logged_at = int(time.time())
+        for day, habit_id, value in entries:
+            self._log(day, habit_id, value, logged_at)
+
+    def add_completions(self, entries: list[tuple[int, int]]) -> None:
+        for habit_id, ts in entries:
+            insort(self._completions.setdefault(habit_id, array("q")), ts)
+
+    def log_completion(self, habit_id: int, ts: int, day: int, value: int) -> None:
+        self.upsert_records([(day, habit_id, value)])
+        self.add_completions([(habit_id, ts)])
+
+    def get_completions(
+        self, habit_id: int, start_ts: int | None = None, end_ts: int | None = None
+    ) -> array:
+        timestamps = self._completions.get(habit_id, array("q"))
+        start = 0 if start_ts is None else bisect_left(timestamps, start_ts)
+        end = len(timestamps) if end_ts is None else bisect_left(timestamps, end_ts)
+        return timestamps[start:end]
+
+    def flush(self):
+        pass
+
+    def save_plans(self, plans: list[ReductionPlan]):
+        for plan in plans:
+            targets = self._plans.setdefault(plan.habit_id, {})
+            for day in [day for day in targets if day >= plan.start_day]:
+                del targets[day]
+            for offset, target in enumerate(plan.targets):
+                targets[plan.start_day + offset] = target
+
+    def get_plan_targets(self) -> dict[int, dict[int, int]]:
+        return {habit_id: dict(targets) for habit_id, targets in self._plans.items()}
+
+    def get_plan_adherence(self, until_day: int) -> list[PlanAdherence]:
+        adherence = []
+        for habit_id, targets in sorted(self._plans.items()):
+            if self._archived.get(habit_id):
+                continue
+            records = self._records.get(habit_id, {})
+            planned = [
+                (day, target) for day, target in targets.items() if day <= until_day
+            ]
+            logged = [
+                (records[day], target) for day, target in planned if day in records
+            ]
+            if planned:
+                adherence.append(
+                    PlanAdherence(
+                        habit_id,
+                        len(planned),
+                        len(logged),
+                        sum(value <= target for value, target in logged),
+                        sum(value > target for value, target in logged),
+                        sum(value - target for value, target in logged),
+                    )
+                )
+        return adherence
+
+    def get_plan_progress(self) -> dict[int, PlanProgress]:
+        return {
+            habit_id: replace(progress)
+            for habit_id, progress in self._plan_progress.items()
+        }
+
+    def save_plan_progress(self, progress: PlanProgress) -> None:
+        # Stored by value, as the caller keeps updating its own instance
+        self._plan_progress[progress.habit_id] = replace(progress)
+
+    def set_unit_cost(self, habit_id: int, effective_day: int, unit_cost: float):
+        # Prices are not events, as in the SQLite engine
+        self._prices[habit_id][effective_day] = unit_cost
+
+    def set_habit_goal(self, habit_id: int, goal: int | None):
+        if goal is None:
+            self._goals.pop(habit_id, None)
+        else:
+            self._goals[habit_id] = goal
+
+    def get_habit_goals(self) -> dict[int, int]:
+        return {
+            habit_id: goal
+            for habit_id, goal in self._goals.items()
+            if not self._archived.get(habit_id)
+        }
+
+    def get_cost_report(self, start_day: int, end_day: int) -> list[CostReport]:
+        reports = []
+        for habit_id in self._active_ids():
+            values = [
+                (day, value)
+                for day, value in self._records[habit_id].items()
+                if start_day <= day <= end_day
+            ]
+            if not values:
+                continue
+
+            price_days = sorted(self._prices[habit_id])
+            baseline = max(value for _, value in values)
+            cost = saved = 0.0
+            for day, value in values:
+                index = bisect_right(price_days, day)
+                unit_cost = (
+                    self._prices[habit_id][price_days[index - 1]] if index else 0
+                )
+                cost += value * unit_cost
+                saved += (baseline - value) * unit_cost
+            reports.append(
+                CostReport(
+                    habit_id,
+                    len(values),
+                    sum(value for _, value in values),
+                    baseline,
+                    cost,
+                    saved,
+                )
+            )
+        return reports
+
+    def get_habit_summaries(self, today: int) -> dict[int, HabitSummary]:
+        summaries = {}
+        for habit_id in self._active_ids():
+            records = self._records[habit_id]
+            last_day = max(records, default=None)
+            streak = 0
+            if last_day is not None and last_day >= today - 1:
+                while last_day - streak in records:
+                    streak += 1
+            summaries[habit_id] = HabitSummary(
+                habit_id, records.get(today, 0), len(records), last_day, streak
+            )
+        return summaries
+
+    def get_record_history(
+        self, habit_id: int, start_day: int, end_day: int
+    ) -> list[RecordEvent]:
+        return [
+            replace(event)
+            for event in self._history.get(habit_id, [])
+            if start_day <= event.day <= end_day
+        ]
+
+    def get_habit_revisions(self) -> dict[int, int]:
+        return {
+            habit_id: seq
+            for habit_id, seq in self._revisions.items()
+            if not self._archived.get(habit_id)
+        }
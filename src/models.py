@@ -1,15 +1,16 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class HabitRecordModel:
-    day: str
+    # Day number as returned by date.toordinal()
+    day: int
     habit_id: int
     value: int
 
 
-@dataclass
+@dataclass(slots=True)
 class HabitModel:
     id: int
     name: str
@@ -17,4 +18,139 @@ class HabitModel:
     periodicity: str
     habit_type: str
     created: datetime
-    records: list[HabitRecordModel]
+    # Either record models, or a ready-made {day: value} store when loaded from the DB
+    records: list[HabitRecordModel] | dict[int, int]
+    # Price history as (effective_day, unit_cost) pairs sorted by day
+    prices: list[tuple[int, float]] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class ReductionPlan:
+    habit_id: int
+    curve: str
+    # Day number of targets[0]; targets[i] applies to start_day + i
+    start_day: int
+    targets: list[int]
+
+
+@dataclass(slots=True)
+class PlanAdherence:
+    habit_id: int
+    planned_days: int
+    logged_days: int
+    days_on_plan: int
+    days_over_plan: int
+    total_deviation: int
+
+
+@dataclass(slots=True)
+class PlanProgress:
+    habit_id: int
+    start_day: int
+    logged_days: int = 0
+    days_over_plan: int = 0
+    cumulative_deviation: int = 0
+    # Least-squares sums over (day - start_day, value), kept for the quit projection
+    sum_x: int = 0
+    sum_y: int = 0
+    sum_xx: int = 0
+    sum_xy: int = 0
+    projected_quit_day: int | None = None
+
+
+@dataclass(slots=True)
+class CostReport:
+    habit_id: int
+    logged_days: int
+    units: int
+    # Highest daily value in the range, the reference for savings
+    baseline: int
+    cost: float
+    saved: float
+
+
+@dataclass(slots=True)
+class HabitSummary:
+    habit_id: int
+    today_value: int
+    total: int
+    last_day: int | None
+    # Consecutive logged days ending today, or yesterday while today is not logged
+    current_streak: int
+
+
+@dataclass(slots=True)
+class GoalProgress:
+    habit_id: int
+    # Value to reach in each daily, weekly or monthly period
+    goal: int
+    # Completed periods since the habit started, and how many reached the goal
+    periods: int
+    met: int
+    # Consecutive completed periods reaching the goal, ending with the last one
+    streak: int
+    # Value logged so far in the running period
+    current_value: int
+
+    @property
+    def rate(self) -> float:
+        return self.met / self.periods if self.periods else 0.0
+
+    @property
+    def current_met(self) -> bool:
+        return self.current_value >= self.goal
+
+
+@dataclass(slots=True)
+class RecordEvent:
+    habit_id: int
+    day: int
+    value: int
+    # Epoch seconds of the log, None for values logged before the event log existed
+    logged_at: int | None
+
+
+@dataclass(slots=True)
+class TableSize:
+    name: str
+    # "table" or "index"
+    kind: str
+    pages: int
+    size: int
+    # Bytes of its pages holding no data
+    unused: int
+
+    @property
+    def fragmentation(self) -> float:
+        return self.unused / self.size if self.size else 0.0
+
+
+@dataclass(slots=True)
+class StorageReport:
+    page_size: int
+    page_count: int
+    # Pages released by deletes and not yet returned to the file system
+    freelist_count: int
+    objects: list[TableSize]
+
+    @property
+    def file_size(self) -> int:
+        return self.page_size * self.page_count
+
+
+@dataclass(slots=True)
+class MaintenanceReport:
+    pages_freed: int
+    # Empty when the integrity check passed or was skipped
+    integrity_problems: list[str]
+    storage: StorageReport
+
+
+@dataclass(slots=True)
+class BackupResult:
+    path: str
+    # Database pages copied
+    pages: int
+    # Bytes written to path, after compression
+    size: int
+    sha256: str
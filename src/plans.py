@@ -0,0 +1,159 @@
+"""
+Reduction plan engine for elimination habits.
+
+This module computes tapering schedules that bring an elimination habit down
+to zero over a fixed horizon. Like the analytics module it is written in a
+functional style: every function is pure and plans are derived from the
+habit records without mutating them.
+
+Supported taper curves:
+- LINEAR: equal daily decrease from the starting value to zero
+- EXPONENTIAL: large early decreases that flatten towards zero
+- STEPWISE: one plateau per week, reaching zero in the last week
+- ADAPTIVE: follows the recent trend when it already decreases faster than linear
+
+Plans for all elimination habits are built in one pass: the taper profile of
+a curve (the fraction of the starting value kept on each day) is computed once
+and then scaled by each habit's starting value. Only the adaptive curve needs
+a per-habit rate, derived from a least-squares trend over recent records.
+"""
+
+from datetime import date
+from functools import reduce
+
+from src import constants, timeseries
+from src.habit_manager import Habit, HabitManager
+from src.models import ReductionPlan
+
+
+def taper_profile(curve: str, n_days: int) -> list[float]:
+    """
+    Return the fraction of the starting value kept on each day of a plan.
+
+    Args:
+        curve: One of constants.PLAN_CURVES except ADAPTIVE
+        n_days: Plan horizon in days
+
+    Returns:
+        List of n_days fractions starting at 1.0
+
+    Examples:
+        taper_profile(PLAN_CURVE_LINEAR, 4) -> [1.0, 0.75, 0.5, 0.25]
+        taper_profile(PLAN_CURVE_STEPWISE, 28) -> 7 x 1.0, 7 x 0.67, 7 x 0.33, 7 x 0.0
+    """
+    if curve == constants.PLAN_CURVE_LINEAR:
+        return [1 - i / n_days for i in range(n_days)]
+
+    if curve == constants.PLAN_CURVE_EXPONENTIAL:
+        # Halve every quarter of the horizon, rescaled so the last day reaches 0
+        decay = 0.5 ** (4 / n_days)
+        floor = decay ** (n_days - 1)
+        return [(decay**i - floor) / (1 - floor) for i in range(n_days)]
+
+    if curve == constants.PLAN_CURVE_STEPWISE:
+        n_steps = max(2, -(-n_days // 7))
+        return [1 - min(i // 7, n_steps - 1) / (n_steps - 1) for i in range(n_days)]
+
+    raise ValueError(f"Curve '{curve}' has no shared taper profile.")
+
+
+def starting_value(habit: Habit, today: int) -> int:
+    """
+    Return the value a plan starts from: today's value, else the latest in the past week.
+    """
+    return next(
+        (
+            habit.records[day]
+            for day in range(today, today - 7, -1)
+            if day in habit.records
+        ),
+        0,
+    )
+
+
+def recent_trend(habit: Habit, today: int) -> float:
+    """
+    Estimate the daily change of a habit with a least-squares fit over recent records.
+
+    Uses the records of the last PLAN_TREND_WINDOW_IN_DAYS days. Returns 0.0 when
+    fewer than two days were logged.
+
+    Examples:
+        Records of 10, 9, 8 on three consecutive days -> -1.0
+    """
+    points = list(
+        timeseries.series(
+            habit.records,
+            *timeseries.window(constants.PLAN_TREND_WINDOW_IN_DAYS, today),
+            fill=None,
+        )
+    )
+    if len(points) < 2:
+        return 0.0
+
+    n = len(points)
+    sum_x, sum_y, sum_xx, sum_xy = reduce(
+        lambda acc, p: (
+            acc[0] + p[0],
+            acc[1] + p[1],
+            acc[2] + p[0] * p[0],
+            acc[3] + p[0] * p[1],
+        ),
+        points,
+        (0, 0, 0, 0),
+    )
+    denominator = n * sum_xx - sum_x * sum_x
+    return (n * sum_xy - sum_x * sum_y) / denominator if denominator else 0.0
+
+
+def build_reduction_plans(
+    habit_manager: HabitManager,
+    curve: str = constants.PLAN_CURVE_LINEAR,
+    n_days: int = constants.DEFAULT_TIME_RANGE_IN_DAYS,
+    today: int | None = None,
+) -> list[ReductionPlan]:
+    """
+    Build a reduction plan for every elimination habit at once.
+
+    Args:
+        habit_manager: HabitManager instance containing all tracked habits
+        curve: Taper curve, one of constants.PLAN_CURVES
+        n_days: Plan horizon in days
+        today: Day number the plans start on (defaults to today)
+
+    Returns:
+        One ReductionPlan per elimination habit, in habit order
+
+    Examples:
+        With 14 cigarettes logged today and the linear curve over 28 days:
+        targets start [14, 14, 13, 12, 12, ...] and approach 0 on the last day
+    """
+    if curve not in constants.PLAN_CURVES:
+        raise ValueError(f"Unknown plan curve '{curve}'.")
+
+    today = date.today().toordinal() if today is None else today
+    habits = [
+        h
+        for h in habit_manager.habits
+        if h.habit_type == constants.HABIT_TYPE_ELIMINATION
+    ]
+    starts = [starting_value(habit, today) for habit in habits]
+
+    if curve == constants.PLAN_CURVE_ADAPTIVE:
+        # Never slower than linear; steeper when the user already reduces faster
+        rates = [
+            max(start / n_days, -recent_trend(habit, today))
+            for habit, start in zip(habits, starts)
+        ]
+        schedules = [
+            [max(0, round(start - rate * i)) for i in range(n_days)]
+            for start, rate in zip(starts, rates)
+        ]
+    else:
+        profile = taper_profile(curve, n_days)
+        schedules = [[max(0, round(start * p)) for p in profile] for start in starts]
+
+    return [
+        ReductionPlan(habit.id, curve, today, targets)
+        for habit, targets in zip(habits, schedules)
+    ]
@@ -0,0 +1,56 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+class ReadConnectionPool:
+    """
+    Fixed-size pool of read-only SQLite connections shareable across threads.
+
+    Connections are opened lazily, up to size, in read-only URI mode. With the
+    database in WAL journal mode, readers see the last committed state and never
+    block the writer connection, so analytics can run in parallel with logging.
+    """
+
+    def __init__(self, path: str, size: int = 4):
+        if size <= 0:
+            raise ValueError("Pool size must be a positive integer.")
+        self.uri = f"{Path(path).resolve().as_uri()}?mode=ro"
+        self.size = size
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._opened: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection, blocking while all of them are in use."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                conn = self._open() if len(self._opened) < self.size else None
+                if conn is not None:
+                    self._opened.append(conn)
+            if conn is None:
+                conn = self._idle.get()
+
+        try:
+            yield conn
+        finally:
+            # End the implicit read transaction so the next checkout sees new commits
+            conn.rollback()
+            self._idle.put(conn)
+
+    def close(self):
+        with self._lock:
+            for conn in self._opened:
+                conn.close()
+            self._opened.clear()
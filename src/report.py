@@ -0,0 +1,232 @@
+"""
+Self-contained HTML report of every habit.
+
+The report holds the dashboard, longest streaks, weekly stats, reduction plans
+and an inline SVG chart of each habit's whole history in a single HTML file
+without external assets, built from one pass over the loaded habits.
+
+Habit sections are the expensive part. Each one is stored together with the
+revision of its habit (the seq of its latest event) in a cache file next to the
+report, and the next report re-renders only the habits logged or edited since;
+the remaining sections are small and rebuilt every time.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import date
+from html import escape
+
+from src import analytics, plans, timeseries
+from src.habit_manager import Habit, HabitManager
+
+# Bumped whenever the section markup changes, so older cache files are ignored
+CACHE_FORMAT = 1
+
+CHART_WIDTH = 640
+CHART_HEIGHT = 160
+CHART_PADDING = 24
+
+# Days of each reduction plan shown in the report
+PLAN_PREVIEW_DAYS = 7
+
+STYLE = """body { font-family: sans-serif; margin: 2em auto; max-width: 720px; color: #222; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { border-bottom: 1px solid #ddd; padding: 4px 10px; text-align: left; }
+section.habit { border-top: 2px solid #1f77b4; margin-top: 2em; }
+svg text { font-size: 11px; fill: #555; }"""
+
+
+@dataclass
+class ReportStats:
+    """Number of habit sections rendered anew and reused from the cache."""
+
+    rendered: int
+    reused: int
+
+
+def svg_chart(points: list[tuple[int, float]]) -> str:
+    """
+    Return an inline SVG line chart of (day, value) points.
+
+    The y axis starts at zero and the first and last dates label the x axis.
+
+    Examples:
+        [(day, 5), (day + 1, 0)] -> a falling line from 5 to 0
+    """
+    first_day, last_day = points[0][0], points[-1][0]
+    top = max(max(value for _, value in points), 1)
+    plot_width = CHART_WIDTH - 2 * CHART_PADDING
+    plot_height = CHART_HEIGHT - 2 * CHART_PADDING
+    day_span = max(last_day - first_day, 1)
+
+    coordinates = " ".join(
+        f"{CHART_PADDING + (day - first_day) * plot_width / day_span:.1f},"
+        f"{CHART_PADDING + (1 - value / top) * plot_height:.1f}"
+        for day, value in points
+    )
+    bottom = CHART_HEIGHT - CHART_PADDING
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{CHART_WIDTH}" height="{CHART_HEIGHT}" '
+        f'viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}">'
+        f'<line x1="{CHART_PADDING}" y1="{bottom}" x2="{CHART_WIDTH - CHART_PADDING}" y2="{bottom}" stroke="#999"/>'
+        f'<polyline fill="none" stroke="#1f77b4" stroke-width="1.5" points="{coordinates}"/>'
+        f'<text x="{CHART_PADDING}" y="{CHART_PADDING - 8}">{top:g}</text>'
+        f'<text x="{CHART_PADDING}" y="{CHART_HEIGHT - 6}">{date.fromordinal(first_day)}</text>'
+        f'<text x="{CHART_WIDTH - CHART_PADDING}" y="{CHART_HEIGHT - 6}" text-anchor="end">'
+        f"{date.fromordinal(last_day)}</text>"
+        "</svg>"
+    )
+
+
+def render_habit(habit: Habit, streak: int) -> str:
+    """
+    Return the HTML section of a habit: its settings, totals and all-time chart.
+
+    The chart ends on the last logged day rather than today, so the section
+    only changes when the habit itself does.
+    """
+    header = (
+        f'<section class="habit"><h2>{escape(habit.name)}</h2>'
+        f"<p>{escape(habit.description)}</p>"
+        f"<p>{habit.periodicity.lower()} {habit.habit_type.lower()} habit, "
+        f"longest streak {streak} days</p>"
+    )
+    if not habit.records:
+        return header + "<p>No records yet.</p></section>"
+
+    first_day, last_day = min(habit.records), max(habit.records)
+    resolution, points = timeseries.chart_points(habit.records, first_day, last_day)
+    return (
+        header
+        + f"<p>{len(habit.records)} days logged from {date.fromordinal(first_day)} "
+        f"to {date.fromordinal(last_day)}, total {sum(habit.records.values())}</p>"
+        + f"<p>History ({resolution})</p>"
+        + svg_chart(points)
+        + "</section>"
+    )
+
+
+def _table(headers: list[str], rows: list[list]) -> str:
+    head = "".join(f"<th>{escape(str(header))}</th>" for header in headers)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{escape(str(cell))}</td>" for cell in row) + "</tr>"
+        for row in rows
+    )
+    return f"<table><tr>{head}</tr>{body}</table>"
+
+
+def _load_cache(cache_path: str) -> dict[str, list]:
+    try:
+        with open(cache_path, encoding="utf-8") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return cache.get("habits", {}) if cache.get("format") == CACHE_FORMAT else {}
+
+
+def _write_atomic(path: str, text: str):
+    # Readers of the report never see a half-written file
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(f"{path}.tmp", path)
+
+
+def write_report(
+    habit_manager: HabitManager, path: str, today: int | None = None
+) -> ReportStats:
+    """
+    Write the HTML report of all habits to path, reusing unchanged habit sections.
+
+    Habit sections and their longest streaks are cached in path + ".cache.json"
+    under the habit revision from Database.get_habit_revisions.
+
+    Args:
+        habit_manager: HabitManager whose habits are reported
+        path: Output HTML file
+        today: Day number the dashboard and plans refer to (defaults to today)
+
+    Returns:
+        ReportStats with the number of habit sections rendered and reused
+
+    Examples:
+        Reporting twice without logging anything renders every habit section
+        once; the second report reuses all of them.
+    """
+    today = date.today().toordinal() if today is None else today
+    habit_manager.ensure_history()
+    cache_path = f"{path}.cache.json"
+    cached = _load_cache(cache_path)
+    revisions = habit_manager.db.get_habit_revisions()
+
+    # Sections: {habit_id: [revision, streak, html]}
+    sections: dict[str, list] = {}
+    stats = ReportStats(rendered=0, reused=0)
+    for habit in habit_manager.habits:
+        key, revision = str(habit.id), revisions.get(habit.id, 0)
+        entry = cached.get(key)
+        if entry is not None and entry[0] == revision:
+            stats.reused += 1
+        else:
+            streak = analytics.longest_run_streak_for_habit(habit)
+            entry = [revision, streak, render_habit(habit, streak)]
+            stats.rendered += 1
+        sections[key] = entry
+
+    names = {habit.id: habit.name for habit in habit_manager.habits}
+    dashboard = _table(
+        ["Habit", "Today", "Days logged", "Last logged", "Current streak"],
+        [
+            [
+                habit.name,
+                summary.today_value,
+                summary.total,
+                date.fromordinal(summary.last_day) if summary.last_day else "never",
+                summary.current_streak,
+            ]
+            for habit, summary in zip(
+                habit_manager.habits, habit_manager.get_habit_summaries()
+            )
+        ],
+    )
+    streaks = _table(
+        ["Habit", "Longest streak"],
+        [[habit.name, sections[str(habit.id)][1]] for habit in habit_manager.habits],
+    )
+
+    weekly_stats = analytics.cached_weekly_cigarettes_avoided_and_money_saved(
+        habit_manager
+    )
+    weekly = (
+        f"<p>From {weekly_stats.start_date} to {weekly_stats.end_date} you avoided "
+        f"{weekly_stats.avoided} cigarettes vs {weekly_stats.initial}/day, smoked "
+        f"{weekly_stats.spent} and saved {weekly_stats.money_saved:.2f} €.</p>"
+        if weekly_stats
+        else "<p>No data for 'Cigarettes Smoked'.</p>"
+    )
+
+    reduction_plans = plans.build_reduction_plans(habit_manager, today=today)
+    plan_table = _table(
+        ["Habit"]
+        + [str(date.fromordinal(today + i)) for i in range(PLAN_PREVIEW_DAYS)],
+        [
+            [names[plan.habit_id]] + plan.targets[:PLAN_PREVIEW_DAYS]
+            for plan in reduction_plans
+        ],
+    )
+
+    report = (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        f"<title>Habit report {date.fromordinal(today)}</title>"
+        f"<style>{STYLE}</style></head><body>"
+        f"<h1>Habit report {date.fromordinal(today)}</h1>"
+        f"<h2>Dashboard</h2>{dashboard}"
+        f"<h2>Longest streaks</h2>{streaks}"
+        f"<h2>Weekly stats</h2>{weekly}"
+        f"<h2>Reduction plans (next {PLAN_PREVIEW_DAYS} days)</h2>{plan_table}"
+        + "".join(entry[2] for entry in sections.values())
+        + "</body></html>\n"
+    )
+    _write_atomic(path, report)
+    _write_atomic(cache_path, json.dumps({"format": CACHE_FORMAT, "habits": sections}))
+    return stats
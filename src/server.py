@@ -0,0 +1,323 @@
+"""
+Local HTTP JSON API over a shared HabitManager.
+
+The server uses the standard library ThreadingHTTPServer with HTTP/1.1 so
+clients can keep connections alive between requests. A single HabitManager is
+shared by all request threads and guarded by a lock; its analytics cache stays
+warm across requests, so repeated reads only recompute habits written since.
+
+Endpoints:
+    GET  /habits                  all habits with today's value, record count, last day and streak
+    POST /habits                  create a habit from a JSON body
+    POST /habits/<id>/log         log today's value: {"value": <int>}
+    GET  /habits/<id>/history     values logged over ?days=<n> (default 28) with their time
+    POST /habits/<id>/completions log one occurrence now, or at {"ts": <epoch seconds>}
+    GET  /habits/<id>/completions counts over ?days=<n> ?by=hour|weekday|<seconds> (default hour)
+    POST /habits/<id>/goal        set the value to reach per period: {"goal": <int>}, null removes it
+    GET  /streaks                 longest streak overall and per habit
+    GET  /stats/weekly            weekly cigarette stats (null without data)
+    GET  /plans?curve=<curve>     reduction plans for elimination habits (default LINEAR)
+    GET  /costs?days=<n>          units, cost and savings per priced habit (default 28 days)
+    GET  /goals                   goal completion rate, streak and running period value per habit
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from datetime import date, datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+from urllib.parse import parse_qsl, urlsplit
+
+from src import analytics, completions, constants, plans
+from src.habit_manager import HabitManager
+
+
+# SQLite stores integers as signed 64-bit values; logged values, times and
+# goals are never negative
+INTEGER_RANGE = range(0, 2**63)
+HABIT_TYPES = (constants.HABIT_TYPE_ELIMINATION, constants.HABIT_TYPE_ESTABLISHMENT)
+
+
+class NotFound(LookupError):
+    pass
+
+
+def _json_default(value: Any):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _require_habit(habit_manager: HabitManager, habit_id: str):
+    habit = habit_manager.find_habit(int(habit_id))
+    if habit is None:
+        raise NotFound(f"Habit with id {habit_id} not found.")
+    return habit
+
+
+def _integer(body: dict, name: str) -> int:
+    # JSON true, 2.9 and "3" are not integers; bool is a subclass of int
+    value = body[name]
+    if type(value) is not int:
+        raise TypeError(f"{name} must be an integer, got {json.dumps(value)}.")
+    if value not in INTEGER_RANGE:
+        raise ValueError(f"{name} {value} is out of range.")
+    return value
+
+
+def _positive_parameter(body: dict, name: str, default: int) -> int:
+    # Query string parameters arrive as strings, JSON body ones as numbers
+    value = body.get(name, default)
+    if isinstance(value, str) and value.isdecimal():
+        value = int(value)
+    if type(value) is not int or value <= 0 or value not in INTEGER_RANGE:
+        raise ValueError(f"{name} must be a positive integer.")
+    return value
+
+
+def _choice(body: dict, name: str, choices) -> str:
+    value = body[name]
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}.")
+    return value
+
+
+# Route handlers: (habit_manager, *path_groups, body) -> (status, payload)
+# body holds the JSON request body merged with the query string parameters
+
+
+def list_habits(habit_manager: HabitManager, _body: dict):
+    return HTTPStatus.OK, [
+        {
+            "id": habit.id,
+            "name": habit.name,
+            "description": habit.description,
+            "periodicity": habit.periodicity,
+            "habit_type": habit.habit_type,
+            "created": habit.created,
+            "today": summary.today_value,
+            "total": summary.total,
+            "last_day": (
+                date.fromordinal(summary.last_day) if summary.last_day else None
+            ),
+            "current_streak": summary.current_streak,
+        }
+        for habit, summary in zip(
+            habit_manager.habits, habit_manager.get_habit_summaries()
+        )
+    ]
+
+
+def create_habit(habit_manager: HabitManager, body: dict):
+    if not isinstance(body["name"], str) or not body["name"].strip():
+        raise ValueError("name must be a non-empty string.")
+    habit_manager.add_habit(
+        body["name"],
+        body.get("description", ""),
+        _choice(body, "periodicity", tuple(constants.PERIOD_NAMES)),
+        _choice(body, "habit_type", HABIT_TYPES),
+    )
+    return HTTPStatus.CREATED, {"name": body["name"]}
+
+
+def log_habit(habit_manager: HabitManager, habit_id: str, body: dict):
+    habit = _require_habit(habit_manager, habit_id)
+    value = _integer(body, "value")
+    habit_manager.confirm_write(habit_manager.log_today_habit(habit.id, value))
+    return HTTPStatus.OK, {"habit_id": habit.id, "day": date.today(), "value": value}
+
+
+def get_history(habit_manager: HabitManager, habit_id: str, body: dict):
+    habit = _require_habit(habit_manager, habit_id)
+    n_days = _positive_parameter(body, "days", constants.DEFAULT_TIME_RANGE_IN_DAYS)
+    return HTTPStatus.OK, [
+        {
+            "day": date.fromordinal(event.day),
+            "value": event.value,
+            "logged_at": (
+                datetime.fromtimestamp(event.logged_at)
+                if event.logged_at is not None
+                else None
+            ),
+        }
+        for event in habit_manager.get_record_history(habit.id, n_days)
+    ]
+
+
+def log_completion(habit_manager: HabitManager, habit_id: str, body: dict):
+    habit = _require_habit(habit_manager, habit_id)
+    ts = _integer(body, "ts") if "ts" in body else None
+    habit_manager.confirm_write(habit_manager.log_completion(habit.id, ts))
+    return HTTPStatus.CREATED, {
+        "habit_id": habit.id,
+        "today": habit_manager.get_today_habit_value(habit.id),
+    }
+
+
+def get_completion_counts(habit_manager: HabitManager, habit_id: str, body: dict):
+    habit = _require_habit(habit_manager, habit_id)
+    n_days = _positive_parameter(body, "days", constants.DEFAULT_TIME_RANGE_IN_DAYS)
+    by = body.get("by", "hour")
+    offset = completions.local_utc_offset
+    timestamps = completions.in_range(
+        habit_manager.get_completions(habit.id),
+        int(time.time()) - n_days * completions.SECONDS_PER_DAY,
+    )
+
+    if by == "hour":
+        return HTTPStatus.OK, completions.count_by_hour(timestamps, offset)
+    if by == "weekday":
+        return HTTPStatus.OK, completions.count_by_weekday(timestamps, offset)
+    return HTTPStatus.OK, {
+        str(bucket): count
+        for bucket, count in completions.count_by_interval(
+            timestamps, _positive_parameter(body, "by", 0), offset
+        ).items()
+    }
+
+
+def set_goal(habit_manager: HabitManager, habit_id: str, body: dict):
+    habit = _require_habit(habit_manager, habit_id)
+    goal = None if body["goal"] is None else _integer(body, "goal")
+    habit_manager.set_habit_goal(habit.id, goal)
+    return HTTPStatus.OK, {"habit_id": habit.id, "goal": goal}
+
+
+def get_goals(habit_manager: HabitManager, _body: dict):
+    return HTTPStatus.OK, [
+        {**asdict(progress), "rate": progress.rate}
+        for progress in habit_manager.get_goal_progress()
+    ]
+
+
+def get_streaks(habit_manager: HabitManager, _body: dict):
+    streaks = analytics.cached_longest_run_streaks(habit_manager)
+    return HTTPStatus.OK, {
+        "all": max(streaks.values(), default=0),
+        "habits": {str(habit_id): streak for habit_id, streak in streaks.items()},
+    }
+
+
+def get_weekly_stats(habit_manager: HabitManager, _body: dict):
+    stats = analytics.cached_weekly_cigarettes_avoided_and_money_saved(habit_manager)
+    return HTTPStatus.OK, asdict(stats) if stats else None
+
+
+def get_plans(habit_manager: HabitManager, body: dict):
+    names = {habit.id: habit.name for habit in habit_manager.habits}
+    reduction_plans = plans.build_reduction_plans(
+        habit_manager, body.get("curve", constants.PLAN_CURVE_LINEAR).upper()
+    )
+    return HTTPStatus.OK, {
+        names[plan.habit_id]: plan.targets for plan in reduction_plans
+    }
+
+
+def get_costs(habit_manager: HabitManager, body: dict):
+    n_days = _positive_parameter(body, "days", constants.DEFAULT_TIME_RANGE_IN_DAYS)
+    return HTTPStatus.OK, [
+        asdict(report) for report in habit_manager.get_cost_report(n_days)
+    ]
+
+
+ROUTES: list[tuple[str, re.Pattern, Callable[..., tuple[HTTPStatus, Any]]]] = [
+    ("GET", re.compile(r"/habits"), list_habits),
+    ("POST", re.compile(r"/habits"), create_habit),
+    ("POST", re.compile(r"/habits/(\d+)/log"), log_habit),
+    ("GET", re.compile(r"/habits/(\d+)/history"), get_history),
+    ("POST", re.compile(r"/habits/(\d+)/completions"), log_completion),
+    ("GET", re.compile(r"/habits/(\d+)/completions"), get_completion_counts),
+    ("POST", re.compile(r"/habits/(\d+)/goal"), set_goal),
+    ("GET", re.compile(r"/streaks"), get_streaks),
+    ("GET", re.compile(r"/stats/weekly"), get_weekly_stats),
+    ("GET", re.compile(r"/plans"), get_plans),
+    ("GET", re.compile(r"/costs"), get_costs),
+    ("GET", re.compile(r"/goals"), get_goals),
+]
+
+
+class TrackerHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], habit_manager: HabitManager):
+        super().__init__(address, TrackerRequestHandler)
+        self.habit_manager = habit_manager
+        self.lock = threading.Lock()
+
+
+class TrackerRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive as long as every response has a length
+    protocol_version = "HTTP/1.1"
+    # Small JSON responses on a kept-alive socket stall on Nagle + delayed ACK
+    disable_nagle_algorithm = True
+    server: TrackerHTTPServer
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _dispatch(self, method: str):
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/") or "/"
+
+        try:
+            body = {**self._read_body(), **dict(parse_qsl(url.query))}
+            route = next(
+                (
+                    (handler, match.groups())
+                    for route_method, pattern, handler in ROUTES
+                    if route_method == method and (match := pattern.fullmatch(path))
+                ),
+                None,
+            )
+            if route is None:
+                raise NotFound(f"No route for {method} {path}.")
+
+            handler, groups = route
+            with self.server.lock:
+                status, payload = handler(self.server.habit_manager, *groups, body)
+        except NotFound as error:
+            status, payload = HTTPStatus.NOT_FOUND, {"error": str(error)}
+        except (KeyError, TypeError, ValueError, OverflowError) as error:
+            status, payload = HTTPStatus.BAD_REQUEST, {"error": str(error)}
+        except sqlite3.IntegrityError as error:
+            status, payload = HTTPStatus.CONFLICT, {"error": str(error)}
+        except (sqlite3.Error, RuntimeError) as error:
+            # Storage failures, e.g. a locked database or a stopped writer
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(error)}
+
+        self._send_json(status, payload)
+
+    def _send_json(self, status: HTTPStatus, payload: Any):
+        data = json.dumps(payload, default=_json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(habit_manager: HabitManager, host: str = "127.0.0.1", port: int = 8000):
+    """Serve the JSON API until interrupted."""
+    with TrackerHTTPServer((host, port), habit_manager) as server:
+        print(f"Serving habit tracker API on http://{host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,148 @@
+"""
+Binary snapshot of every habit with its records and price history.
+
+Loading habits from SQLite costs one row object and one tuple per record. A
+snapshot stores the same data as packed arrays in a single file, so a cold
+start reads it in one call and builds each {day: value} store straight from
+two arrays.
+
+Snapshots carry the database data generation they were taken at and the
+event log seq their records are compacted up to. The generation is bumped by
+triggers on every change to habits and prices, so a snapshot whose
+generation differs from the database's is stale and is ignored. Logged
+values only move the compacted seq: the database replays the few events
+logged since the snapshot onto it instead of loading everything again.
+
+Layout, little-endian:
+    header  MAGIC, FORMAT (u32), generation (u64), compacted seq (u64), habit count (u32)
+    habit   id (i64), record count (u32), price count (u32),
+            name, description, periodicity, habit_type, created (u32 length + UTF-8 each),
+            record days (i64 x n), record values (i64 x n),
+            price days (i64 x n), unit costs (f64 x n)
+"""
+
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime
+
+from src.models import HabitModel
+
+MAGIC = b"HTSN"
+FORMAT = 2
+
+_HEADER = struct.Struct("<4sIQQI")
+_HABIT = struct.Struct("<qII")
+_LENGTH = struct.Struct("<I")
+
+
+def _native(values: array) -> array:
+    # The file is little-endian whatever the platform
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _pack_text(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return _LENGTH.pack(len(data)) + data
+
+
+def write_snapshot(
+    path: str, generation: int, compacted_seq: int, habits: list[HabitModel]
+):
+    """
+    Write habits with their {day: value} records and prices to path.
+
+    The file is replaced atomically, so a reader never sees a partial snapshot.
+    """
+    chunks = [_HEADER.pack(MAGIC, FORMAT, generation, compacted_seq, len(habits))]
+    for habit in habits:
+        records = habit.records
+        chunks.append(_HABIT.pack(habit.id, len(records), len(habit.prices)))
+        for text in (
+            habit.name,
+            habit.description,
+            habit.periodicity,
+            habit.habit_type,
+            habit.created.isoformat(),
+        ):
+            chunks.append(_pack_text(text))
+        chunks.append(_native(array("q", records.keys())).tobytes())
+        chunks.append(_native(array("q", records.values())).tobytes())
+        chunks.append(_native(array("q", (day for day, _ in habit.prices))).tobytes())
+        chunks.append(_native(array("d", (cost for _, cost in habit.prices))).tobytes())
+
+    with open(f"{path}.tmp", "wb") as file:
+        file.write(b"".join(chunks))
+    os.replace(f"{path}.tmp", path)
+
+
+def read_snapshot(path: str, generation: int) -> tuple[list[HabitModel], int] | None:
+    """
+    Return the habits stored in path with their compacted event seq, or None
+    when the file is missing, unreadable or of another generation.
+
+    Examples:
+        A snapshot taken at generation 7 is returned while the database is
+        still at generation 7, and ignored once a habit or price changed since.
+    """
+    try:
+        with open(path, "rb") as file:
+            data = memoryview(file.read())
+        magic, file_format, file_generation, compacted_seq, n_habits = (
+            _HEADER.unpack_from(data)
+        )
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC or file_format != FORMAT or file_generation != generation:
+        return None
+
+    offset = _HEADER.size
+    habits = []
+    try:
+        for _ in range(n_habits):
+            habit_id, n_records, n_prices = _HABIT.unpack_from(data, offset)
+            offset += _HABIT.size
+
+            texts = []
+            for _ in range(5):
+                (length,) = _LENGTH.unpack_from(data, offset)
+                offset += _LENGTH.size
+                end = offset + length
+                texts.append(str(data[offset:end], "utf-8"))
+                offset = end
+
+            columns = []
+            for typecode, count in (
+                ("q", n_records),
+                ("q", n_records),
+                ("q", n_prices),
+                ("d", n_prices),
+            ):
+                column = array(typecode)
+                end = offset + count * column.itemsize
+                column.frombytes(data[offset:end])
+                columns.append(_native(column))
+                offset = end
+
+            days, values, price_days, unit_costs = columns
+            name, description, periodicity, habit_type, created = texts
+            habits.append(
+                HabitModel(
+                    habit_id,
+                    name,
+                    description,
+                    periodicity,
+                    habit_type,
+                    datetime.fromisoformat(created),
+                    dict(zip(days, values)),
+                    list(zip(price_days, unit_costs)),
+                )
+            )
+    except (struct.error, ValueError):
+        return None
+
+    # A truncated or padded file is as unusable as a stale one
+    return (habits, compacted_seq) if offset == len(data) else None
@@ -0,0 +1,122 @@
+"""
+Storage engine interface of the habit tracker.
+
+HabitManager, the report and the HTTP API only talk to storage through the
+Storage protocol below. Two engines implement it:
+
+- Database (src/db.py): SQLite, on a file or on ":memory:"
+- MemoryStorage (src/memory_storage.py): plain dicts and lists, no SQL at all
+
+Engines are used as context managers: entering opens the storage and adds
+the default habits with sample data to an empty one, exiting flushes it.
+"""
+
+import random
+from datetime import date, timedelta
+from array import array
+from concurrent.futures import Future
+from typing import Protocol, runtime_checkable
+
+from src import constants, utils
+from src.models import (
+    CostReport,
+    HabitModel,
+    HabitSummary,
+    PlanAdherence,
+    PlanProgress,
+    RecordEvent,
+    ReductionPlan,
+)
+
+
+@runtime_checkable
+class Storage(Protocol):
+    def __enter__(self): ...
+
+    def __exit__(self, exc_type, exc_val, exc_tb): ...
+
+    def get_all_habits(self, since_day: int | None = None) -> list[HabitModel]: ...
+
+    def add_habit(
+        self, name: str, desc: str, periodicity: str, habit_type: str
+    ) -> HabitModel: ...
+
+    def update_habit(
+        self, habit_id: int, name: str, desc: str, periodicity: str, habit_type: str
+    ): ...
+
+    def delete_habit(self, habit_id: int, day: int | None = None): ...
+
+    def restore_habit(self, habit_id: int): ...
+
+    def get_archived_habits(self) -> list[tuple[int, str, int]]: ...
+
+    def purge_archived_habits(
+        self, archived_before: int, batch_size: int = constants.PURGE_BATCH_SIZE
+    ) -> int: ...
+
+    def upsert_record(self, day: int, habit_id: int, value: int) -> Future | None: ...
+
+    def upsert_records(self, entries: list[tuple[int, int, int]]) -> Future | None: ...
+
+    def add_completions(self, entries: list[tuple[int, int]]) -> Future | None: ...
+
+    def log_completion(
+        self, habit_id: int, ts: int, day: int, value: int
+    ) -> Future | None: ...
+
+    def get_completions(
+        self, habit_id: int, start_ts: int | None = None, end_ts: int | None = None
+    ) -> array: ...
+
+    def flush(self): ...
+
+    def save_plans(self, plans: list[ReductionPlan]): ...
+
+    def get_plan_targets(self) -> dict[int, dict[int, int]]: ...
+
+    def get_plan_adherence(self, until_day: int) -> list[PlanAdherence]: ...
+
+    def get_plan_progress(self) -> dict[int, PlanProgress]: ...
+
+    def save_plan_progress(self, progress: PlanProgress) -> Future | None: ...
+
+    def set_unit_cost(self, habit_id: int, effective_day: int, unit_cost: float): ...
+
+    def set_habit_goal(self, habit_id: int, goal: int | None): ...
+
+    def get_habit_goals(self) -> dict[int, int]: ...
+
+    def get_cost_report(self, start_day: int, end_day: int) -> list[CostReport]: ...
+
+    def get_habit_summaries(self, today: int) -> dict[int, HabitSummary]: ...
+
+    def get_record_history(
+        self, habit_id: int, start_day: int, end_day: int
+    ) -> list[RecordEvent]: ...
+
+    def get_habit_revisions(self) -> dict[int, int]: ...
+
+
+def sample_records(
+    habit_id: int, periodicity: str, today: date
+) -> list[tuple[int, int]]:
+    """
+    Return random (day, value) sample records of a default habit before today.
+
+    Daily habits get a value on each of the last DEFAULT_TIME_RANGE_IN_DAYS
+    days, weekly habits four random days and monthly habits one.
+    """
+    n_days = constants.DEFAULT_TIME_RANGE_IN_DAYS
+
+    if periodicity == constants.PERIODICITY_MONTHLY:
+        return [(utils.get_random_previous_day(today, n_days), 1)]
+
+    if periodicity == constants.PERIODICITY_WEEKLY:
+        return [(utils.get_random_previous_day(today, n_days), 1) for _ in range(4)]
+
+    highest = 20 if habit_id == constants.HABIT_CIGARETTE_SMOKED_ID else 10
+    return [
+        ((today - timedelta(days=offset + 1)).toordinal(), random.randint(1, highest))
+        for offset in range(n_days)
+    ]
@@ -0,0 +1,158 @@
+"""
+Streaming day-by-day series over habit record stores.
+
+Records are held per habit as a {day number: value} store. The generators in
+this module walk a window of day numbers in order and look each day up in the
+store, yielding (day, value) pairs one at a time, so charts, exports and
+statistics never build intermediate dicts or date objects per day.
+
+Long ranges are downsampled before they reach a chart: daily values become
+weekly or monthly means, and beyond that the Largest-Triangle-Three-Buckets
+algorithm keeps the points that preserve the visual shape, so the number of
+plotted points stays bounded however long the history is.
+"""
+
+import csv
+from datetime import date
+from itertools import groupby
+from typing import Iterable, Iterator, TextIO
+
+from src import constants, utils
+
+
+def window(n_days: int, end_day: int | None = None) -> tuple[int, int]:
+    """
+    Return the (first, last) day numbers of the n_days days ending on end_day.
+
+    Examples:
+        window(7) -> (today - 6, today)
+    """
+    end_day = date.today().toordinal() if end_day is None else end_day
+    return end_day - n_days + 1, end_day
+
+
+def series(
+    records: dict[int, int], start_day: int, end_day: int, fill: int | str | None = 0
+) -> Iterator[tuple[int, int]]:
+    """
+    Yield (day, value) for every day from start_day to end_day, in order.
+
+    Days without a record yield fill; with fill=None they are skipped, which
+    gives the logged days of the window only.
+
+    Examples:
+        records {3: 5, 5: 2}, days 3..6 -> (3, 5), (4, 0), (5, 2), (6, 0)
+        same with fill=None -> (3, 5), (5, 2)
+    """
+    get = records.get
+    if fill is None:
+        for day in range(start_day, end_day + 1):
+            value = get(day)
+            if value is not None:
+                yield day, value
+        return
+
+    for day in range(start_day, end_day + 1):
+        yield day, get(day, fill)
+
+
+def write_csv(habits: Iterable, file: TextIO, start_day: int, end_day: int) -> int:
+    """
+    Write one row per day and one column per habit to a CSV file.
+
+    Days a habit was not logged are left empty. Rows are streamed from the
+    habit series in lockstep, so memory does not grow with the window.
+    Returns the number of rows written.
+    """
+    habits = list(habits)
+    writer = csv.writer(file)
+    writer.writerow(["date", *(habit.name for habit in habits)])
+
+    columns = [series(habit.records, start_day, end_day, fill="") for habit in habits]
+    for day in range(start_day, end_day + 1):
+        writer.writerow(
+            [date.fromordinal(day).isoformat(), *(next(c)[1] for c in columns)]
+        )
+    return max(0, end_day - start_day + 1)
+
+
+def aggregate(
+    points: Iterable[tuple[int, int]], periodicity: str
+) -> Iterator[tuple[int, float]]:
+    """
+    Yield (period start day, mean value) per week or month of an ordered series.
+
+    Examples:
+        7 daily values of 2 in one week -> (monday, 2.0)
+    """
+    for period, group in groupby(
+        points, key=lambda point: utils.period_start(periodicity, point[0])
+    ):
+        values = [value for _, value in group]
+        yield period, sum(values) / len(values)
+
+
+def lttb(points: list[tuple[int, float]], threshold: int) -> list[tuple[int, float]]:
+    """
+    Reduce points to threshold points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept; every bucket in between contributes
+    the point forming the largest triangle with the previously kept point and
+    the average of the next bucket, which keeps peaks and dips visible.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    previous = 0
+
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, len(points))
+
+        # Average of the next bucket, or the last point for the final bucket
+        next_bucket = points[end:next_end] or points[-1:]
+        avg_x = sum(x for x, _ in next_bucket) / len(next_bucket)
+        avg_y = sum(y for _, y in next_bucket) / len(next_bucket)
+
+        ax, ay = points[previous]
+        previous = max(
+            range(start, end),
+            key=lambda j: abs(
+                (ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay)
+            ),
+        )
+        sampled.append(points[previous])
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def chart_points(
+    records: dict[int, int],
+    start_day: int,
+    end_day: int,
+    max_points: int = constants.CHART_MAX_POINTS,
+) -> tuple[str, list[tuple[int, float]]]:
+    """
+    Return at most max_points (day, value) points to chart a window, and their resolution.
+
+    Windows up to max_points days are charted daily; longer ones as weekly,
+    then monthly means, and LTTB reduces whatever is still too long.
+
+    Examples:
+        28 days -> ("daily", 28 points); 1 year -> ("weekly", 53 points)
+        10 years -> ("monthly", 121 points)
+    """
+    n_days = end_day - start_day + 1
+    points = series(records, start_day, end_day)
+
+    if n_days <= max_points:
+        return "daily", list(points)
+    if n_days <= max_points * 7:
+        return "weekly", list(aggregate(points, constants.PERIODICITY_WEEKLY))
+    return "monthly", lttb(
+        list(aggregate(points, constants.PERIODICITY_MONTHLY)), max_points
+    )
@@ -1,9 +1,11 @@
 import random
 from datetime import timedelta, date
 
+from src import constants
 
-def get_random_previous_day(day: date, max_days: int):
-    return (day - timedelta(days=random.randint(1, max_days))).isoformat()
+
+def get_random_previous_day(day: date, max_days: int) -> int:
+    return (day - timedelta(days=random.randint(1, max_days))).toordinal()
 
 
 def input_select(label: str, options: list[str]):
@@ -19,3 +21,26 @@ def input_select(label: str, options: list[str]):
         except (KeyboardInterrupt, SystemExit):
             print("\nExiting. Goodbye!")
         print("Invalid option, try again.")
+
+
+def period_start(periodicity: str, day: int) -> int:
+    """Return the first day number of the daily, weekly or monthly period holding day."""
+    if periodicity == constants.PERIODICITY_WEEKLY:
+        return day - date.fromordinal(day).weekday()
+    if periodicity == constants.PERIODICITY_MONTHLY:
+        return date.fromordinal(day).replace(day=1).toordinal()
+    return day
+
+
+def period_index(periodicity: str, day: int) -> int:
+    """
+    Return a number counting daily, weekly or monthly periods, one apart per period.
+
+    Weeks start on Monday, like period_start; day number 1 is a Monday.
+    """
+    if periodicity == constants.PERIODICITY_WEEKLY:
+        return (day - 1) // 7
+    if periodicity == constants.PERIODICITY_MONTHLY:
+        month = date.fromordinal(day)
+        return month.year * 12 + month.month - 1
+    return day
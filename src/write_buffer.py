@@ -0,0 +1,75 @@
+import time
+from dataclasses import dataclass
+from src import constants
+
+
+@dataclass
+class WriteBehindConfig:
+    """
+    Durability settings for buffered record writes.
+
+    max_pending: number of distinct (day, habit_id) upserts kept in memory before a flush
+    max_delay_seconds: age of the oldest pending upsert at which a timer flushes the buffer
+    synchronous: SQLite PRAGMA synchronous level applied to the connection (OFF, NORMAL, FULL)
+    """
+
+    max_pending: int = 50
+    max_delay_seconds: float = 5.0
+    synchronous: str = constants.DURABILITY_NORMAL
+
+    def __post_init__(self):
+        if self.max_pending <= 0:
+            raise ValueError("max_pending must be a positive integer.")
+        if self.max_delay_seconds < 0:
+            raise ValueError("max_delay_seconds must not be negative.")
+        if self.synchronous not in constants.DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level '{self.synchronous}'.")
+
+
+def group_statements(writes) -> list[tuple[str, list[tuple]]]:
+    """Group (sql, params) writes by statement, in first-seen order, for executemany."""
+    grouped: dict[str, list[tuple]] = {}
+    for sql, params in writes:
+        grouped.setdefault(sql, []).append(params)
+    return list(grouped.items())
+
+
+class WriteBehindBuffer:
+    """
+    In-memory buffer of upserts waiting to be written in one transaction.
+
+    Each upsert carries a key identifying the row it targets, for example
+    ("records", day, habit_id), so logging the same habit twice before a flush
+    only writes the last value. Thresholds are evaluated when a write is added;
+    the owning Database decides when to drain the buffer, and arms a timer on
+    the first pending upsert so max_delay_seconds holds in an idle session too.
+    """
+
+    def __init__(self, config: WriteBehindConfig):
+        self.config = config
+        self._pending: dict[tuple, tuple[str, tuple]] = {}
+        self._oldest_write: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, key: tuple, sql: str, params: tuple) -> bool:
+        """Buffer an upsert and return True when a flush threshold is reached."""
+        if self._oldest_write is None:
+            self._oldest_write = time.monotonic()
+        self._pending[key] = (sql, params)
+        return self.is_due()
+
+    def is_due(self) -> bool:
+        if not self._pending:
+            return False
+        if len(self._pending) >= self.config.max_pending:
+            return True
+        return time.monotonic() - self._oldest_write >= self.config.max_delay_seconds
+
+    def drain(self) -> list[tuple[str, list[tuple]]]:
+        """Return the pending upserts grouped by statement and empty the buffer."""
+        statements = group_statements(self._pending.values())
+        self._pending.clear()
+        self._oldest_write = None
+        return statements
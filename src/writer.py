@@ -0,0 +1,176 @@
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+from src.write_buffer import group_statements
+
+# Queue item telling the writer thread to stop once everything before it is written
+_STOP = object()
+
+
+class BackgroundWriter:
+    """
+    Dedicated thread owning its own SQLite connection for upserts.
+
+    Callers enqueue keyed upserts, for example ("records", day, habit_id), and
+    receive a Future resolved once the write is committed. The thread drains
+    everything queued since its last transaction, keeps only the last write per
+    key and writes the batch in a single transaction, so bursts of logging cost
+    one commit. An optional before_commit callback runs on the writer
+    connection inside every batch transaction.
+
+    When a batch fails, each caller's writes are retried in a transaction of
+    their own, so only the failing caller's Future gets the error. The first
+    failure is also kept and raised by the next flush or close, so writes
+    whose Future nobody checks cannot be lost silently.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        before_commit: Callable[[sqlite3.Connection], Any] | None = None,
+    ):
+        self.path = path
+        self.before_commit = before_commit
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="tracker-writer", daemon=True
+        )
+        # First failure not yet raised by flush or close
+        self._error: BaseException | None = None
+        # Queue items not yet written, including flush barriers
+        self._unfinished = 0
+        self._unfinished_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    @property
+    def idle(self) -> bool:
+        """True when every submitted upsert is committed and no failure awaits a flush."""
+        return self._unfinished == 0 and self._error is None
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, key: tuple, sql: str, params: tuple) -> Future:
+        """Queue an upsert and return a Future completed when it is committed."""
+        return self.submit_many([(key, sql, params)])
+
+    def submit_many(self, writes: list[tuple[tuple, str, tuple]]) -> Future:
+        """Queue keyed upserts committed together in one transaction."""
+        if not self.running:
+            raise RuntimeError("Background writer is not running")
+        future: Future = Future()
+        self._put(([(key, (sql, params)) for key, sql, params in writes], future))
+        return future
+
+    def flush(self):
+        """
+        Block until every upsert submitted before this call is committed.
+
+        Raises the first write failure since the last flush or close, or a
+        RuntimeError when the thread has stopped with writes still queued.
+        """
+        if self.running:
+            barrier: Future = Future()
+            self._put(([], barrier))
+            barrier.result()
+        self._raise_error()
+
+    def close(self):
+        """Write the remaining queue and stop the thread; raises like flush."""
+        if self.running:
+            self._put(_STOP)
+            self._thread.join()
+        self._raise_error()
+
+    def _put(self, item):
+        with self._unfinished_lock:
+            self._unfinished += 1
+        self._queue.put(item)
+
+    def _done(self, n_items: int):
+        with self._unfinished_lock:
+            self._unfinished -= n_items
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is None and not self._queue.empty():
+            error = RuntimeError("Background writer stopped with writes still queued")
+        if error is not None:
+            raise error
+
+    def _record_error(self, error: BaseException):
+        if self._error is None:
+            self._error = error
+
+    def _run(self):
+        try:
+            conn = sqlite3.connect(self.path)
+            try:
+                stopping = False
+                while not stopping:
+                    batch = [self._queue.get()]
+                    while True:
+                        try:
+                            batch.append(self._queue.get_nowait())
+                        except queue.Empty:
+                            break
+
+                    stopping = _STOP in batch
+                    self._write_batch(
+                        conn, [item for item in batch if item is not _STOP]
+                    )
+                    self._done(len(batch))
+            finally:
+                conn.close()
+        except Exception as error:  # the thread must not die without a trace
+            self._record_error(error)
+        finally:
+            self._fail_pending()
+
+    def _fail_pending(self):
+        # Writes queued after the thread stopped would otherwise never resolve
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._done(1)
+            if item is not _STOP:
+                error = RuntimeError("Background writer stopped before the write")
+                self._record_error(error)
+                item[1].set_exception(error)
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: list):
+        # Coalesce per key: the last write wins, every caller is notified
+        writes: dict[tuple, tuple[str, tuple]] = {}
+        futures: list[Future] = []
+        for keyed_writes, future in batch:
+            writes.update(keyed_writes)
+            futures.append(future)
+
+        try:
+            if writes:
+                for sql, rows in group_statements(writes.values()):
+                    conn.executemany(sql, rows)
+                if self.before_commit is not None:
+                    self.before_commit(conn)
+                conn.commit()
+        except Exception as error:
+            conn.rollback()
+            if len(batch) > 1:
+                # Keep unrelated callers' writes: retry each one on its own
+                for item in batch:
+                    self._write_batch(conn, [item])
+                return
+            self._record_error(error)
+            for future in futures:
+                future.set_exception(error)
+            return
+
+        for future in futures:
+            future.set_result(None)
@@ -49,7 +49,7 @@ def test_longest_run_streak_all():
                 constants.PERIODICITY_DAILY,
                 constants.HABIT_TYPE_ESTABLISHMENT,
                 now,
-                [HabitRecordModel(now.date().isoformat(), i + 1, 5)],  # Single record
+                [HabitRecordModel(now.date().toordinal(), i + 1, 5)],  # Single record
             )
         )
         for i in range(10)  # Generate 10 habits
@@ -88,7 +88,7 @@ def test_longest_run_streak_for_habit():
             constants.HABIT_TYPE_ESTABLISHMENT,
             now,
             [
-                HabitRecordModel(now.date().isoformat(), 1, 5)
+                HabitRecordModel(now.date().toordinal(), 1, 5)
             ],  # Single record with value 5
         )
     )
@@ -124,7 +124,7 @@ def test_plot_habit_time_series():
             constants.PERIODICITY_DAILY,
             constants.HABIT_TYPE_ESTABLISHMENT,
             now,
-            [HabitRecordModel(now.date().isoformat(), 1, 5)],  # Single data point
+            [HabitRecordModel(now.date().toordinal(), 1, 5)],  # Single data point
         )
     )
 
@@ -171,7 +171,7 @@ def test_weekly_cigarettes_avoided_and_money_saved():
     # Day 0: 10 cigarettes, Day 1: 9 cigarettes, ..., Day 6: 4 cigarettes
     records = [
         HabitRecordModel(
-            (now.date() - timedelta(days=i)).isoformat(),  # Date going backwards
+            (now.date() - timedelta(days=i)).toordinal(),  # Date going backwards
             1,  # Habit ID
             10 - i,  # Decreasing consumption: 10, 9, 8, 7, 6, 5, 4
         )
@@ -207,3 +207,94 @@ def test_weekly_cigarettes_avoided_and_money_saved():
     )  # Total spent: 10+9+8+7+6+5+4 = 49
     assert stats.initial == 10  # Initial consumption was 10 cigarettes
     assert stats.start_date < stats.end_date  # Date range should be valid
+
+
+def test_cached_longest_run_streaks_invalidated_by_log():
+    """
+    Test that cached streaks are reused until the habit is logged again.
+
+    This test verifies that the memoized streak computation serves repeated
+    analytics visits from the cache, and that logging a value bumps the habit
+    version so the next visit recomputes the streak.
+
+    Test scenario:
+    - Create a habit with a record yesterday
+    - Compute streaks twice and verify the second call is a cache hit
+    - Log today's value and verify the streak is recomputed and extended
+    """
+    # Arrange - Habit with a single record yesterday
+    now = datetime.now()
+    habit = Habit(
+        HabitModel(
+            1,
+            "Cigarettes Smoked",
+            "Number of cigarettes smoked daily",
+            constants.PERIODICITY_DAILY,
+            constants.HABIT_TYPE_ELIMINATION,
+            now,
+            [HabitRecordModel((now.date() - timedelta(days=1)).toordinal(), 1, 5)],
+        )
+    )
+    habit_manager = HabitManager(MagicMock())
+    habit_manager.habits = [habit]
+
+    # Act - Two analytics visits without any write in between
+    first = analytics.cached_longest_run_streaks(habit_manager)
+    second = analytics.cached_longest_run_streaks(habit_manager)
+
+    # Assert - Second visit hit the cache
+    assert first == second == {1: 1}
+    assert habit_manager.analytics_cache.stats().hits == 1
+
+    # Act - Logging today invalidates the cached streak
+    habit_manager.log_today_habit(1, 3)
+    third = analytics.cached_longest_run_streaks(habit_manager)
+
+    # Assert - Streak was recomputed with the new record
+    assert third == {1: 2}
+    assert habit_manager.analytics_cache.stats().misses == 2
+
+
+def test_weekly_money_saved_uses_price_history():
+    """
+    Test that weekly savings price each day with the unit cost effective that day.
+
+    The habit has a price of 0.50 € per unit until three days ago and 1.00 €
+    from then on, so avoided units are worth twice as much in the last days.
+
+    Test scenario:
+    - Log 10 units 6 days ago, then 8 units on each of the last 6 days
+    - Change the price 3 days ago
+    - Verify unit_cost_on picks the right price and money saved mixes both
+    """
+    # Arrange - Create a priced elimination habit with a price change mid-week
+    mock_db = MagicMock()
+    habit_manager = HabitManager(mock_db)
+
+    today = datetime.now().date().toordinal()
+    records = [HabitRecordModel(today - 6, 7, 10)] + [
+        HabitRecordModel(today - offset, 7, 8) for offset in range(6)
+    ]
+    habit = Habit(
+        HabitModel(
+            7,
+            "Snus",
+            "Pouches used daily",
+            constants.PERIODICITY_DAILY,
+            constants.HABIT_TYPE_ELIMINATION,
+            datetime.now(),
+            records,
+            [(1, 0.5), (today - 2, 1.0)],
+        )
+    )
+    habit_manager.habits = [habit]
+
+    # Act - Price single days and compute the weekly stats of the habit
+    stats = analytics.weekly_cigarettes_avoided_and_money_saved(habit_manager, 7)
+
+    # Assert - 2 avoided per day: 3 days at 0.50 € and 3 days at 1.00 €
+    assert analytics.unit_cost_on(habit, 0) == 0.0
+    assert analytics.unit_cost_on(habit, today - 3) == 0.5
+    assert analytics.unit_cost_on(habit, today) == 1.0
+    assert stats.avoided == 12
+    assert stats.money_saved == 3 * 2 * 0.5 + 3 * 2 * 1.0
@@ -0,0 +1,71 @@
+"""
+Test suite for the analytics result cache.
+
+This module contains unit tests for the ResultCache used to memoize analytics
+results per habit version. It tests:
+- Hit and miss accounting
+- Bounded size with least-recently-used eviction
+- Eager invalidation of every entry belonging to one habit
+"""
+
+from src.cache import ResultCache
+
+
+def test_result_cache_counts_hits_and_misses():
+    """
+    Test that the cache only computes a value once per key.
+
+    Test scenario:
+    - Request the same key twice and a second key once
+    - Verify the compute function ran once per distinct key
+    - Verify hit and miss statistics
+    """
+    # Arrange - Cache and a compute function that records its calls
+    cache = ResultCache(maxsize=4)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 42
+
+    # Act - Two lookups on the same key, one on another key
+    first = cache.get_or_compute(("streak", 1, 0), compute)
+    second = cache.get_or_compute(("streak", 1, 0), compute)
+    cache.get_or_compute(("streak", 2, 0), compute)
+
+    # Assert - Second lookup was served from the cache
+    assert first == second == 42
+    assert len(calls) == 2
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 2, 2)
+    assert stats.hit_rate == 1 / 3
+
+
+def test_result_cache_evicts_least_recently_used():
+    """
+    Test LRU eviction and per-habit invalidation.
+
+    Test scenario:
+    - Fill a cache of size 2, touch the oldest key, then insert a third key
+    - Verify the untouched key was evicted and the touched one kept
+    - Invalidate a habit and verify its entries are gone
+    """
+    # Arrange - Cache holding two entries
+    cache = ResultCache(maxsize=2)
+    cache.get_or_compute(("streak", 1, 0), lambda: 1)
+    cache.get_or_compute(("streak", 2, 0), lambda: 2)
+
+    # Act - Touch habit 1, then insert habit 3 which forces an eviction
+    cache.get_or_compute(("streak", 1, 0), lambda: -1)
+    cache.get_or_compute(("streak", 3, 0), lambda: 3)
+
+    # Assert - Habit 2 was the least recently used entry
+    assert cache.stats().evictions == 1
+    assert cache.get_or_compute(("streak", 1, 0), lambda: -1) == 1
+    assert cache.get_or_compute(("streak", 2, 0), lambda: -2) == -2
+
+    # Act - Drop all entries of habit 1
+    cache.invalidate_habit(1)
+
+    # Assert - Habit 1 is recomputed on next access
+    assert cache.get_or_compute(("streak", 1, 0), lambda: -1) == -1
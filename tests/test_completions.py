@@ -0,0 +1,175 @@
+"""
+Test suite for timestamped completions.
+
+This module contains unit tests for the integer time bucketing of the
+completions module and an end-to-end test of logging completions through the
+HabitManager into a real database created in a temporary directory.
+"""
+
+import time as clock
+from array import array
+from concurrent.futures import Future
+from datetime import date, datetime, time, timezone
+
+from src import completions, constants, utils
+from src.db import Database
+from src.habit_manager import HabitManager
+
+
+def epoch(*args) -> int:
+    """Return the epoch seconds of a UTC date and time."""
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+def test_bucket_by_hour_weekday_and_interval():
+    """
+    Test hour, weekday and custom interval buckets with a UTC offset.
+
+    Test scenario:
+    - Completions on Monday 2024-01-01 at 07:10, 07:50 and 22:30 UTC
+    - Bucket them in UTC+2, where 22:30 becomes 00:30 on Tuesday
+    - Verify hour, weekday and 30-minute buckets, and a range cut with bisect
+    """
+    # Arrange - Three completions and a UTC+2 offset
+    timestamps = array(
+        "q",
+        [epoch(2024, 1, 1, 7, 10), epoch(2024, 1, 1, 7, 50), epoch(2024, 1, 1, 22, 30)],
+    )
+    offset = 2 * completions.SECONDS_PER_HOUR
+
+    # Act - Bucket in local time
+    by_hour = completions.count_by_hour(timestamps, offset)
+    by_weekday = completions.count_by_weekday(timestamps, offset)
+    by_half_hour = completions.count_by_interval(timestamps, 1800, offset)
+    morning = completions.in_range(
+        timestamps, epoch(2024, 1, 1, 7, 30), epoch(2024, 1, 1, 12)
+    )
+
+    # Assert - Two at 09:00 local on Monday, one at 00:00 local on Tuesday
+    assert by_hour[9] == 2 and by_hour[0] == 1 and sum(by_hour) == 3
+    assert by_weekday == [2, 1, 0, 0, 0, 0, 0]
+    assert by_half_hour == {
+        epoch(2024, 1, 1, 7, 0): 1,
+        epoch(2024, 1, 1, 7, 30): 1,
+        epoch(2024, 1, 1, 22, 30): 1,
+    }
+    assert list(morning) == [epoch(2024, 1, 1, 7, 50)]
+
+
+def test_log_completion_counts_towards_the_day(tmp_path):
+    """
+    Test logging completions end to end.
+
+    Test scenario:
+    - Log three completions of a new habit around noon, one of them out of order
+    - Verify today's value grew by one per completion, each written together
+      with its completion in one batch the returned Future covers
+    - Verify the completions are stored sorted and survive a reload
+    """
+    # Arrange - New habit in a real database
+    now = int(datetime.combine(date.today(), time(12)).timestamp())
+
+    with Database(str(tmp_path / "tracker.db"), background_writer=True) as db:
+        habit_manager = HabitManager(db)
+        habit_manager.load_habits()
+        habit_manager.add_habit(
+            "Snus",
+            "Pouches used",
+            constants.PERIODICITY_DAILY,
+            constants.HABIT_TYPE_ELIMINATION,
+        )
+        habit_id = habit_manager.habits[-1].id
+        loaded = habit_manager.get_completions(habit_id)
+
+        # Act - Three completions today, the last one earlier than the others
+        futures = [
+            habit_manager.log_completion(habit_id, ts)
+            for ts in [now - 60, now, now - 120]
+        ]
+        habit_manager.confirm_writes(futures)
+        with db._read_connection() as conn:
+            events = conn.execute(
+                "SELECT value FROM events WHERE habit_id = ? ORDER BY seq", (habit_id,)
+            ).fetchall()
+        today_value = habit_manager.get_today_habit_value(habit_id)
+        stored = db.get_completions(habit_id)
+
+    # Assert - One unit per completion, timestamps kept sorted in memory and on disk
+    assert today_value == 3
+    assert all(isinstance(future, Future) for future in futures)
+    assert events[-1][0] == 3
+    assert list(loaded) == [now - 120, now - 60, now]
+    assert list(stored) == [now - 120, now - 60, now]
+
+
+def test_weekly_completions_on_two_days_add_up_in_the_week(tmp_path):
+    """
+    Test logging a weekly habit on two days of the same week.
+
+    Test scenario:
+    - Log Sport completions on the Monday and the Wednesday of last week
+    - Verify both are stored on their own day and add up in that week
+    - Verify both timestamps are stored
+    """
+    # Arrange - Monday and Wednesday noon of last week
+    monday = utils.period_start(
+        constants.PERIODICITY_WEEKLY, date.today().toordinal() - 7
+    )
+    timestamps = [
+        int(datetime.combine(date.fromordinal(day), time(12)).timestamp())
+        for day in (monday, monday + 2)
+    ]
+
+    with Database(str(tmp_path / "tracker.db")) as db:
+        habit_manager = HabitManager(db)
+        habit_manager.load_habits()
+        habit_manager.add_habit(
+            "Running",
+            "Runs",
+            constants.PERIODICITY_WEEKLY,
+            constants.HABIT_TYPE_ESTABLISHMENT,
+        )
+        habit_id = habit_manager.habits[-1].id
+
+        # Act - Two sessions in one week
+        for ts in timestamps:
+            habit_manager.log_completion(habit_id, ts)
+        records = habit_manager._get_habit_by_id(habit_id).records
+        stored = db.get_completions(habit_id)
+
+    # Assert - One session on each day, two in the week
+    assert records == {monday: 1, monday + 2: 1}
+    assert list(stored) == timestamps
+
+
+def test_local_time_buckets_follow_daylight_saving_time(monkeypatch):
+    """
+    Test bucketing with the local UTC offset of each timestamp.
+
+    Test scenario:
+    - Switch the local time zone to Europe/Berlin
+    - Take completions at 08:30 local time in January (UTC+1) and July (UTC+2)
+    - Verify local_utc_offset gives each its own offset and both land in the
+      08:00 bucket, where one fixed offset would move one of them by an hour
+    """
+    # Arrange - Berlin time, one winter and one summer completion at 08:30
+    monkeypatch.setenv("TZ", "Europe/Berlin")
+    clock.tzset()
+    completions._quarter_hour_offset.cache_clear()
+    winter, summer = epoch(2024, 1, 15, 7, 30), epoch(2024, 7, 15, 6, 30)
+    timestamps = array("q", [winter, summer])
+
+    try:
+        # Act - Offsets per timestamp, and buckets with and without them
+        offsets = [completions.local_utc_offset(ts) for ts in timestamps]
+        by_hour = completions.count_by_hour(timestamps, completions.local_utc_offset)
+        by_hour_fixed = completions.count_by_hour(timestamps, offsets[0])
+    finally:
+        monkeypatch.undo()
+        clock.tzset()
+        completions._quarter_hour_offset.cache_clear()
+
+    # Assert - Both at 08:00 local time
+    assert offsets == [3600, 7200]
+    assert by_hour[8] == 2
+    assert by_hour_fixed[8] == 1 and by_hour_fixed[7] == 1
@@ -0,0 +1,833 @@
+"""
+Test suite for db module.
+
+This module contains tests for the SQLite-backed Database class of the
+quit-smoking habit tracker application. Unlike the habit manager tests, these
+tests run against real database files created in a temporary directory so that
+persistence and durability behaviour can be verified end to end. It tests:
+- Write-behind buffering of record upserts
+- Flushing on size threshold, delay timer and context manager exit
+- Crash safety of flushed and unflushed writes
+- Background writer thread, its failure reporting and pooled read-only connections
+- Reduction plan storage and adherence queries
+- Per-habit price history and cost reports
+- Dashboard summaries in one aggregate query
+- Lazy loading of record history at startup
+- Archiving, restoring and purging deleted habits
+- Append-only event log, compaction and history replay
+- Binary habit snapshots validated by the data generation
+- Maintenance: incremental vacuum, statistics, integrity and size report
+- Online backup and verified restore
+"""
+
+import sqlite3
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+from src import constants, events, snapshot
+from src.db import Database
+from src.habit_manager import HabitManager
+from src.models import HabitSummary, PlanAdherence, ReductionPlan
+from src.write_buffer import WriteBehindConfig
+
+
+def count_today_records(path) -> int:
+    """Count today's records through an independent connection."""
+    with sqlite3.connect(path) as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM records WHERE day = ?", (date.today().toordinal(),)
+        ).fetchone()[0]
+
+
+def test_write_behind_flushes_on_size_threshold_and_exit(tmp_path):
+    """
+    Test that buffered upserts reach disk on the size threshold and on exit.
+
+    Test scenario:
+    - Open a database with a write-behind buffer of 3 upserts
+    - Log 2 values, one of them twice, and verify nothing was written yet
+      and the repeated log took no extra buffer slot
+    - Log a 3rd value and verify all 3 were flushed together
+    - Log a 4th value, leave the context manager and verify it was flushed
+    - Verify the repeated log appended a single event with the last value
+    """
+    # Arrange - Database with a small write-behind buffer
+    path = tmp_path / "tracker.db"
+    today = date.today().toordinal()
+    config = WriteBehindConfig(max_pending=3, max_delay_seconds=3600)
+
+    with Database(str(path), write_behind=config) as db:
+        # Act - Stay below the threshold
+        db.upsert_record(today, constants.HABIT_CIGARETTE_SMOKED_ID, 4)
+        db.upsert_record(today, constants.HABIT_NICOTINE_GUM_USED_ID, 2)
+        db.upsert_record(today, constants.HABIT_CIGARETTE_SMOKED_ID, 5)
+
+        # Assert - Nothing reached the database file yet
+        assert count_today_records(path) == 0
+        assert len(db.write_buffer) == 2
+
+        # Act - Reach the threshold
+        db.upsert_record(today, constants.HABIT_MEDITATION_TIME_ID, 10)
+
+        # Assert - The whole buffer was flushed
+        assert count_today_records(path) == 3
+
+        db.upsert_record(today, constants.HABIT_SPORT_HABIT_ID, 1)
+
+    # Assert - Exiting the context manager flushed the remaining upsert
+    assert count_today_records(path) == 4
+    with sqlite3.connect(path) as conn:
+        assert conn.execute(
+            "SELECT value FROM events WHERE day = ? AND habit_id = ?",
+            (today, constants.HABIT_CIGARETTE_SMOKED_ID),
+        ).fetchall() == [(5,)]
+
+
+def test_write_behind_flushes_idle_buffer_after_max_delay(tmp_path):
+    """
+    Test that a lone buffered upsert is flushed by the timer.
+
+    Test scenario:
+    - Open a database with a large buffer and a short max delay
+    - Log one value and no further writes
+    - Verify it reaches the database file once the delay has passed
+    """
+    # Arrange - Size threshold out of reach, short delay
+    path = tmp_path / "tracker.db"
+    today = date.today().toordinal()
+    config = WriteBehindConfig(max_pending=100, max_delay_seconds=0.05)
+
+    with Database(str(path), write_behind=config) as db:
+        # Act - One write in an otherwise idle session
+        db.upsert_record(today, constants.HABIT_CIGARETTE_SMOKED_ID, 4)
+        assert count_today_records(path) == 0
+
+        deadline = time.monotonic() + 5
+        while count_today_records(path) == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        # Assert - Flushed without any later write, read or exit
+        assert count_today_records(path) == 1
+        assert len(db.write_buffer) == 0
+
+
+def test_write_behind_crash_keeps_flushed_writes(tmp_path):
+    """
+    Test crash safety of the write-behind mode.
+
+    A crash is simulated by dropping the connection without going through
+    Database.__exit__. Upserts flushed before the crash must survive, upserts
+    still buffered are lost, and the database file must remain consistent.
+
+    Test scenario:
+    - Log values until one flush happens, then log one more buffered value
+    - Close the raw connection without flushing
+    - Reopen the database and verify its content and integrity
+    """
+    # Arrange - Database with full durability and a buffer of 2 upserts
+    path = tmp_path / "tracker.db"
+    today = date.today().toordinal()
+    config = WriteBehindConfig(
+        max_pending=2, max_delay_seconds=3600, synchronous=constants.DURABILITY_FULL
+    )
+    db = Database(str(path), write_behind=config)
+    db.__enter__()
+
+    # Act - One flushed batch, then one pending upsert, then a crash
+    db.upsert_record(today, constants.HABIT_CIGARETTE_SMOKED_ID, 4)
+    db.upsert_record(today, constants.HABIT_NICOTINE_GUM_USED_ID, 2)
+    db.upsert_record(today, constants.HABIT_MEDITATION_TIME_ID, 10)
+    db.conn.close()
+    db.conn = None
+
+    # Assert - Flushed writes survived, the buffered one was lost
+    with Database(str(path)) as reopened:
+        values = {
+            model.id: model.records.get(today) for model in reopened.get_all_habits()
+        }
+        integrity = reopened.conn.execute("PRAGMA integrity_check").fetchone()[0]
+
+    assert values[constants.HABIT_CIGARETTE_SMOKED_ID] == 4
+    assert values[constants.HABIT_NICOTINE_GUM_USED_ID] == 2
+    assert values[constants.HABIT_MEDITATION_TIME_ID] is None
+    assert integrity == "ok"
+
+
+def test_background_writer_coalesces_and_resolves_futures(tmp_path):
+    """
+    Test the background writer thread.
+
+    Test scenario:
+    - Open a database with a background writer
+    - Submit several upserts for the same (day, habit_id) and another habit
+    - Verify every Future resolves and the last value per key was written
+    - Verify the context manager exit stops the writer thread
+    """
+    # Arrange - Database with a background writer
+    path = tmp_path / "tracker.db"
+    today = date.today().toordinal()
+
+    with Database(str(path), background_writer=True) as db:
+        # Act - Repeated upserts for one key plus another habit
+        futures = [
+            db.upsert_record(today, constants.HABIT_CIGARETTE_SMOKED_ID, value)
+            for value in range(1, 6)
+        ]
+        futures.append(db.upsert_record(today, constants.HABIT_NICOTINE_GUM_USED_ID, 3))
+        for future in futures:
+            future.result(timeout=5)
+
+        # Assert - Last value per key is visible to the main connection
+        rows = dict(
+            db.conn.execute(
+                "SELECT habit_id, value FROM records WHERE day = ?", (today,)
+            ).fetchall()
+        )
+        assert rows == {
+            constants.HABIT_CIGARETTE_SMOKED_ID: 5,
+            constants.HABIT_NICOTINE_GUM_USED_ID: 3,
+        }
+        writer = db.writer
+
+    # Assert - Writer thread shut down cleanly
+    assert not writer.running
+
+
+def test_background_writer_isolates_and_reports_failures(tmp_path):
+    """
+    Test that a failed write neither takes other writes down nor goes unnoticed.
+
+    Test scenario:
+    - Queue a write to a missing table and a valid upsert on the writer
+    - Verify only the failing write's Future fails and the upsert is committed
+    - Verify the next flush raises the failure once
+    - Verify confirming the pending writes of a round of logs drops a value
+      whose write failed, next to one that was committed
+    """
+    # Arrange - Database with a background writer
+    path = tmp_path / "tracker.db"
+    today = date.today().toordinal()
+    smoked = constants.HABIT_CIGARETTE_SMOKED_ID
+
+    with Database(str(path), background_writer=True) as db:
+        # Act - One failing and one valid write, possibly in the same batch
+        bad = db.writer.submit(("bad",), "INSERT INTO missing VALUES (?)", (1,))
+        good = db.upsert_record(today, smoked, 7)
+
+        # Assert - Only the failing caller gets the error
+        with pytest.raises(sqlite3.OperationalError):
+            bad.result(timeout=5)
+        good.result(timeout=5)
+        assert count_today_records(path) == 1
+
+        # Assert - The failure is raised by the next flush, once
+        with pytest.raises(sqlite3.OperationalError):
+            db.flush()
+        db.flush()
+
+        # Act - A logged value whose write failed
+        habit_manager = HabitManager(db)
+        habit_manager.load_habits()
+        habit_manager._get_habit_by_id(smoked).records[today] = 99
+        failed = Future()
+        failed.set_exception(sqlite3.OperationalError("disk I/O error"))
+        habit_manager.pending_writes += [good, None, failed]
+
+        # Assert - The error is raised and memory matches the database again
+        with pytest.raises(sqlite3.OperationalError):
+            habit_manager.confirm_pending_writes()
+        assert habit_manager._get_habit_by_id(smoked).records[today] == 7
+        assert habit_manager.pending_writes == []
+        writer = db.writer
+
+    assert not writer.running
+
+
+def test_read_pool_serves_concurrent_readers(tmp_path):
+    """
+    Test that read methods can run from several threads while logging.
+
+    Test scenario:
+    - Open a database with a pool of 3 read-only connections
+    - Call get_all_habits from 6 threads while the main thread logs values
+    - Verify every reader saw all default habits
+    - Verify a read with nothing left to flush does not wait for the write lock
+    - Verify pooled connections reject writes
+    """
+    # Arrange - Database with a small read pool
+    path = tmp_path / "tracker.db"
+    today = date.today().toordinal()
+
+    with Database(str(path), read_pool_size=3) as db:
+        # Act - Concurrent readers while the main thread writes
+        with ThreadPoolExecutor(6) as executor:
+            results = [executor.submit(db.get_all_habits) for _ in range(12)]
+            for value in range(20):
+                db.upsert_record(today, constants.HABIT_CIGARETTE_SMOKED_ID, value)
+            habit_counts = [len(result.result()) for result in results]
+
+        # Assert - Every read succeeded with the full habit list
+        assert habit_counts == [len(constants.DEFAULT_HABITS)] * 12
+
+        # Assert - Once flushed, reads run while another thread holds the lock
+        db.flush()
+        with db._write_lock:
+            with ThreadPoolExecutor(1) as executor:
+                summaries = executor.submit(db.get_habit_summaries, today)
+                assert len(summaries.result(timeout=5)) == len(constants.DEFAULT_HABITS)
+
+        # Assert - Pooled connections are read-only
+        with db.read_pool.connection() as conn:
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM records")
+
+
+def test_migrates_iso_string_days_to_day_numbers(tmp_path):
+    """
+    Test the one-time migration of ISO string days to day numbers.
+
+    Test scenario:
+    - Create a database file with the previous schema (TEXT days)
+    - Open it with Database
+    - Verify days were converted to date.toordinal() integers
+    - Verify the schema version was recorded so the migration runs once
+    """
+    # Arrange - Database file in the previous format
+    path = tmp_path / "tracker.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            """CREATE TABLE habits (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE,
+            description TEXT, periodicity TEXT, habit_type TEXT, created TEXT)"""
+        )
+        conn.execute(
+            """CREATE TABLE records (day TEXT, habit_id INTEGER, value INTEGER,
+            PRIMARY KEY (day, habit_id), FOREIGN KEY(habit_id) REFERENCES habits(id))"""
+        )
+        conn.execute(
+            "INSERT INTO habits VALUES (1, 'Cigarettes Smoked', '', ?, ?, '2024-02-01T08:00:00')",
+            (constants.PERIODICITY_DAILY, constants.HABIT_TYPE_ELIMINATION),
+        )
+        conn.executemany(
+            "INSERT INTO records VALUES (?, 1, ?)",
+            [("2024-02-28", 7), ("2024-02-29", 6), ("2024-03-01", 5)],
+        )
+    conn.close()
+
+    # Act - Opening the database runs the migration
+    with Database(str(path)) as db:
+        records = db.get_all_habits()[0].records
+
+    # Assert - Days are day numbers and the migration is recorded
+    assert records == {
+        date(2024, 2, 28).toordinal(): 7,
+        date(2024, 2, 29).toordinal(): 6,
+        date(2024, 3, 1).toordinal(): 5,
+    }
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] >= 1
+        assert conn.execute("SELECT DISTINCT typeof(day) FROM records").fetchall() == [
+            ("integer",)
+        ]
+    conn.close()
+
+
+def test_plan_adherence_compares_plans_with_logs(tmp_path):
+    """
+    Test saving reduction plans and computing adherence in one query.
+
+    Test scenario:
+    - Save a 5-day plan starting 4 days ago for a new habit
+    - Log values on plan, over plan and leave one day unlogged
+    - Verify the adherence counters and the cumulative deviation
+    """
+    # Arrange - New habit without sample data and a plan starting 4 days ago
+    today = date.today().toordinal()
+
+    with Database(str(tmp_path / "tracker.db")) as db:
+        habit_id = db.add_habit(
+            "Snus",
+            "Pouches used",
+            constants.PERIODICITY_DAILY,
+            constants.HABIT_TYPE_ELIMINATION,
+        ).id
+        db.save_plans(
+            [
+                ReductionPlan(
+                    habit_id, constants.PLAN_CURVE_LINEAR, today - 4, [10, 8, 6, 4, 2]
+                )
+            ]
+        )
+        for offset, value in [(4, 9), (3, 9), (2, 6), (0, 5)]:
+            db.upsert_record(today - offset, habit_id, value)
+
+        # Act - Compare the plan with the logs
+        (adherence,) = db.get_plan_adherence(today)
+
+    # Assert - 4 logged days, 2 on plan, 2 over plan, deviation -1 + 1 + 0 + 3
+    assert adherence == PlanAdherence(
+        habit_id=habit_id,
+        planned_days=5,
+        logged_days=4,
+        days_on_plan=2,
+        days_over_plan=2,
+        total_deviation=3,
+    )
+
+
+def test_cost_report_applies_price_history(tmp_path):
+    """
+    Test per-habit pricing with effective dates.
+
+    Test scenario:
+    - Give a new habit a price of 1.0, raised to 2.0 two days ago
+    - Log 4 days of values straddling the price change
+    - Verify the cost report prices each day with the price effective that day
+    - Verify the seeded cigarette price and the in-memory price history
+    """
+    # Arrange - New habit with a price change two days ago
+    today = date.today().toordinal()
+
+    with Database(str(tmp_path / "tracker.db")) as db:
+        habit_id = db.add_habit(
+            "Snus",
+            "Pouches used",
+            constants.PERIODICITY_DAILY,
+            constants.HABIT_TYPE_ELIMINATION,
+        ).id
+        db.set_unit_cost(habit_id, constants.FIRST_PRICE_DAY, 1.0)
+        db.set_unit_cost(habit_id, today - 2, 2.0)
+        for offset, value in [(3, 10), (2, 8), (1, 6), (0, 4)]:
+            db.upsert_record(today - offset, habit_id, value)
+
+        # Act - Report over the last 4 days
+        reports = {r.habit_id: r for r in db.get_cost_report(today - 3, today)}
+        habits = {model.id: model for model in db.get_all_habits()}
+
+    # Assert - 10 at 1.0, then 8, 6, 4 at 2.0; savings against the baseline of 10
+    report = reports[habit_id]
+    assert (report.logged_days, report.units, report.baseline) == (4, 28, 10)
+    assert report.cost == 10 * 1.0 + (8 + 6 + 4) * 2.0
+    assert report.saved == 0 * 1.0 + (2 + 4 + 6) * 2.0
+
+    # Assert - Cigarettes carry the price seeded from the former constants
+    assert habits[constants.HABIT_CIGARETTE_SMOKED_ID].prices == [
+        (constants.FIRST_PRICE_DAY, 0.5)
+    ]
+    assert habits[habit_id].prices == [
+        (constants.FIRST_PRICE_DAY, 1.0),
+        (today - 2, 2.0),
+    ]
+
+
+def test_habit_summaries_match_in_memory_pass(tmp_path):
+    """
+    Test the single-query dashboard summary against the in-memory one.
+
+    Test scenario:
+    - Log a new habit on 5 days with a gap, ending yesterday
+    - Verify today's value, total, last day and current streak from SQL
+    - Verify HabitManager computes the same summary for every habit in one pass
+    """
+    # Arrange - Records 6 and 5 days ago, then yesterday back to 3 days ago
+    today = date.today().toordinal()
+
+    with Database(str(tmp_path / "tracker.db")) as db:
+        habit_id = db.add_habit(
+            "Snus",
+            "Pouches used",
+            constants.PERIODICITY_DAILY,
+            constants.HABIT_TYPE_ELIMINATION,
+        ).id
+        for offset in [6, 5, 3, 2, 1]:
+            db.upsert_record(today - offset, habit_id, offset)
+
+        # Act - Summarize every habit in SQL and in memory
+        summaries = db.get_habit_summaries(today)
+        habit_manager = HabitManager(db)
+        habit_manager.load_habits()
+        in_memory = habit_manager.get_habit_summaries()
+
+    # Assert - Not logged today, the streak still runs through yesterday
+    assert summaries[habit_id] == HabitSummary(habit_id, 0, 5, today - 1, 3)
+    assert in_memory == [summaries[habit.id] for habit in habit_manager.habits]
+
+
+def test_lazy_load_holds_today_and_loads_history_on_demand(tmp_path):
+    """
+    Test the fast startup path of HabitManager.load_habits(lazy=True).
+
+    Test scenario:
+    - Log a new habit on the last 3 days
+    - Lazy-load: only today's value is in memory, the dashboard still sees all
+    - Log a new value, then load the history on demand
+    - Verify the history holds the old days and the value logged after the lazy load
+    """
+    # Arrange - A habit logged on the last 3 days
+    today = date.today().toordinal()
+    path = str(tmp_path / "tracker.db")
+
+    with Database(path) as db:
+        habit_id = db.add_habit(
+            "Snus",
+            "Pouches used",
+            constants.PERIODICITY_DAILY,
+            constants.HABIT_TYPE_ELIMINATION,
+        ).id
+        for offset in range(3):
+            db.upsert_record(today - offset, habit_id, 5 + offset)
+
+    with Database(path, background_writer=True) as db:
+        habit_manager = HabitManager(db)
+
+        # Act - Lazy load, then log and open the full history
+        habit_manager.load_habits(lazy=True)
+        lazy_records = dict(habit_manager._get_habit_by_id(habit_id).records)
+        summary = habit_manager.get_habit_summaries()[-1]
+        habit_manager.log_today_habit(habit_id, 3)
+        habit_manager.ensure_history()
+        records = habit_manager._get_habit_by_id(habit_id).records
+
+    # Assert - Only today up front, everything once the history is loaded
+    assert lazy_records == {today: 5}
+    assert (summary.habit_id, summary.total, summary.current_streak) == (habit_id, 3, 3)
+    assert records == {today: 3, today - 1: 6, today - 2: 7}
+    assert habit_manager.history_loaded
+
+
+def test_migrates_unique_names_to_unique_active_names(tmp_path):
+    """
+    Test the migration dropping the UNIQUE constraint of habit names.
+
+    Test scenario:
+    - Create a database whose habits table has the previous UNIQUE name column
+    - Reopen it with Database
+    - Verify the partial index replaced the constraint, triggers and rows survived
+    """
+    # Arrange - Rebuild the habits table as older versions created it
+    path = tmp_path / "tracker.db"
+    with Database(str(path)):
+        pass
+    with sqlite3.connect(path) as conn:
+        conn.executescript(
+            """
+            DROP INDEX habits_active_name;
+            CREATE TABLE habits_old (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE,
+                description TEXT,
+                periodicity TEXT,
+                habit_type TEXT,
+                created TEXT,
+                archived INTEGER NOT NULL DEFAULT 0
+            );
+            INSERT INTO habits_old SELECT * FROM habits;
+            DROP TABLE habits;
+            ALTER TABLE habits_old RENAME TO habits;
+            PRAGMA user_version = 5;
+            """
+        )
+
+    # Act - Reopen, archive a habit and reuse its name
+    with Database(str(path)) as db:
+        db.delete_habit(constants.HABIT_SPORT_HABIT_ID)
+        generation = db.get_data_generation()
+        db.add_habit(
+            "Sport",
+            "",
+            constants.PERIODICITY_WEEKLY,
+            constants.HABIT_TYPE_ESTABLISHMENT,
+        )
+        names = [model.name for model in db.get_all_habits()]
+        schema = {
+            row[0]
+            for row in db.conn.execute(
+                "SELECT name FROM sqlite_master WHERE tbl_name = 'habits'"
+            )
+        }
+
+        # Assert - Rows kept, triggers recreated, constraint replaced
+        assert len(names) == len(constants.DEFAULT_HABITS)
+        assert db.get_data_generation() > generation
+        assert "habits_active_name" in schema and "habits_archived" in schema
+        assert "sqlite_autoindex_habits_1" not in schema
+        assert "habits_insert_generation" in schema
+
+
+def test_deleted_habits_are_archived_then_purged_in_batches(tmp_path):
+    """
+    Test soft deletes, restores and the batched purge of archived habits.
+
+    Test scenario:
+    - Archive a habit with 25 records through HabitManager.remove_habit
+    - Verify it is hidden from loads but keeps its records, then restore it
+    - Archive it again in the past and purge with a batch size of 10
+    - Verify every row of the habit is gone and its name can be reused
+    """
+    # Arrange - Habit with 25 days of records
+    today = date.today().toordinal()
+    path = str(tmp_path / "tracker.db")
+
+    with Database(path) as db:
+        habit_manager = HabitManager(db)
+        habit_manager.load_habits()
+        habit_manager.add_habit(
+            "Snus",
+            "Pouches used",
+            constants.PERIODICITY_DAILY,
+            constants.HABIT_TYPE_ELIMINATION,
+        )
+        habit_id = habit_manager.habits[-1].id
+        db.set_unit_cost(habit_id, constants.FIRST_PRICE_DAY, 1.0)
+        db.upsert_records([(today - offset, habit_id, 3) for offset in range(25)])
+
+        # Act - Archive, reload, restore
+        habit_manager.remove_habit("Snus")
+        archived = db.get_archived_habits()
+        loaded_ids = [model.id for model in db.get_all_habits()]
+        habit_manager.restore_habit(habit_id)
+        restored = habit_manager._get_habit_by_id(habit_id)
+
+        # Act - Archive long ago, then purge in batches
+        db.delete_habit(habit_id, day=today - constants.ARCHIVE_RETENTION_IN_DAYS - 1)
+        purged = db.purge_archived_habits(
+            today - constants.ARCHIVE_RETENTION_IN_DAYS, batch_size=10
+        )
+        reused = db.add_habit(
+            "Snus",
+            "Pouches used",
+            constants.PERIODICITY_DAILY,
+            constants.HABIT_TYPE_ELIMINATION,
+        )
+
+    # Assert - Hidden but kept while archived, restored with its history
+    assert archived == [(habit_id, "Snus", today)]
+    assert habit_id not in loaded_ids
+    assert len(restored.records) == 25
+
+    # Assert - Purged with all its rows, the name is free again
+    assert purged == 1
+    assert reused.id != habit_id
+    with sqlite3.connect(path) as conn:
+        for table, column in [
+            ("records", "habit_id"),
+            ("habit_prices", "habit_id"),
+            ("habits", "id"),
+        ]:
+            assert not conn.execute(
+                f"SELECT 1 FROM {table} WHERE {column} = ?", (habit_id,)
+            ).fetchall()
+
+
+def test_logs_are_appended_as_events_and_compacted_into_records(tmp_path):
+    """
+    Test the append-only event log and its compaction into records.
+
+    Test scenario:
+    - Log a new habit twice on the same day and once the day before
+    - Verify records hold only the last value per day once compacted
+    - Verify the history keeps every logged value with its time, in order
+    - Verify replaying the history as of an earlier time restores older values
+    """
+    # Arrange - New habit
+    today = date.today().toordinal()
+    path = str(tmp_path / "tracker.db")
+
+    with Database(path) as db:
+        habit_id = db.add_habit(
+            "Snus",
+            "Pouches used",
+            constants.PERIODICITY_DAILY,
+            constants.HABIT_TYPE_ELIMINATION,
+        ).id
+
+        # Act - Three appends, then a read that compacts them
+        started = int(time.time())
+        db.upsert_record(today - 1, habit_id, 5)
+        db.upsert_record(today, habit_id, 4)
+        db.upsert_record(today, habit_id, 2)
+        records = {m.id: m.records for m in db.get_all_habits()}[habit_id]
+        history = db.get_record_history(habit_id, today - 1, today)
+        watermark, last_seq = db.conn.execute(
+            "SELECT compacted_seq, (SELECT MAX(seq) FROM events) FROM event_log_state"
+        ).fetchone()
+
+    # Assert - Records are the folded current state, the log keeps everything
+    assert records == {today - 1: 5, today: 2}
+    assert [(e.day, e.value) for e in history] == [
+        (today - 1, 5),
+        (today, 4),
+        (today, 2),
+    ]
+    assert all(e.logged_at >= started for e in history)
+    assert watermark == last_seq
+
+    # Assert - Replaying as of an earlier time ignores later logs
+    history[2].logged_at = history[1].logged_at + 60
+    assert events.replay(history, as_of=history[1].logged_at) == {
+        today - 1: 5,
+        today: 4,
+    }
+
+
+def test_snapshot_serves_full_loads_until_data_changes(tmp_path):
+    """
+    Test the read-through habit snapshot.
+
+    Test scenario:
+    - Load all habits once, which writes the snapshot
+    - Verify the snapshot holds the same habits, records and prices as SQLite
+    - Log a value and verify the snapshot stays current and the value is
+      replayed onto it from the event log
+    - Set a price and verify it bumps the generation, so the old snapshot is
+      ignored and the next load rewrites it
+    - Write the snapshot from in-memory habits and verify it is served as is
+    """
+    # Arrange - Database with a snapshot next to it
+    today = date.today().toordinal()
+    path = str(tmp_path / "tracker.db")
+    snapshot_path = str(tmp_path / "habits.snapshot")
+
+    with Database(path, snapshot_path=snapshot_path) as db:
+        # Act - First load populates the snapshot
+        loaded = db.get_all_habits()
+        generation = db.get_data_generation()
+        cached, cached_seq = snapshot.read_snapshot(snapshot_path, generation)
+
+        # Assert - Same content as the SQLite load, prices included
+        assert cached == loaded
+        assert any(habit.prices for habit in cached)
+
+        # Act - Change records only
+        db.upsert_record(today, constants.HABIT_CIGARETTE_SMOKED_ID, 3)
+        after_log = db.get_data_generation()
+        replayed = {habit.id: habit for habit in db.get_all_habits()}
+
+        # Assert - Same generation; the logged value is replayed onto the snapshot
+        assert after_log == generation
+        assert snapshot.read_snapshot(snapshot_path, generation)[1] == cached_seq
+        assert replayed == {habit.id: habit for habit in db._load_habits()}
+        assert replayed[constants.HABIT_CIGARETTE_SMOKED_ID].records[today] == 3
+
+        # Act - Change prices
+        db.set_unit_cost(constants.HABIT_CIGARETTE_SMOKED_ID, today, 0.7)
+        after_price = db.get_data_generation()
+        reloaded = {habit.id: habit for habit in db.get_all_habits()}
+
+        # Act - Snapshot from a fully loaded manager
+        habit_manager = HabitManager(db)
+        habit_manager.load_habits()
+        habit_manager.log_today_habit(constants.HABIT_NICOTINE_GUM_USED_ID, 5)
+        db.refresh_snapshot([habit.to_model() for habit in habit_manager.habits])
+        final_seq = db._get_data_version()[1]
+
+    # Assert - Price changes invalidate the snapshot, which is rewritten on load
+    assert generation < after_price
+    assert snapshot.read_snapshot(snapshot_path, generation) is None
+    cigarettes = reloaded[constants.HABIT_CIGARETTE_SMOKED_ID]
+    assert cigarettes.records[today] == 3
+    assert cigarettes.prices[-1] == (today, 0.7)
+
+    # Assert - The exit snapshot holds the session's values at the final seq
+    habits, seq = snapshot.read_snapshot(snapshot_path, after_price)
+    assert seq == final_seq
+    by_id = {habit.id: habit for habit in habits}
+    assert by_id[constants.HABIT_NICOTINE_GUM_USED_ID].records[today] == 5
+    assert by_id[constants.HABIT_CIGARETTE_SMOKED_ID] == cigarettes
+
+
+def test_maintenance_runs_after_large_purges(tmp_path, monkeypatch):
+    """
+    Test the maintenance run and its automatic trigger.
+
+    Test scenario:
+    - Create a habit with 3000 logged days, then archive and purge it
+    - With a 1000 row threshold, verify single logs are not counted and the
+      purge ran maintenance on its own, in the background: free pages were
+      returned and planner statistics exist
+    - Run a full maintenance and verify the integrity check and size report
+    """
+    # Arrange - A long habit history and a low maintenance threshold
+    monkeypatch.setattr(constants, "MAINTENANCE_AFTER_ROWS", 1000)
+    path = str(tmp_path / "tracker.db")
+
+    with Database(path) as db:
+        habit_id = db.add_habit(
+            "Snus",
+            "Pouches used",
+            constants.PERIODICITY_DAILY,
+            constants.HABIT_TYPE_ELIMINATION,
+        ).id
+        for day in range(3001, 4001):
+            db.upsert_record(day, habit_id, 1)
+        single_logs_counted = db._rows_since_maintenance
+        db.upsert_records([(day, habit_id, day % 20) for day in range(1, 3001)])
+        db.wait_for_maintenance()
+        db.flush()
+        size_before = db.get_storage_report().file_size
+
+        # Act - Purging thousands of rows schedules maintenance
+        db.delete_habit(habit_id, day=1)
+        db.purge_archived_habits(archived_before=2)
+        db.wait_for_maintenance()
+        after_purge = db.get_storage_report()
+        has_statistics = db.conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()[0]
+
+        # Act - Full maintenance with integrity check
+        report = db.maintain(full=True)
+
+    # Assert - Space went back to the file system and the file is sound
+    assert single_logs_counted == 0
+    assert after_purge.freelist_count == 0
+    assert after_purge.file_size < size_before
+    assert has_statistics == 1
+    assert report.integrity_problems == []
+    assert report.storage.file_size == after_purge.file_size
+    assert {table.name for table in report.storage.objects} >= {"records", "events"}
+
+
+def test_backup_restores_snapshot_and_rejects_corruption(tmp_path):
+    """
+    Test the online backup and the verified restore.
+
+    Test scenario:
+    - Back up a database, compressed, while a value is pending in the writer
+    - Log another value after the backup and restore the backup
+    - Verify the restored database holds the first value but not the second,
+      and that the data generation moved forward
+    - Corrupt the backup and verify the restore is refused
+    """
+    # Arrange - Live database with a background writer
+    today = date.today().toordinal()
+    path = str(tmp_path / "tracker.db")
+    backup_path = str(tmp_path / "tracker.db.gz")
+
+    with Database(path, background_writer=True) as db:
+        db.upsert_record(today, constants.HABIT_CIGARETTE_SMOKED_ID, 3)
+
+        # Act - Back up, diverge, restore
+        result = db.backup(backup_path)
+        db.upsert_record(today, constants.HABIT_NICOTINE_GUM_USED_ID, 8)
+        generation = db.get_data_generation()
+        db.restore(backup_path)
+        restored = {habit.id: habit.records for habit in db.get_all_habits()}
+        restored_generation = db.get_data_generation()
+
+        # Act - Corrupt the compressed backup
+        with open(backup_path, "r+b") as file:
+            file.seek(result.size // 2)
+            file.write(b"corrupt")
+        with pytest.raises(ValueError):
+            db.restore(backup_path)
+
+    # Assert - The backup holds the state at backup time
+    assert result.size < result.pages * 4096
+    with open(f"{backup_path}.sha256", encoding="utf-8") as file:
+        assert file.read().split() == [result.sha256, "tracker.db.gz"]
+    assert restored[constants.HABIT_CIGARETTE_SMOKED_ID][today] == 3
+    assert today not in restored[constants.HABIT_NICOTINE_GUM_USED_ID]
+    assert restored_generation > generation
@@ -0,0 +1,155 @@
+"""
+Test suite for the goals module.
+
+This module contains unit tests for the goal evaluation of establishment
+habits: per period completion over the whole history in one sorted pass, the
+running period, goal streaks, and the HabitManager cache that serves the
+results until the habit is written or a new period starts.
+"""
+
+from datetime import date
+
+import pytest
+
+from src import cli, constants, goals
+from src.habit_manager import HabitManager
+from src.memory_storage import MemoryStorage
+
+
+def test_evaluate_goal_counts_met_missed_and_running_periods():
+    """
+    Test evaluating weekly sport sessions against a goal of 3 per week.
+
+    Test scenario:
+    - Habit created four full weeks before the current one
+    - Log 3, nothing, 1 + 2 split over two days and 4 sessions in those weeks,
+      and 1 session in the current week
+    - Verify periods, met periods, streak and the running week's value
+    """
+    # Arrange - Mondays of the current week and the four before it
+    today = date(2024, 3, 7).toordinal()  # Thursday
+    monday = today - 3
+    weeks = [monday - 7 * n for n in (4, 3, 2, 1)]
+    records = {
+        weeks[0]: 3,
+        weeks[2]: 1,
+        weeks[2] + 4: 2,
+        weeks[3] + 6: 4,
+        monday: 1,
+        # Future values are ignored
+        today + 1: 9,
+    }
+
+    # Act - Evaluate the whole history
+    progress = goals.evaluate_goal(
+        constants.HABIT_SPORT_HABIT_ID,
+        constants.PERIODICITY_WEEKLY,
+        weeks[0] + 2,
+        3,
+        records,
+        today,
+    )
+
+    # Assert - 3 of 4 completed weeks met; the last two in a row
+    assert (progress.periods, progress.met, progress.streak) == (4, 3, 2)
+    assert progress.rate == 0.75
+    assert progress.current_value == 1 and not progress.current_met
+
+    # Assert - Month boundaries, including December to January
+    assert goals.next_period_start(
+        constants.PERIODICITY_MONTHLY, date(2023, 12, 15).toordinal()
+    ) == (date(2024, 1, 1).toordinal())
+    monthly = goals.evaluate_goal(
+        constants.HABIT_SPECIALIST_APPOINTMENT_ID,
+        constants.PERIODICITY_MONTHLY,
+        date(2023, 11, 20).toordinal(),
+        1,
+        {date(2023, 12, 31).toordinal(): 1, date(2024, 1, 1).toordinal(): 1},
+        date(2024, 2, 10).toordinal(),
+    )
+    assert (monthly.periods, monthly.met, monthly.streak) == (3, 2, 2)
+
+
+def test_goal_progress_is_cached_per_version_and_period():
+    """
+    Test the HabitManager goal API on top of a storage engine.
+
+    Test scenario:
+    - Open a MemoryStorage seeded with the default goals
+    - Verify only establishment habits take goals and goals must be positive
+    - Verify repeated evaluations are served from the cache and a log
+      recomputes only the habit that was written
+    """
+    # Arrange - Default habits with their default goals
+    with MemoryStorage() as storage:
+        habit_manager = HabitManager(storage)
+        habit_manager.load_habits(lazy=True)
+        meditation = constants.HABIT_MEDITATION_TIME_ID
+
+        # Act / Assert - Defaults are loaded and evaluated with the full history
+        progress = {p.habit_id: p for p in habit_manager.get_goal_progress()}
+        assert habit_manager.history_loaded
+        assert {h: p.goal for h, p in progress.items()} == constants.DEFAULT_GOALS
+        assert progress[meditation].periods >= constants.DEFAULT_TIME_RANGE_IN_DAYS
+
+        # Act / Assert - Validation
+        with pytest.raises(ValueError):
+            habit_manager.set_habit_goal(constants.HABIT_CIGARETTE_SMOKED_ID, 5)
+        with pytest.raises(ValueError):
+            habit_manager.set_habit_goal(meditation, 0)
+
+        # Act - Evaluate again, then log today's meditation
+        habit_manager.get_goal_progress()
+        hits = habit_manager.analytics_cache.hits
+        habit_manager.get_goal_progress()
+        assert habit_manager.analytics_cache.hits == hits + len(constants.DEFAULT_GOALS)
+
+        habit_manager.log_today_habit(meditation, 12)
+        progress = {p.habit_id: p for p in habit_manager.get_goal_progress()}
+
+        # Assert - Only the logged habit was recomputed, and it meets today's goal
+        assert (
+            habit_manager.analytics_cache.hits
+            == hits + 2 * len(constants.DEFAULT_GOALS) - 1
+        )
+        assert progress[meditation].current_value == 12
+        assert progress[meditation].current_met
+
+        # Act - Remove the goal
+        habit_manager.set_habit_goal(meditation, None)
+
+        # Assert - Gone from the manager and the storage
+        assert meditation not in {p.habit_id for p in habit_manager.get_goal_progress()}
+        assert meditation not in storage.get_habit_goals()
+
+
+def test_current_goal_values_do_not_load_the_history(capsys):
+    """
+    Test the running-period goal values shown on the dashboard.
+
+    Test scenario:
+    - Open a MemoryStorage seeded with the default goals and load it lazily
+    - Log today's meditation, then show the dashboard
+    - Verify the history was not loaded and the running-period values match
+      a full evaluation
+    """
+    # Arrange - Default habits, loaded without their history
+    with MemoryStorage() as storage:
+        habit_manager = HabitManager(storage)
+        habit_manager.load_habits(lazy=True)
+        meditation = constants.HABIT_MEDITATION_TIME_ID
+        habit_manager.log_today_habit(meditation, 12)
+
+        # Act - Running-period values and the dashboard in lazy mode
+        values = habit_manager.get_current_goal_values()
+        cli.show_dashboard(habit_manager)
+        history_loaded = habit_manager.history_loaded
+
+        # Act - The full evaluation
+        progress = {p.habit_id: p for p in habit_manager.get_goal_progress()}
+
+    # Assert - Same running-period values, without loading the history first
+    assert not history_loaded
+    assert values == {h: p.current_value for h, p in progress.items()}
+    assert values[meditation] == 12
+    assert "today 12/" in capsys.readouterr().out
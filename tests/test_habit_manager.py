@@ -7,17 +7,23 @@ including:
 - Adding new habits to the system
 - Updating existing habit properties
 - Removing habits from tracking
+- Backfilling values for past days
+- One value per week or month when backfilling weekly and monthly habits
+- Validating unit costs
 - Database interaction validation
 
 The tests use mock database objects to isolate the habit management logic
 from database implementation details and ensure reliable, fast unit testing.
 """
 
-from datetime import datetime
+from datetime import date, datetime
 from unittest.mock import MagicMock
 
-from src import constants
+import pytest
+
+from src import constants, utils
 from src.habit_manager import Habit, HabitManager
+from src.memory_storage import MemoryStorage
 from src.models import HabitModel
 
 
@@ -170,3 +176,176 @@ def test_remove_habit():
 
     # Verify database deletion was called with correct habit ID
     mock_db.delete_habit.assert_called_with(existing_habit.id)
+
+
+def test_writes_bump_habit_version():
+    """
+    Test that every write operation bumps the habit version counter.
+
+    The version counter keys the analytics cache, so logging, updating and
+    removing a habit must each advance it.
+
+    Test scenario:
+    - Create a HabitManager with one habit at version 0
+    - Log, update and remove the habit
+    - Verify the version advanced after each operation
+    """
+    # Arrange - Manager with one habit
+    habit_manager = HabitManager(MagicMock())
+    habit_manager.habits = [
+        Habit(
+            HabitModel(
+                1,
+                "Sport",
+                "Engage in physical activity",
+                constants.PERIODICITY_WEEKLY,
+                constants.HABIT_TYPE_ESTABLISHMENT,
+                datetime.now(),
+                [],
+            )
+        )
+    ]
+    assert habit_manager.get_habit_version(1) == 0
+
+    # Act / Assert - Each write bumps the version
+    habit_manager.log_today_habit(1, 1)
+    assert habit_manager.get_habit_version(1) == 1
+
+    habit_manager.update_habit(
+        "Sport",
+        "Sport",
+        "Run",
+        constants.PERIODICITY_WEEKLY,
+        constants.HABIT_TYPE_ESTABLISHMENT,
+    )
+    assert habit_manager.get_habit_version(1) == 2
+
+    habit_manager.remove_habit("Sport")
+    assert habit_manager.get_habit_version(1) == 3
+
+
+def test_log_habit_values_validates_and_writes_one_batch():
+    """
+    Test backfilling several days with log_habit_values.
+
+    Test scenario:
+    - Create a weekly habit logged on the Monday of last week
+    - Reject a future day, two values in one week and a second day in last week
+    - Backfill two weeks and verify one batched database write
+    - Verify the in-memory store and the habit version were updated
+    """
+    # Arrange - Weekly habit logged on the Monday of last week
+    mock_db = MagicMock()
+    habit_manager = HabitManager(mock_db)
+    habit_manager.history_loaded = True
+    today = datetime.now().date().toordinal()
+    last_monday = utils.period_start(constants.PERIODICITY_WEEKLY, today) - 7
+    habit_manager.habits = [
+        Habit(
+            HabitModel(
+                1,
+                "Sport",
+                "Engage in physical activity",
+                constants.PERIODICITY_WEEKLY,
+                constants.HABIT_TYPE_ESTABLISHMENT,
+                datetime.now(),
+                {last_monday: 1},
+            )
+        )
+    ]
+
+    # Act / Assert - Invalid batches are rejected before anything is written
+    for entries in [
+        [(1, today + 1, 1)],
+        [(1, last_monday - 7, 1), (1, last_monday - 6, 1)],
+        [(1, last_monday + 1, 1)],
+    ]:
+        with pytest.raises(ValueError):
+            habit_manager.log_habit_values(entries)
+    mock_db.upsert_records.assert_not_called()
+
+    # Act - Backfill two weeks ago, overwrite last week and log today
+    habit_manager.log_habit_values(
+        [(1, last_monday - 7, 1), (1, last_monday, 0), (1, today, 2)]
+    )
+
+    # Assert - One batched write, stores and version updated
+    mock_db.upsert_records.assert_called_once_with(
+        [(last_monday - 7, 1, 1), (last_monday, 1, 0), (today, 1, 2)]
+    )
+    assert habit_manager.habits[0].records == {
+        last_monday - 7: 1,
+        last_monday: 0,
+        today: 2,
+    }
+    assert habit_manager.get_habit_version(1) == 1
+
+
+def test_one_value_per_period_applies_to_backfills_only(monkeypatch):
+    """
+    Test that only backfills are limited to one value per week or month.
+
+    Test scenario:
+    - Store a value on the Monday of a week for a weekly habit
+    - Lazily load the habits on the Wednesday of that week
+    - Verify logging today adds a second value to the week, so weekly goals
+      can be reached session by session
+    - Verify backfilling another day of that week is rejected
+    """
+    # Arrange - Weekly value on Monday, session on Wednesday
+    monday = date(2024, 3, 4).toordinal()
+    wednesday = monday + 2
+    storage = MemoryStorage(default_data=False)
+    sport = storage.add_habit(
+        "Sport",
+        "Runs",
+        constants.PERIODICITY_WEEKLY,
+        constants.HABIT_TYPE_ESTABLISHMENT,
+    ).id
+    storage.upsert_records([(monday, sport, 1)])
+    habit_manager = HabitManager(storage)
+    monkeypatch.setattr(habit_manager, "_get_today_key", lambda: wednesday)
+    habit_manager.load_habits(lazy=True)
+
+    # Act - Log today's session
+    habit_manager.log_today_habit(sport, 2)
+
+    # Assert - Both sessions are kept in the week
+    assert storage.get_all_habits()[0].records == {monday: 1, wednesday: 2}
+
+    # Act / Assert - A backfill of Tuesday would add a value to a filled week
+    with pytest.raises(ValueError, match="already has a value"):
+        habit_manager.log_habit_values([(sport, monday + 1, 3)])
+    assert storage.get_all_habits()[0].records == {monday: 1, wednesday: 2}
+
+
+def test_set_unit_cost_rejects_prices_that_are_not_finite_or_negative():
+    """
+    Test the validation of unit costs before they reach the price history.
+
+    Test scenario:
+    - Set NaN, infinite and negative unit costs on a MemoryStorage habit
+    - Verify each is rejected and nothing was stored
+    - Verify a free (0) and a regular price are stored
+    """
+    # Arrange - One elimination habit without prices
+    storage = MemoryStorage(default_data=False)
+    snus = storage.add_habit(
+        "Snus", "Pouches", constants.PERIODICITY_DAILY, constants.HABIT_TYPE_ELIMINATION
+    ).id
+    habit_manager = HabitManager(storage)
+    habit_manager.load_habits()
+
+    # Act / Assert - Invalid prices change nothing
+    for unit_cost in (float("nan"), float("inf"), float("-inf"), -0.5):
+        with pytest.raises(ValueError):
+            habit_manager.set_unit_cost(snus, unit_cost)
+    assert habit_manager._get_habit_by_id(snus).prices == []
+
+    # Act / Assert - Valid prices are stored
+    habit_manager.set_unit_cost(snus, 0.0, effective_day=1)
+    habit_manager.set_unit_cost(snus, 0.25, effective_day=2)
+    assert [price for _, price in habit_manager._get_habit_by_id(snus).prices] == [
+        0.0,
+        0.25,
+    ]
@@ -0,0 +1,137 @@
+"""
+Test suite for the reduction plan engine.
+
+This module contains unit tests for the taper curves of the plan engine and
+for building plans for all elimination habits at once. Habits are created in
+memory with a mocked database, like the habit manager tests. It also checks
+that plan adherence is kept up to date incrementally as values are logged.
+"""
+
+from datetime import date, datetime
+from unittest.mock import MagicMock
+
+from src import adherence, constants, plans
+from src.habit_manager import Habit, HabitManager
+from src.models import HabitModel, HabitRecordModel
+
+
+def make_manager(records_by_habit: dict[int, dict[int, int]]) -> HabitManager:
+    """Create a HabitManager holding one daily elimination habit per entry."""
+    habit_manager = HabitManager(MagicMock())
+    habit_manager.habits = [
+        Habit(
+            HabitModel(
+                habit_id,
+                f"Habit {habit_id}",
+                "",
+                constants.PERIODICITY_DAILY,
+                constants.HABIT_TYPE_ELIMINATION,
+                datetime.now(),
+                [HabitRecordModel(day, habit_id, v) for day, v in records.items()],
+            )
+        )
+        for habit_id, records in records_by_habit.items()
+    ]
+    return habit_manager
+
+
+def test_taper_curves_start_at_value_and_reach_zero():
+    """
+    Test the shape of every taper curve.
+
+    Test scenario:
+    - Build plans of each curve for a habit starting at 20
+    - Verify every plan starts at 20, never increases and reaches 0
+    - Verify the linear plan matches the historical CLI formula
+    - Verify the stepwise plan holds one plateau per week
+    """
+    # Arrange - One habit logged at 20 today
+    today = date.today().toordinal()
+    habit_manager = make_manager({1: {today: 20}})
+    n_days = constants.DEFAULT_TIME_RANGE_IN_DAYS
+
+    for curve in constants.PLAN_CURVES:
+        # Act - Build the plan for this curve
+        (plan,) = plans.build_reduction_plans(habit_manager, curve, today=today)
+
+        # Assert - Monotonic taper from the starting value
+        assert plan.start_day == today
+        assert len(plan.targets) == n_days
+        assert plan.targets[0] == 20
+        assert all(a >= b for a, b in zip(plan.targets, plan.targets[1:]))
+        assert plan.targets[-1] <= 1
+
+    (linear,) = plans.build_reduction_plans(habit_manager, today=today)
+    assert linear.targets == [
+        max(0, round(20 - i * 20 / n_days)) for i in range(n_days)
+    ]
+
+    (stepwise,) = plans.build_reduction_plans(
+        habit_manager, constants.PLAN_CURVE_STEPWISE, today=today
+    )
+    assert len(set(stepwise.targets[:7])) == 1
+    assert stepwise.targets[-7:] == [0] * 7
+
+
+def test_adaptive_plan_follows_steeper_recent_trend():
+    """
+    Test that the adaptive curve follows a trend faster than linear.
+
+    Test scenario:
+    - Habit 1 decreased by 2 per day over the last week, habit 2 stayed flat
+    - Build adaptive plans for both at once
+    - Verify habit 1 keeps its 2/day pace and habit 2 falls back to linear
+    """
+    # Arrange - A steep and a flat history ending today at 10
+    today = date.today().toordinal()
+    steep = {today - i: 10 + 2 * i for i in range(7)}
+    flat = {today - i: 10 for i in range(7)}
+    habit_manager = make_manager({1: steep, 2: flat})
+
+    # Act - Build adaptive plans for all elimination habits
+    steep_plan, flat_plan = plans.build_reduction_plans(
+        habit_manager, constants.PLAN_CURVE_ADAPTIVE, today=today
+    )
+
+    # Assert - Steep trend is kept, flat one uses the linear pace
+    assert steep_plan.targets[:6] == [10, 8, 6, 4, 2, 0]
+    assert (
+        flat_plan.targets
+        == plans.build_reduction_plans(habit_manager, today=today)[1].targets
+    )
+
+
+def test_plan_progress_is_updated_incrementally_on_log():
+    """
+    Test that logging keeps the plan progress equal to a full recomputation.
+
+    Test scenario:
+    - Save a linear plan that started 2 days ago, with 2 days already logged
+    - Log today's value twice, the second log replacing the first
+    - Verify the stored progress matches a recomputation from all records
+    - Verify the progress was persisted and a quit day is projected
+    """
+    # Arrange - Habit logged at 20 and 18 over the last two days
+    today = date.today().toordinal()
+    habit_manager = make_manager({1: {today - 2: 20, today - 1: 18}})
+    (plan,) = plans.build_reduction_plans(habit_manager, today=today - 2)
+    habit_manager.save_reduction_plans([plan])
+
+    # Act - Log today, then correct today's value
+    habit_manager.log_today_habit(1, 30)
+    habit_manager.log_today_habit(1, 15)
+
+    # Assert - Incremental progress equals the full recomputation
+    progress = habit_manager.get_plan_progress(1)
+    assert progress == adherence.progress_from_records(
+        1,
+        today - 2,
+        habit_manager.plan_targets[1],
+        habit_manager.habits[0].records,
+        today,
+    )
+    assert progress.logged_days == 3
+    assert progress.cumulative_deviation == (20 - 20) + (18 - 19) + (15 - 19)
+    # Trend 20, 18, 15 -> slope -2.5, intercept 20.17, zero after 8.07 days
+    assert progress.projected_quit_day == today - 2 + 9
+    habit_manager.db.save_plan_progress.assert_called_with(progress)
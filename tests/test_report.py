@@ -0,0 +1,55 @@
+"""
+Test suite for the report module.
+
+This module contains tests for the static HTML report, run against a real
+database file in a temporary directory so that habit revisions come from the
+event log. It tests:
+- The self-contained report with dashboard, plans and SVG charts
+- Incremental regeneration that re-renders only the habits written since
+"""
+
+from datetime import date
+
+from src import constants, report
+from src.db import Database
+from src.habit_manager import HabitManager
+
+
+def test_write_report_rerenders_only_changed_habits(tmp_path):
+    """
+    Test the report output and its incremental regeneration.
+
+    Test scenario:
+    - Write the report of the default habits with their sample data
+    - Verify every section is rendered and the HTML holds the sections and charts
+    - Write it again unchanged and verify every habit section is reused
+    - Log a value for one habit and verify only that habit is rendered again
+    """
+    # Arrange - Database seeded with the default habits and sample data
+    path = str(tmp_path / "report.html")
+
+    with Database(str(tmp_path / "tracker.db")) as db:
+        habit_manager = HabitManager(db)
+        habit_manager.load_habits()
+        n_habits = len(habit_manager.habits)
+
+        # Act - First report
+        first = report.write_report(habit_manager, path)
+
+        # Assert - Everything was rendered into one self-contained file
+        with open(path, encoding="utf-8") as file:
+            html = file.read()
+        assert first == report.ReportStats(rendered=n_habits, reused=0)
+        assert html.count('<section class="habit">') == n_habits
+        assert "<svg" in html and "Reduction plans" in html and "Dashboard" in html
+        assert "Cigarettes Smoked" in html
+
+        # Act - Regenerate without changes, then after logging one habit
+        second = report.write_report(habit_manager, path)
+        habit_manager.log_today_habit(constants.HABIT_CIGARETTE_SMOKED_ID, 3)
+        third = report.write_report(habit_manager, path)
+
+    # Assert - Only the logged habit was rendered again
+    assert second == report.ReportStats(rendered=0, reused=n_habits)
+    assert third == report.ReportStats(rendered=1, reused=n_habits - 1)
+    assert f"Habit report {date.today()}" in html
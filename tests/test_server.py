@@ -0,0 +1,129 @@
+"""
+Test suite for the HTTP JSON API server.
+
+This module starts the server on an ephemeral local port against a real
+database file and exercises its endpoints over a single keep-alive connection.
+"""
+
+import http.client
+import json
+import threading
+
+from src import constants
+from src.db import Database
+from src.habit_manager import HabitManager
+from src.server import TrackerHTTPServer
+
+
+def request(conn: http.client.HTTPConnection, method: str, path: str, body=None):
+    """Send a JSON request and return the status and decoded payload."""
+    data = json.dumps(body) if body is not None else None
+    conn.request(method, path, body=data, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_server_endpoints_over_keep_alive_connection(tmp_path):
+    """
+    Test the JSON endpoints of the HTTP server.
+
+    Test scenario:
+    - Start the server over a HabitManager loaded from a fresh database
+    - Log a value, then read habits, streaks, weekly stats and plans
+    - Verify responses and error statuses, including values that are not
+      non-negative integers, unknown periodicities and habit types, bad day
+      counts, out of range values and storage failures, all on one reused
+      connection
+    """
+    # Arrange - Server on an ephemeral port
+    with Database(str(tmp_path / "tracker.db")) as db:
+        habit_manager = HabitManager(db)
+        habit_manager.load_habits()
+        server = TrackerHTTPServer(("127.0.0.1", 0), habit_manager)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_port)
+
+        try:
+            # Act - Log today's cigarettes
+            status, payload = request(
+                conn,
+                "POST",
+                f"/habits/{constants.HABIT_CIGARETTE_SMOKED_ID}/log",
+                {"value": 12},
+            )
+            assert status == 200
+            assert payload["value"] == 12
+
+            # Assert - Habits reflect the logged value
+            status, habits = request(conn, "GET", "/habits")
+            assert status == 200
+            assert len(habits) == len(constants.DEFAULT_HABITS)
+            cigarettes = next(
+                h for h in habits if h["id"] == constants.HABIT_CIGARETTE_SMOKED_ID
+            )
+            assert cigarettes["today"] == 12
+
+            # Assert - Analytics endpoints answer with JSON
+            status, streaks = request(conn, "GET", "/streaks")
+            assert status == 200
+            assert streaks["all"] >= 1
+            status, weekly = request(conn, "GET", "/stats/weekly")
+            assert status == 200
+            assert weekly["spent"] >= 12
+            status, plans = request(conn, "GET", "/plans")
+            assert plans["Cigarettes Smoked"][0] == 12
+
+            # Assert - Errors map to 404, 400 and 500
+            assert request(conn, "POST", "/habits/999/log", {"value": 1})[0] == 404
+            assert request(conn, "POST", "/habits/1/log", {"value": "x"})[0] == 400
+            assert request(conn, "GET", "/unknown")[0] == 404
+            status, payload = request(conn, "POST", "/habits/1/log", {"value": 2**63})
+            assert status == 400 and "out of range" in payload["error"]
+            assert (
+                request(conn, "POST", "/habits/1/completions", {"ts": 2**62})[0] == 400
+            )
+            for value in (2.9, "3", True, -1):
+                assert (
+                    request(conn, "POST", "/habits/1/log", {"value": value})[0] == 400
+                )
+            for periodicity, habit_type in (
+                ("YEARLY", constants.HABIT_TYPE_ESTABLISHMENT),
+                (constants.PERIODICITY_DAILY, "WHATEVER"),
+            ):
+                new_habit = {
+                    "name": "Yoga",
+                    "periodicity": periodicity,
+                    "habit_type": habit_type,
+                }
+                assert request(conn, "POST", "/habits", new_habit)[0] == 400
+            for path in ("/habits/1/history?days=0", "/costs?days=-1", "/costs?days=x"):
+                assert request(conn, "GET", path)[0] == 400
+            assert request(conn, "GET", "/habits/1/history?days=7")[0] == 200
+            assert request(conn, "GET", "/habits/1/completions?by=0")[0] == 400
+            assert habit_manager.get_today_habit_value(1) == 12
+
+            # Assert - Storage errors are JSON errors, not a dropped connection
+            status, payload = request(
+                conn,
+                "POST",
+                "/habits",
+                {
+                    "name": "Cigarettes Smoked",
+                    "periodicity": constants.PERIODICITY_DAILY,
+                    "habit_type": constants.HABIT_TYPE_ELIMINATION,
+                },
+            )
+            assert status == 400 and "already exists" in payload["error"]
+            db.conn.execute("DROP TABLE habit_goals")
+            status, payload = request(
+                conn,
+                "POST",
+                f"/habits/{constants.HABIT_SPORT_HABIT_ID}/goal",
+                {"goal": 2},
+            )
+            assert status == 500 and "habit_goals" in payload["error"]
+        finally:
+            conn.close()
+            server.shutdown()
+            server.server_close()
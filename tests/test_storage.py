@@ -0,0 +1,240 @@
+"""
+Test suite for the storage engines.
+
+This module runs the same habit tracking session against every engine that
+implements the Storage protocol: the SQLite Database on a file and on
+":memory:", and the pure in-memory MemoryStorage. Random sample data is made
+identical by seeding the random generator, so every engine must give the
+same answers to every query.
+"""
+
+import random
+from dataclasses import asdict
+from datetime import date
+
+import pytest
+
+from src import constants
+from src.db import Database
+from src.habit_manager import HabitManager
+from src.memory_storage import MemoryStorage
+from src.models import ReductionPlan
+from src.storage import Storage
+
+ENGINES = {
+    "sqlite-file": lambda tmp_path: Database(str(tmp_path / "tracker.db")),
+    "sqlite-memory": lambda _tmp_path: Database(":memory:"),
+    "memory": lambda _tmp_path: MemoryStorage(),
+}
+
+
+def run_session(storage: Storage) -> dict:
+    """Log, plan, price, set goals, archive and query through a HabitManager; return every answer."""
+    today = date.today().toordinal()
+    habit_manager = HabitManager(storage)
+    habit_manager.load_habits()
+
+    habit_manager.add_habit(
+        "Snus", "Pouches", constants.PERIODICITY_DAILY, constants.HABIT_TYPE_ELIMINATION
+    )
+    snus = habit_manager._get_habit_by_name("Snus").id
+    storage.save_plans(
+        [
+            ReductionPlan(
+                constants.HABIT_CIGARETTE_SMOKED_ID, "LINEAR", today - 2, [9, 8, 7, 6]
+            )
+        ]
+    )
+    habit_manager.load_habits()
+    habit_manager.log_habit_values(
+        [
+            (snus, today - 1, 4),
+            (snus, today, 3),
+            (constants.HABIT_CIGARETTE_SMOKED_ID, today, 8),
+        ]
+    )
+    habit_manager.log_today_habit(snus, 2)
+    habit_manager.set_unit_cost(snus, 0.25)
+    habit_manager.log_completion(constants.HABIT_NICOTINE_GUM_USED_ID, 1_000_000)
+    habit_manager.update_habit(
+        "Sport",
+        "Running",
+        "Runs",
+        constants.PERIODICITY_WEEKLY,
+        constants.HABIT_TYPE_ESTABLISHMENT,
+    )
+    habit_manager.set_habit_goal(constants.HABIT_SPORT_HABIT_ID, 2)
+    habit_manager.remove_habit("Meditation Time")
+    storage.flush()
+
+    return {
+        "habits": [
+            (h.id, h.name, h.description, h.periodicity, h.records, h.prices)
+            for h in sorted(storage.get_all_habits(), key=lambda h: h.id)
+        ],
+        "archived": [
+            (habit_id, name) for habit_id, name, _ in storage.get_archived_habits()
+        ],
+        "summaries": storage.get_habit_summaries(today),
+        "costs": [
+            asdict(report) for report in storage.get_cost_report(today - 30, today)
+        ],
+        "adherence": storage.get_plan_adherence(today),
+        "targets": storage.get_plan_targets(),
+        "goals": storage.get_habit_goals(),
+        "goal_progress": [asdict(p) for p in habit_manager.get_goal_progress()],
+        "history": [
+            (e.day, e.value) for e in storage.get_record_history(snus, today - 1, today)
+        ],
+        "completions": list(
+            storage.get_completions(constants.HABIT_NICOTINE_GUM_USED_ID)
+        ),
+        "revised": sorted(storage.get_habit_revisions()),
+        "purged": storage.purge_archived_habits(today + 1),
+        "archived_after_purge": storage.get_archived_habits(),
+    }
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_implement_the_storage_protocol(engine, tmp_path):
+    """
+    Test that every engine satisfies the Storage protocol at runtime.
+
+    Test scenario:
+    - Open each engine
+    - Verify it is recognized as a Storage and seeded with the default habits
+    """
+    # Arrange / Act - Open the engine
+    with ENGINES[engine](tmp_path) as storage:
+        habits = storage.get_all_habits()
+
+    # Assert - Protocol and default data
+    assert isinstance(storage, Storage)
+    assert [(h.id, h.name) for h in habits] == sorted(
+        (habit_id, name) for habit_id, name, *_ in constants.DEFAULT_HABITS
+    )
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_archived_names_can_be_reused_without_losing_history(engine, tmp_path):
+    """
+    Test that names are unique among active habits only.
+
+    Test scenario:
+    - Archive a habit with records and add a new habit with the same name
+    - Verify the archived habit and its records are kept for restoring
+    - Verify restoring it is refused while the new habit holds the name
+    - Verify every engine refuses a second active habit with the name, by
+      adding or by renaming, with the same error
+    - Verify a refused rename leaves HabitManager's habits and names unchanged
+    """
+    # Arrange - Archived habit with a record
+    today = date.today().toordinal()
+    with ENGINES[engine](tmp_path) as storage:
+        old = storage.add_habit(
+            "Snus", "", constants.PERIODICITY_DAILY, constants.HABIT_TYPE_ELIMINATION
+        ).id
+        storage.upsert_records([(today, old, 3)])
+        storage.flush()
+        storage.delete_habit(old)
+
+        # Act - Reuse the name
+        new = storage.add_habit(
+            "Snus", "", constants.PERIODICITY_DAILY, constants.HABIT_TYPE_ELIMINATION
+        ).id
+
+        # Assert - Both exist; the archived one still has its history
+        assert new != old
+        assert [
+            (habit_id, name) for habit_id, name, _ in storage.get_archived_habits()
+        ] == [(old, "Snus")]
+        assert [e.value for e in storage.get_record_history(old, today, today)] == [3]
+        with pytest.raises(ValueError, match="same name"):
+            storage.restore_habit(old)
+
+        # Act / Assert - Active names stay unique in every engine
+        with pytest.raises(ValueError, match="already exists"):
+            storage.add_habit(
+                "Snus",
+                "",
+                constants.PERIODICITY_DAILY,
+                constants.HABIT_TYPE_ELIMINATION,
+            )
+        with pytest.raises(ValueError, match="already exists"):
+            storage.update_habit(
+                constants.HABIT_SPORT_HABIT_ID,
+                "Snus",
+                "",
+                constants.PERIODICITY_WEEKLY,
+                constants.HABIT_TYPE_ESTABLISHMENT,
+            )
+
+        # Act - Rename Sport to an active habit's name through HabitManager
+        habit_manager = HabitManager(storage)
+        habit_manager.load_habits()
+        with pytest.raises(ValueError, match="already exists"):
+            habit_manager.update_habit(
+                "Sport",
+                "Cigarettes Smoked",
+                "",
+                constants.PERIODICITY_WEEKLY,
+                constants.HABIT_TYPE_ESTABLISHMENT,
+            )
+        habit_manager.remove_habit("Cigarettes Smoked")
+
+        # Assert - The name still led to the cigarette habit, Sport is untouched
+        archived_ids = {habit_id for habit_id, _, _ in storage.get_archived_habits()}
+        assert constants.HABIT_CIGARETTE_SMOKED_ID in archived_ids
+        assert constants.HABIT_SPORT_HABIT_ID not in archived_ids
+        assert habit_manager._get_habit_by_name("Sport").id == (
+            constants.HABIT_SPORT_HABIT_ID
+        )
+
+
+def test_engines_give_identical_answers(tmp_path):
+    """
+    Test that the engines are interchangeable.
+
+    Test scenario:
+    - Run the same session with the same random seed on every engine
+    - Verify each query returns the same result as on the SQLite file engine
+    """
+    # Arrange / Act - One session per engine
+    results = {}
+    for engine, open_engine in ENGINES.items():
+        random.seed(42)
+        with open_engine(tmp_path) as storage:
+            results[engine] = run_session(storage)
+
+    # Assert - Every answer matches the SQLite file engine
+    expected = results["sqlite-file"]
+    assert expected["purged"] == 1 and expected["history"][-1] == (
+        date.today().toordinal(),
+        2,
+    )
+    for engine in ("sqlite-memory", "memory"):
+        for query, answer in expected.items():
+            assert results[engine][query] == answer, (engine, query)
+
+
+def test_memory_storage_loads_from_database(tmp_path):
+    """
+    Test copying a database into memory for batch analytics.
+
+    Test scenario:
+    - Open a SQLite database and copy it with MemoryStorage.load_from
+    - Verify habits, summaries and cost reports match the database
+    """
+    # Arrange - Database with default data
+    today = date.today().toordinal()
+
+    with Database(str(tmp_path / "tracker.db")) as db:
+        # Act - Load it into memory once
+        storage = MemoryStorage.load_from(db)
+
+        # Assert - Same data and aggregates
+        assert storage.get_all_habits() == db.get_all_habits()
+        assert storage.get_habit_summaries(today) == db.get_habit_summaries(today)
+        assert storage.get_cost_report(today - 28, today) == db.get_cost_report(
+            today - 28, today
+        )
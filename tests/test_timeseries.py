@@ -0,0 +1,109 @@
+"""
+Test suite for the timeseries module.
+
+This module contains unit tests for the streaming (day, value) generators that
+feed plotting, CSV export and the weekly statistics. Habits are created in
+memory like in the analytics tests.
+"""
+
+import io
+from datetime import date, datetime
+
+from src import constants, timeseries
+from src.habit_manager import Habit
+from src.models import HabitModel
+
+
+def test_series_is_dense_or_skips_missing_days():
+    """
+    Test the dense and the logged-days-only variants of series.
+
+    Test scenario:
+    - Records on days 3 and 5 of the window 3..6
+    - Verify the dense series fills days 4 and 6 with 0
+    - Verify fill=None yields only the logged days, in order
+    """
+    # Arrange - Sparse record store
+    records = {5: 2, 3: 5, 10: 1}
+
+    # Act - Stream both variants
+    dense = list(timeseries.series(records, 3, 6))
+    logged = list(timeseries.series(records, 3, 6, fill=None))
+
+    # Assert - Only the window is emitted, in day order
+    assert dense == [(3, 5), (4, 0), (5, 2), (6, 0)]
+    assert logged == [(3, 5), (5, 2)]
+    assert timeseries.window(7, 100) == (94, 100)
+
+
+def test_write_csv_streams_one_row_per_day():
+    """
+    Test the CSV export of several habits.
+
+    Test scenario:
+    - Two habits logged on different days of a 3-day window
+    - Verify the header, one row per day and empty cells for missing days
+    """
+    # Arrange - Two habits with partly overlapping records
+    start = date(2024, 1, 1).toordinal()
+    habits = [
+        Habit(
+            HabitModel(
+                habit_id,
+                name,
+                "",
+                constants.PERIODICITY_DAILY,
+                constants.HABIT_TYPE_ELIMINATION,
+                datetime.now(),
+                records,
+            )
+        )
+        for habit_id, name, records in [
+            (1, "Cigarettes", {start: 10, start + 2: 8}),
+            (2, "Gum", {start + 1: 3}),
+        ]
+    ]
+    file = io.StringIO()
+
+    # Act - Export the 3 days
+    n_rows = timeseries.write_csv(habits, file, start, start + 2)
+
+    # Assert - Header plus one line per day
+    assert n_rows == 3
+    assert file.getvalue().splitlines() == [
+        "date,Cigarettes,Gum",
+        "2024-01-01,10,",
+        "2024-01-02,,3",
+        "2024-01-03,8,",
+    ]
+
+
+def test_chart_points_downsample_long_ranges():
+    """
+    Test the chart resolution chosen for short and long ranges.
+
+    Test scenario:
+    - A constant daily value over 28 days, 1 year and 10 years
+    - Verify 28 days stay daily, a year becomes weekly means and ten years
+      monthly means, never exceeding the point budget
+    - Verify LTTB keeps the first, last and peak points of a series
+    """
+    # Arrange - Ten years of a constant value ending on a fixed day
+    end = date(2024, 6, 30).toordinal()
+    records = {end - i: 4 for i in range(3650)}
+
+    # Act - Build the chart points for each range
+    daily = timeseries.chart_points(records, end - 27, end)
+    weekly = timeseries.chart_points(records, end - 364, end)
+    monthly = timeseries.chart_points(records, end - 3649, end, max_points=100)
+
+    # Assert - Coarser resolutions with the averages preserved
+    assert daily[0] == "daily" and len(daily[1]) == 28
+    assert weekly[0] == "weekly" and 52 <= len(weekly[1]) <= 53
+    assert all(value == 4 for _, value in weekly[1])
+    assert monthly[0] == "monthly" and len(monthly[1]) == 100
+
+    points = [(day, 10 if day == 50 else 0) for day in range(100)]
+    kept = timeseries.lttb(points, 10)
+    assert len(kept) == 10
+    assert kept[0] == points[0] and kept[-1] == points[-1] and (50, 10) in kept